@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+pytest 公共设置：整个测试过程中把质数表的磁盘缓存指向临时目录，不在用户主目录下留下文件
+"""
+
+import os
+
+import pytest
+
+from prime_table import TABLE_DIR_ENV
+
+
+@pytest.fixture(autouse=True, scope='session')
+def prime_table_dir(tmp_path_factory):
+    saved = os.environ.get(TABLE_DIR_ENV)
+    os.environ[TABLE_DIR_ENV] = str(tmp_path_factory.mktemp('prime_table'))
+    yield os.environ[TABLE_DIR_ENV]
+    if saved is None:
+        del os.environ[TABLE_DIR_ENV]
+    else:
+        os.environ[TABLE_DIR_ENV] = saved
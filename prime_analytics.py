@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式质数统计
+功能：在生成质数的同时逐块归约出统计量，不保存质数列表、不写质数文件：
+     间隔直方图、首次出现的间隔与最大间隔纪录、孪生 / 表兄弟质数对与质数四元组个数、模 m 的剩余类计数。
+     每个归约器只统计完全落在一块之内的对象，跨越块边界的间隔和质数组由 cross() 用前一部分的最后几个质数
+     和后一部分的最前几个质数补上；因此相邻范围（块、分片、不同进程或机器上的结果）的统计状态可以按顺序合并，
+     合并结果与一次性顺序统计完全相同。状态可以转成 JSON（to_dict / from_dict），便于检查点和分布式汇总
+
+使用示例：
+    from prime_analytics import PrimeAnalytics, analyze_range
+    stats = analyze_range(10**12, 10**12 + 10**9, workers=8)
+    print(stats.report())
+
+    python prime_analytics.py 1000000000000 1000100000000 --workers 4 --mod 6 --mod 30
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+# 默认统计的质数组：名称 → 相对第一个质数的偏移
+CONSTELLATIONS = {
+    'twin': (0, 2),                # 孪生质数 p, p+2
+    'cousin': (0, 4),              # 表兄弟质数 p, p+4
+    'quadruplet': (0, 2, 6, 8),    # 质数四元组 p, p+2, p+6, p+8
+}
+
+CONSTELLATION_NAMES = {'twin': '孪生质数对', 'cousin': '表兄弟质数对', 'quadruplet': '质数四元组'}
+
+# 边界上保留的质数个数：任意连续 9 个整数中至多有 4 个质数（2, 3, 5, 7），
+# 足以覆盖跨度不超过 8 的质数组
+EDGE = 4
+
+# 默认统计的剩余类模数
+DEFAULT_MODULI = (6,)
+
+# NumPy 归约只用于小于该值的质数（int64）
+_ARRAY_LIMIT = 1 << 63
+
+
+def _as_block(primes):
+    """把一块质数转成归约器使用的形式：能用 int64 表示时为 NumPy 数组，否则为 Python 列表"""
+    if np is not None and len(primes) and primes[-1] < _ARRAY_LIMIT:
+        if getattr(primes, 'typecode', None) == 'Q':
+            return np.frombuffer(primes, dtype=np.uint64).astype(np.int64)
+        return np.asarray(primes, dtype=np.int64)
+    return [int(p) for p in primes]
+
+
+class GapHistogram:
+    """相邻质数间隔的直方图 {间隔: 次数}"""
+
+    kind = 'gaps'
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def update(self, block):
+        if len(block) < 2:
+            return
+        if isinstance(block, list):
+            self.counts.update(b - a for a, b in zip(block, block[1:]))
+            return
+        gaps, counts = np.unique(np.diff(block), return_counts=True)
+        self.counts.update(dict(zip(gaps.tolist(), counts.tolist())))
+
+    def cross(self, tail, head):
+        if tail and head:
+            self.counts[head[0] - tail[-1]] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def result(self):
+        return dict(sorted(self.counts.items()))
+
+    def to_dict(self):
+        return {'kind': self.kind, 'counts': sorted(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, state):
+        reducer = cls()
+        reducer.counts = Counter({gap: count for gap, count in state['counts']})
+        return reducer
+
+
+class GapRecords:
+    """
+    每种间隔第一次出现的位置 {间隔: 前一个质数}，以及由此得到的最大间隔纪录
+    （从范围起点开始，比之前所有间隔都大的间隔）
+    """
+
+    kind = 'records'
+
+    def __init__(self):
+        self.first = {}
+
+    def update(self, block):
+        if len(block) < 2:
+            return
+        if isinstance(block, list):
+            for a, b in zip(block, block[1:]):
+                self.first.setdefault(b - a, a)
+            return
+        # 新出现的间隔很少：先用 bincount 找出本块有哪些间隔，只对没见过的间隔定位第一次出现的位置
+        gaps = np.diff(block)
+        for gap in np.flatnonzero(np.bincount(gaps)).tolist():
+            if gap not in self.first:
+                self.first[gap] = int(block[np.argmax(gaps == gap)])
+
+    def cross(self, tail, head):
+        if tail and head:
+            self.first.setdefault(head[0] - tail[-1], tail[-1])
+
+    def merge(self, other):
+        # other 在后面：只补上本范围内没有出现过的间隔
+        for gap, p in other.first.items():
+            self.first.setdefault(gap, p)
+
+    def maximal(self):
+        """最大间隔纪录 [(前一个质数, 间隔)]，按位置升序"""
+        records = []
+        for p, gap in sorted((p, gap) for gap, p in self.first.items()):
+            if not records or gap > records[-1][1]:
+                records.append((p, gap))
+        return records
+
+    def result(self):
+        return {'first': dict(sorted(self.first.items())), 'maximal': self.maximal()}
+
+    def to_dict(self):
+        return {'kind': self.kind, 'first': sorted(self.first.items())}
+
+    @classmethod
+    def from_dict(cls, state):
+        reducer = cls()
+        reducer.first = {gap: p for gap, p in state['first']}
+        return reducer
+
+
+class Constellations:
+    """质数组计数：每个偏移模式 (0, d1, ..., dk) 统计 p, p+d1, ..., p+dk 全为质数的 p 的个数"""
+
+    kind = 'constellations'
+
+    def __init__(self, patterns=None):
+        self.patterns = {name: tuple(offsets) for name, offsets in (patterns or CONSTELLATIONS).items()}
+        if any(offsets[0] != 0 or offsets[-1] > 8 or list(offsets) != sorted(set(offsets))
+               for offsets in self.patterns.values()):
+            raise ValueError("质数组的偏移必须从0开始严格递增，跨度不超过8")
+        self.counts = dict.fromkeys(self.patterns, 0)
+
+    def update(self, block):
+        if isinstance(block, list):
+            members = set(block)
+            for name, offsets in self.patterns.items():
+                self.counts[name] += sum(all(p + d in members for d in offsets[1:]) for p in block)
+            return
+        size = len(block)
+        if not size:
+            return
+        # p + d 若是质数，必是 p 之后的第 j 个质数（j ≤ max(1, d // 2)），比较 block[i + j] - block[i] 即可
+        shifted = {}
+        for name, offsets in self.patterns.items():
+            found = np.ones(size, dtype=bool)
+            for d in offsets[1:]:
+                hit = np.zeros(size, dtype=bool)
+                for j in range(1, min(max(1, d // 2), size - 1) + 1):
+                    if j not in shifted:
+                        shifted[j] = block[j:] - block[:-j]
+                    hit[:-j] |= shifted[j] == d
+                found &= hit
+            self.counts[name] += int(np.count_nonzero(found))
+
+    def cross(self, tail, head):
+        # 第一个质数在前一部分、最后一个质数在后一部分的质数组
+        if not tail or not head:
+            return
+        members = set(tail) | set(head)
+        for name, offsets in self.patterns.items():
+            self.counts[name] += sum(p + offsets[-1] >= head[0] and all(p + d in members for d in offsets[1:])
+                                     for p in tail)
+
+    def merge(self, other):
+        for name, count in other.counts.items():
+            self.counts[name] += count
+
+    def result(self):
+        return dict(self.counts)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'patterns': {name: list(o) for name, o in self.patterns.items()},
+                'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, state):
+        reducer = cls(state['patterns'])
+        reducer.counts.update(state['counts'])
+        return reducer
+
+
+class ResidueClasses:
+    """模 m 的剩余类计数：counts[r] 为 p ≡ r (mod m) 的质数个数"""
+
+    kind = 'residues'
+
+    def __init__(self, modulus):
+        if modulus < 1:
+            raise ValueError("模数必须是正整数")
+        self.modulus = modulus
+        self.counts = [0] * modulus
+
+    def update(self, block):
+        m = self.modulus
+        if isinstance(block, list):
+            for p in block:
+                self.counts[p % m] += 1
+            return
+        if len(block):
+            self.counts = [a + b for a, b in zip(self.counts, np.bincount(block % m, minlength=m).tolist())]
+
+    def cross(self, tail, head):
+        pass
+
+    def merge(self, other):
+        if other.modulus != self.modulus:
+            raise ValueError("模数不同的剩余类计数不能合并")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def result(self):
+        return {r: count for r, count in enumerate(self.counts) if count}
+
+    def to_dict(self):
+        return {'kind': self.kind, 'modulus': self.modulus, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, state):
+        reducer = cls(state['modulus'])
+        reducer.counts = list(state['counts'])
+        return reducer
+
+
+REDUCERS = {cls.kind: cls for cls in (GapHistogram, GapRecords, Constellations, ResidueClasses)}
+
+
+def default_reducers(moduli=DEFAULT_MODULI):
+    """返回全部默认归约器：间隔直方图、间隔纪录、质数组，以及每个模数的剩余类计数"""
+    return [GapHistogram(), GapRecords(), Constellations()] + [ResidueClasses(m) for m in moduli]
+
+
+def _reducer_key(reducer):
+    return f'mod{reducer.modulus}' if reducer.kind == 'residues' else reducer.kind
+
+
+class PrimeAnalytics:
+    """
+    一段连续范围 [lo, hi) 的流式统计状态
+
+    按升序逐块 update() 质数，或 merge() 紧随其后的另一段范围的状态；
+    只保存各归约器的计数和首尾各 EDGE 个质数，内存与范围大小无关。
+
+    属性:
+        lo, hi: 已统计的范围（尚未统计任何块时为 None）
+        count: 质数个数
+        head, tail: 最前 / 最后的至多 EDGE 个质数
+        reducers: 归约器列表
+    """
+
+    def __init__(self, reducers=None, lo=None):
+        self.reducers = default_reducers() if reducers is None else list(reducers)
+        self.lo = lo
+        self.hi = lo
+        self.count = 0
+        self.head = []
+        self.tail = []
+
+    def update(self, primes, lo=None, hi=None):
+        """
+        统计紧接在已统计范围之后的一块质数
+
+        参数:
+            primes: 升序质数序列（PrimeChunk、array 或列表）
+            lo: 该块覆盖范围的起点（None表示取 primes.lo）
+            hi: 该块覆盖范围的终点（不包含，None表示取 primes.hi）
+        """
+        lo = primes.lo if lo is None else lo
+        hi = primes.hi if hi is None else hi
+        head = [int(p) for p in primes[:EDGE]]
+        block = _as_block(primes)
+        for reducer in self.reducers:
+            reducer.cross(self.tail, head)
+            reducer.update(block)
+        if self.lo is None:
+            self.lo = lo
+        self.hi = hi
+        self.count += len(primes)
+        self._extend_edges(head, [int(p) for p in primes[-EDGE:]] if len(primes) else [])
+
+    def _extend_edges(self, head, tail):
+        if len(self.head) < EDGE:
+            self.head = (self.head + head)[:EDGE]
+        self.tail = (self.tail + tail)[-EDGE:]
+
+    def merge(self, other):
+        """
+        合并紧随其后的一段范围的统计状态（两者的归约器须一一对应）
+
+        参数:
+            other: 覆盖 [self.hi, other.hi) 的 PrimeAnalytics
+
+        返回:
+            self
+        """
+        if self.hi is not None and other.lo is not None and other.lo != self.hi:
+            raise ValueError(f"只能按顺序合并相邻的范围: [{self.lo}, {self.hi}) 之后是 [{other.lo}, {other.hi})")
+        if [_reducer_key(r) for r in self.reducers] != [_reducer_key(r) for r in other.reducers]:
+            raise ValueError("归约器不一致，无法合并")
+        for reducer, later in zip(self.reducers, other.reducers):
+            reducer.cross(self.tail, other.head)
+            reducer.merge(later)
+        if self.lo is None:
+            self.lo = other.lo
+        if other.hi is not None:
+            self.hi = other.hi
+        self.count += other.count
+        self._extend_edges(other.head, other.tail)
+        return self
+
+    def result(self):
+        """返回全部统计结果 {'count', 'lo', 'hi', 归约器名称: 结果, ...}"""
+        result = {'count': self.count, 'lo': self.lo, 'hi': self.hi}
+        for reducer in self.reducers:
+            result[_reducer_key(reducer)] = reducer.result()
+        return result
+
+    def to_dict(self):
+        """可以写成 JSON 的完整状态"""
+        return {'lo': self.lo, 'hi': self.hi, 'count': self.count, 'head': self.head, 'tail': self.tail,
+                'reducers': [reducer.to_dict() for reducer in self.reducers]}
+
+    def load(self, state):
+        """用 to_dict 的结果替换当前状态（断点续传时使用）"""
+        self.reducers = [REDUCERS[r['kind']].from_dict(r) for r in state['reducers']]
+        self.lo = state['lo']
+        self.hi = state['hi']
+        self.count = state['count']
+        self.head = list(state['head'])
+        self.tail = list(state['tail'])
+        return self
+
+    @classmethod
+    def from_dict(cls, state):
+        """由 to_dict 的结果恢复状态"""
+        return cls([]).load(state)
+
+    def report(self, top=10):
+        """返回可读的统计报告"""
+        lines = []
+        if self.lo is not None:
+            lines.append(f"统计范围: [{self.lo:,}, {self.hi:,})")
+        lines.append(f"质数个数: {self.count:,}")
+        for reducer in self.reducers:
+            if reducer.kind == 'gaps' and reducer.counts:
+                common = ', '.join(f"{gap}: {count:,}" for gap, count in reducer.counts.most_common(top))
+                lines.append(f"最常见的间隔: {common}")
+                lines.append(f"最大间隔: {max(reducer.counts)}")
+            elif reducer.kind == 'records' and reducer.first:
+                records = ', '.join(f"{gap}（{p:,}）" for p, gap in reducer.maximal())
+                lines.append(f"最大间隔纪录: {records}")
+            elif reducer.kind == 'constellations':
+                for name, count in reducer.counts.items():
+                    lines.append(f"{CONSTELLATION_NAMES.get(name, name)}: {count:,}")
+            elif reducer.kind == 'residues':
+                classes = ', '.join(f"{r}: {count:,}" for r, count in reducer.result().items())
+                lines.append(f"模 {reducer.modulus} 的剩余类: {classes}")
+        return '\n'.join(lines)
+
+
+def _analyze_shard(start, end, reducer_states, segment_bytes, backend):
+    """工作进程任务：统计 [start, end] 一个分片，返回状态字典（不传回质数）"""
+    from prime_planner import iter_planned_chunks, plan_range
+
+    analytics = PrimeAnalytics([REDUCERS[r['kind']].from_dict(r) for r in reducer_states], start)
+    plan = plan_range(start, end, 1, segment_bytes, backend)
+    for chunk in iter_planned_chunks(plan, start, end):
+        analytics.update(chunk)
+    analytics.hi = end + 1
+    return analytics.to_dict()
+
+
+def analyze_range(start, end, reducers=None, workers=1, shards=None, segment_bytes=None, backend=None):
+    """
+    统计 [start, end] 内的质数（不保存、不传回质数）
+
+    范围被切成若干连续的分片，每个分片在工作进程中独立统计，只传回统计状态，
+    再按顺序合并；结果与单进程顺序统计完全相同。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        reducers: 归约器列表（None表示 default_reducers()）
+        workers: 并行进程数（1表示在当前进程中统计）
+        shards: 分片数（None表示 workers 的4倍）
+        segment_bytes: 每段的字节数（None表示默认值）
+        backend: 筛选后端（None表示由规划器选择）
+
+    返回:
+        PrimeAnalytics
+    """
+    reducers = default_reducers() if reducers is None else list(reducers)
+    states = [reducer.to_dict() for reducer in reducers]
+    if end < start:
+        return PrimeAnalytics(reducers, start)
+
+    shards = max(1, shards or (workers * 4 if workers > 1 else 1))
+    width = -(-(end - start + 1) // shards)
+    width += width % 2  # 分片宽度取偶数，分片起点的奇偶性相同
+    bounds = [(lo, min(lo + width, end + 1) - 1) for lo in range(start, end + 1, width)]
+    tasks = [(lo, hi, states, segment_bytes, backend) for lo, hi in bounds]
+
+    result = PrimeAnalytics(reducers, start)
+    if workers > 1:
+        with Pool(workers) as pool:
+            for state in pool.starmap(_analyze_shard, tasks):
+                result.merge(PrimeAnalytics.from_dict(state))
+    else:
+        for task in tasks:
+            result.merge(PrimeAnalytics.from_dict(_analyze_shard(*task)))
+    return result
+
+
+def main():
+    """命令行：统计一个范围并打印报告"""
+    parser = argparse.ArgumentParser(description='流式质数统计（间隔、质数组、剩余类），不保存质数')
+    parser.add_argument('start', type=int, help='起始值（包含）')
+    parser.add_argument('end', type=int, help='结束值（包含）')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数（默认1）')
+    parser.add_argument('--mod', type=int, action='append', help='统计该模数的剩余类（可重复，默认6）')
+    parser.add_argument('--json', type=str, default=None, help='把完整的统计状态保存为 JSON（可与其他分片合并）')
+    args = parser.parse_args()
+
+    started = time.time()
+    analytics = analyze_range(args.start, args.end, default_reducers(args.mod or DEFAULT_MODULI),
+                              max(1, args.workers))
+    print(analytics.report())
+    print(f"耗时: {time.time() - started:.2f} 秒")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(analytics.to_dict(), f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量去除小质因数（乘积树 / 余数树）
+功能：对一大批互不相关的整数（不是连续区间，没法用筛法）一次性求出每个数中
+     所有不超过 B 的质因数（Bernstein 的批量光滑部分算法）：
+     先把一块整数两两相乘建成乘积树，再把不超过 B 的全部质数之积 P 沿树逐层取余，
+     得到 P 对每个数的余数，反复平方后与该数求 gcd，就是该数的 B-光滑部分（含重数）；
+     每块的总耗时与块内数字的总位数近似成线性，不必对每个数逐个试除 π(B) 个质数。
+     去掉小质因数之后，只有余下的部分才需要做素性测试和 Pollard-rho
+
+使用示例：
+    from prime_batch import batch_factorize, batch_is_prime
+    batch_is_prime([2**127 - 1, 2**128 + 1])      # [True, False]
+    batch_factorize([360, 1000003 * 65521])       # [{2: 3, 3: 2, 5: 1}, {65521: 1, 1000003: 1}]
+"""
+
+import math
+
+from prime_factorizer import factorize, factorize_rough
+from prime_primality import is_prime
+from prime_table import primes_up_to
+
+
+# 批量去除的小质因数上界 B
+DEFAULT_SMALL_PRIME_LIMIT = 1 << 16
+
+# 每块的整数个数：CPython 的大整数除法是平方复杂度，块太大时树顶的取余反而变慢
+DEFAULT_BLOCK_SIZE = 256
+
+# 不超过该位数的整数单个做素性测试已经足够快（Miller-Rabin 通常第一个底数就排除合数），
+# batch_is_prime 只对更大的数先做批量预筛
+PREFILTER_MIN_BITS = 96
+
+# 已经算好的小质数之积（按上界缓存）
+_products = {}
+
+
+def product_tree(values):
+    """
+    建立乘积树
+
+    参数:
+        values: 正整数列表（非空）
+
+    返回:
+        各层列表：第0层是 values 本身，每层是下一层相邻两项之积（奇数个时最后一项直接上移），
+        最后一层只有一项，即全部之积
+    """
+    tree = [list(values)]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        upper = [level[i] * level[i + 1] for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            upper.append(level[-1])
+        tree.append(upper)
+    return tree
+
+
+def remainder_tree(x, tree):
+    """
+    用乘积树求 x 对每个叶子的余数：先对树根取余，再逐层对子节点取余，
+    每一层参与运算的数都比上一层小一半
+
+    参数:
+        x: 非负整数
+        tree: product_tree 返回的乘积树
+
+    返回:
+        [x % v for v in tree[0]]
+    """
+    remainders = [x % tree[-1][0]]
+    for level in reversed(tree[:-1]):
+        remainders = [remainders[i >> 1] % v for i, v in enumerate(level)]
+    return remainders
+
+
+def small_prime_product(limit=DEFAULT_SMALL_PRIME_LIMIT):
+    """返回不超过 limit 的全部质数之积（第一次使用时计算，之后复用）"""
+    product = _products.get(limit)
+    if product is None:
+        product = _products[limit] = product_tree(primes_up_to(limit).tolist())[-1][0]
+    return product
+
+
+def smooth_parts(numbers, limit=DEFAULT_SMALL_PRIME_LIMIT, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    求每个数的 limit-光滑部分（所有不超过 limit 的质因数的乘积，含重数）
+
+    对每个 n，r = P mod n 由余数树批量求出；再平方 e 次（2^e 不小于 n 的位数，
+    因而不小于其中任何质因数的指数），gcd(r^(2^e) mod n, n) 即为所求。
+
+    参数:
+        numbers: 正整数序列
+        limit: 小质因数上界 B
+        block_size: 每块的整数个数
+
+    返回:
+        与 numbers 一一对应的光滑部分列表（没有小质因数时为1）
+    """
+    product = small_prime_product(limit)
+    result = []
+    for i in range(0, len(numbers), block_size):
+        block = numbers[i:i + block_size]
+        for n, r in zip(block, remainder_tree(product, product_tree(block))):
+            e = max(1, (n.bit_length() - 1).bit_length())
+            result.append(math.gcd(pow(r, 1 << e, n), n))
+    return result
+
+
+def strip_small_factors(numbers, limit=DEFAULT_SMALL_PRIME_LIMIT, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    批量去掉每个数中不超过 limit 的质因数
+
+    参数:
+        numbers: 正整数序列
+        limit: 小质因数上界 B
+        block_size: 每块的整数个数
+
+    返回:
+        与 numbers 一一对应的 (小质因数 {质因数: 指数}, 余下的因子) 列表；
+        余下的因子为1，或者它的质因数都大于 limit
+    """
+    result = []
+    for n, smooth in zip(numbers, smooth_parts(numbers, limit, block_size)):
+        # 光滑部分通常只有几位数，直接分解
+        result.append((factorize(smooth), n // smooth) if smooth > 1 else ({}, n))
+    return result
+
+
+def batch_factorize(numbers, limit=DEFAULT_SMALL_PRIME_LIMIT, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    批量分解质因数：先批量去掉小质因数，余下的部分再用素性测试 + Pollard-rho 拆分
+
+    参数:
+        numbers: 正整数序列
+        limit: 小质因数上界 B
+        block_size: 每块的整数个数
+
+    返回:
+        与 numbers 一一对应的 {质因数: 指数} 字典列表（与 factorize 的结果相同）
+    """
+    numbers = list(numbers)
+    if any(n < 1 for n in numbers):
+        raise ValueError("只能分解正整数")
+
+    result = []
+    for factors, rest in strip_small_factors(numbers, limit, block_size):
+        if rest > 1:
+            if rest <= limit * limit:
+                # 质因数都大于 limit 的合数至少是 limit 的平方
+                factors[rest] = 1
+            else:
+                factors = factorize_rough(rest, factors)
+        result.append(factors)
+    return result
+
+
+def prefilter_limit(bits):
+    """
+    按待测数的位数选择预筛的小质因数上界：预筛的开销与 P 的位数（约 1.44B）成正比，
+    省下的是 Miller-Rabin（约与位数的立方成正比），数越大预筛得越深
+
+    返回:
+        2 的幂，在 2^10 到 DEFAULT_SMALL_PRIME_LIMIT 之间
+    """
+    return min(DEFAULT_SMALL_PRIME_LIMIT, 1 << max(10, (32 * bits).bit_length() - 1))
+
+
+def batch_is_prime(numbers, limit=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    批量判断质数：超过 PREFILTER_MIN_BITS 位的数先批量去掉含小质因数的合数，
+    只有余下的才做素性测试
+
+    参数:
+        numbers: 整数序列
+        limit: 小质因数上界 B（None表示按最大的数的位数由 prefilter_limit 选择）
+        block_size: 每块的整数个数
+
+    返回:
+        与 numbers 一一对应的 True / False 列表
+    """
+    numbers = list(numbers)
+    result = [False] * len(numbers)
+    large = []
+    for i, n in enumerate(numbers):
+        if n > 0 and n.bit_length() > PREFILTER_MIN_BITS:
+            large.append(i)
+        else:
+            result[i] = is_prime(n)
+
+    if not large:
+        return result
+    candidates = [numbers[i] for i in large]
+    if limit is None:
+        limit = prefilter_limit(max(n.bit_length() for n in candidates))
+    for i, n, smooth in zip(large, candidates, smooth_parts(candidates, limit, block_size)):
+        result[i] = smooth == 1 and is_prime(n)
+    return result
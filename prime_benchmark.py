@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试与性能回归检查
+功能：在固定场景上测量质数判断、质因数分解和范围筛选的吞吐量，
+     先运行正确性测试作为门槛，再输出机器可读的JSON结果，
+     并与保存的基准结果比较，速度下降超过阈值时返回非零退出码
+
+仓库中的 benchmark_baseline.json 是参考机器上用 --quick 测得的基准；吞吐量与硬件有关，
+在其他机器（如 CI）上比较时，应先在同一台机器上用基准版本的代码重新生成基准。
+
+使用示例：
+  python prime_benchmark.py --quick --save-baseline benchmark_baseline.json
+  python prime_benchmark.py --quick --baseline benchmark_baseline.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import traceback
+from datetime import datetime
+
+from prime_factorizer import factorize
+from prime_primality import is_prime
+from prime_sieve import BACKENDS, iter_prime_segments
+
+
+# 作为正确性门槛的测试模块：全部通过后才做性能测量
+GATE_MODULES = ('test_prime_checker', 'test_prime_finder')
+
+# 仓库中保存的基准结果（--quick）
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# 随机数种子固定，保证每次测量的输入完全相同
+SEED = 20251118
+
+
+def _random_prime(rng, lo, hi):
+    """在 [lo, hi) 内随机取一个质数"""
+    while True:
+        n = rng.randrange(lo, hi) | 1
+        if is_prime(n):
+            return n
+
+
+def is_prime_scenario(exponent, count):
+    """
+    质数判断场景：count 个 10^exponent 量级的随机奇数
+
+    返回:
+        (场景名, 工作量, 被测函数)
+    """
+    rng = random.Random(SEED + exponent)
+    numbers = [rng.randrange(10 ** exponent, 10 ** (exponent + 1)) | 1 for _ in range(count)]
+
+    def run():
+        for n in numbers:
+            is_prime(n)
+
+    return f"is_prime/1e{exponent}", count, run
+
+
+def factorize_scenario(digits, count):
+    """
+    质因数分解场景：count 个 digits 位的两个大小相近质数之积（最难分解的情形）
+
+    返回:
+        (场景名, 工作量, 被测函数)
+    """
+    rng = random.Random(SEED + digits)
+    half = digits // 2
+    numbers = [_random_prime(rng, 10 ** (half - 1), 10 ** half)
+               * _random_prime(rng, 10 ** (digits - half - 1), 10 ** (digits - half))
+               for _ in range(count)]
+
+    def run():
+        for n in numbers:
+            factorize(n)
+
+    return f"factorize/{digits}digits", count, run
+
+
+def range_scenario(exponent, width, backend):
+    """
+    范围筛选场景：[10^exponent, 10^exponent + width) 内的全部质数（含基础质数表的计算）
+
+    返回:
+        (场景名, 工作量（范围内整数个数）, 被测函数)
+    """
+    start = 10 ** exponent
+
+    def run():
+        for _ in iter_prime_segments(start, start + width - 1, backend=backend):
+            pass
+
+    return f"range/1e{exponent}/{backend}", width, run
+
+
+def build_scenarios(quick=False):
+    """
+    构造全部场景
+
+    参数:
+        quick: 是否使用较小的工作量（用于快速检查）
+    """
+    scale = 10 if quick else 1
+    scenarios = []
+    for exponent in (6, 12, 15, 18, 30):
+        scenarios.append(is_prime_scenario(exponent, 20000 // scale))
+    for digits, count in ((12, 200), (18, 40), (24, 4)):
+        scenarios.append(factorize_scenario(digits, max(count // scale, 1)))
+    for backend in BACKENDS:
+        for exponent in (9, 12, 15):
+            scenarios.append(range_scenario(exponent, 20000000 // scale, backend))
+    return scenarios
+
+
+def measure(name, units, func, repeat=3):
+    """
+    运行一个场景 repeat 次，取最快的一次
+
+    返回:
+        结果字典 {name, units, seconds, rate}
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return {
+        'name': name,
+        'units': units,
+        'seconds': best,
+        'rate': units / best if best > 0 else float('inf'),
+    }
+
+
+def run_gates(modules=GATE_MODULES):
+    """
+    运行正确性测试（各模块中所有 test_ 开头的函数），屏蔽其打印输出
+
+    返回:
+        {测试名: 'passed' 或 错误信息}
+    """
+    gates = {}
+    for module_name in modules:
+        module = __import__(module_name)
+        for attr in sorted(dir(module)):
+            func = getattr(module, attr)
+            if not (attr.startswith('test_') and callable(func)):
+                continue
+            name = f"{module_name}.{attr}"
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    func()
+                gates[name] = 'passed'
+            except Exception:
+                gates[name] = traceback.format_exc(limit=3)
+    return gates
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    与基准结果比较
+
+    参数:
+        results: 本次的场景结果列表
+        baseline: 基准的场景结果列表
+        threshold: 允许的最大变慢比例（0.2 表示慢20%以内都可接受）
+
+    返回:
+        回归列表 [{name, baseline_rate, rate, slowdown}]
+    """
+    baseline_rates = {item['name']: item['rate'] for item in baseline}
+    regressions = []
+    for item in results:
+        base_rate = baseline_rates.get(item['name'])
+        if not base_rate:
+            continue
+        slowdown = base_rate / item['rate'] - 1
+        if slowdown > threshold:
+            regressions.append({
+                'name': item['name'],
+                'baseline_rate': base_rate,
+                'rate': item['rate'],
+                'slowdown': slowdown,
+            })
+    return regressions
+
+
+def main():
+    """
+    主程序
+    """
+    parser = argparse.ArgumentParser(description='质数程序基准测试与性能回归检查')
+    parser.add_argument('--quick', action='store_true', help='使用较小的工作量快速运行')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景重复次数，取最快的一次（默认3）')
+    parser.add_argument('--filter', type=str, default='', help='只运行名称包含该字符串的场景')
+    parser.add_argument('--output', type=str, help='把结果写入JSON文件')
+    parser.add_argument('--baseline', type=str, help=f'与该JSON基准结果比较（仓库中的基准: {DEFAULT_BASELINE}）')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允许的最大变慢比例（默认0.2）')
+    parser.add_argument('--save-baseline', type=str, help='把本次结果保存为基准')
+    parser.add_argument('--skip-gates', action='store_true', help='跳过正确性测试')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('quick', False) != args.quick:
+            # 工作量不同时固定开销所占的比例不同，吞吐量不可比较
+            parser.error(f"基准是用{'' if baseline.get('quick') else '不'}带 --quick 测得的，本次需要相同的设置")
+
+    report = {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backends': list(BACKENDS),
+        'quick': args.quick,
+        'gates': {},
+        'results': [],
+    }
+
+    if not args.skip_gates:
+        print("运行正确性测试...")
+        report['gates'] = run_gates()
+        failed = [name for name, status in report['gates'].items() if status != 'passed']
+        for name, status in report['gates'].items():
+            print(f"{'✓' if status == 'passed' else '✗'} {name}")
+        if failed:
+            print(f"\n正确性测试失败 {len(failed)} 项，不进行性能测量")
+            for name in failed:
+                print(f"\n{name}:\n{report['gates'][name]}")
+            sys.exit(1)
+        print()
+
+    print(f"{'场景':<28}{'耗时(秒)':>12}{'吞吐量(个/秒)':>20}")
+    print("-" * 60)
+    for name, units, func in build_scenarios(args.quick):
+        if args.filter not in name:
+            continue
+        result = measure(name, units, func, args.repeat)
+        report['results'].append(result)
+        print(f"{name:<28}{result['seconds']:>12.4f}{result['rate']:>20,.0f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基准已保存到: {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare_with_baseline(report['results'], baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n性能回归（变慢超过 {args.threshold:.0%}）：")
+            for item in regressions:
+                print(f"✗ {item['name']}: {item['baseline_rate']:,.0f} → {item['rate']:,.0f} 个/秒 "
+                      f"(慢 {item['slowdown']:.0%})")
+            sys.exit(1)
+        print(f"\n与基准相比没有超过 {args.threshold:.0%} 的性能回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+质数位图（mod 30 轮）
+功能：为指定范围预先生成磁盘上的质数位图，每30个整数只占1个字节
+     （与30互质的8个余数 1,7,11,13,17,19,23,29 各占1位），
+     之后通过 mmap 直接读取：范围内的 is_prime 只是一次位测试，
+     next_prime / prev_prime 只需扫描相邻的几个字节；打开文件时不读取任何数据，
+     范围外的查询自动退回到计算（Miller-Rabin）
+
+文件格式:
+    8字节魔数 + 8字节范围起点 lo + 8字节范围终点 hi（不包含，lo 和 hi 都是30的倍数），
+    随后是 (hi - lo) / 30 个字节，第 i 个字节的第 k 位表示 lo + 30i + WHEEL[k] 是否为质数
+
+使用示例：
+  python prime_bitmap.py build 1000000000000 1999999999999 primes_13bits.bitmap --workers 8
+  python prime_bitmap.py query primes_13bits.bitmap 1000000000000 1500000000000
+"""
+
+import argparse
+import mmap
+import struct
+
+from prime_primality import is_prime
+from prime_search import next_prime, prev_prime
+from prime_sieve import BACKENDS, DEFAULT_SEGMENT_BYTES, iter_prime_chunks
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+MAGIC = b'PRMBMAP1'
+HEADER = struct.Struct('<8sQQ')
+
+# 与30互质的余数，依次对应每个字节的第0~7位
+WHEEL = (1, 7, 11, 13, 17, 19, 23, 29)
+
+# _BIT[r]：余数 r 对应的位（不与30互质的余数为0）
+_BIT = [0] * 30
+for _k, _r in enumerate(WHEEL):
+    _BIT[_r] = 1 << _k
+
+# _AT_LEAST[r] / _AT_MOST[r]：余数不小于 / 不大于 r 的位
+_AT_LEAST = [sum(1 << k for k, w in enumerate(WHEEL) if w >= r) for r in range(30)]
+_AT_MOST = [sum(1 << k for k, w in enumerate(WHEEL) if w <= r) for r in range(30)]
+
+
+def _wheel_bytes(primes, base, size):
+    """
+    把一段升序质数转换为位图字节
+
+    参数:
+        primes: 升序质数（都大于5，且在 [base, base + 30*size) 内）
+        base: 第一个字节对应的起点（30的倍数）
+        size: 字节数
+
+    返回:
+        bytearray
+    """
+    if np is not None and len(primes) > 64:
+        offsets = np.asarray(primes, dtype=np.uint64) - np.uint64(base)
+        bits = np.asarray(_BIT, dtype=np.float64)[(offsets % 30).astype(np.intp)]
+        # 同一字节内各质数的位互不相同，按字节求和即按位或
+        counts = np.bincount((offsets // 30).astype(np.intp), weights=bits, minlength=size)
+        return bytearray(counts.astype(np.uint8).tobytes())
+
+    out = bytearray(size)
+    for p in primes:
+        d = p - base
+        out[d // 30] |= _BIT[d % 30]
+    return out
+
+
+def build_bitmap(path, start, end, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    生成覆盖 [start, end] 的质数位图文件（范围两端按30对齐向外扩展）
+
+    先把文件扩展到最终大小，再通过 mmap 按段填入各段筛出的质数，内存占用与范围大小无关。
+
+    参数:
+        path: 输出文件路径
+        start: 起始值（包含）
+        end: 结束值（包含）
+        workers: 并行筛选的进程数
+        segment_bytes: 分段筛法每段的字节数
+        backend: 筛选后端（None表示自动选择）
+
+    返回:
+        位图中记录的质数个数（2、3、5 不占位，不计入）
+    """
+    if start > end:
+        raise ValueError("起始值不能大于结束值")
+    lo = start - start % 30
+    hi = end + 1 + (-(end + 1)) % 30
+    size = (hi - lo) // 30
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, lo, hi))
+        f.truncate(HEADER.size + size)
+
+    count = 0
+    with open(path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as bitmap:
+        for chunk in iter_prime_chunks(max(lo, 7), hi - 1, workers, segment_bytes, backend):
+            if not chunk:
+                continue
+            first = (chunk[0] - lo) // 30
+            local = _wheel_bytes(chunk, lo + 30 * first, (chunk[-1] - lo) // 30 - first + 1)
+            # 各块首尾相接：块的第一个字节可能与上一块的最后一个字节相同，需要按位或
+            pos = HEADER.size + first
+            bitmap[pos] |= local[0]
+            bitmap[pos + 1:pos + len(local)] = local[1:]
+            count += len(chunk)
+        bitmap.flush()
+    return count
+
+
+class PrimeBitmap:
+    """
+    通过 mmap 读取质数位图
+
+    用法:
+        with PrimeBitmap('primes_13bits.bitmap') as bitmap:
+            bitmap.is_prime(1000000000039)
+            bitmap.next_prime(10**12)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, self.lo, self.hi = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"不是质数位图文件: {path}")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._size = (self.hi - self.lo) // 30
+
+    def covers(self, n):
+        """n 是否在位图覆盖的范围内"""
+        return self.lo <= n < self.hi
+
+    def is_prime(self, n):
+        """
+        判断 n 是否为质数：范围内查位图，范围外使用 Miller-Rabin
+
+        参数:
+            n: 待判断的整数
+
+        返回:
+            True: 是质数
+            False: 不是质数
+        """
+        if self.lo <= n < self.hi:
+            bit = _BIT[n % 30]
+            if bit:
+                return bool(self._map[HEADER.size + (n - self.lo) // 30] & bit)
+            return n in (2, 3, 5)
+        return is_prime(n)
+
+    def next_prime(self, n):
+        """
+        返回大于 n 的最小质数
+
+        从 n + 1 所在的字节开始向后扫描，跨出位图范围后退回到计算（prime_search）
+        """
+        m = n + 1
+        if m < 7 or not self.lo <= m < self.hi:
+            return next_prime(n)
+
+        i = (m - self.lo) // 30
+        byte = self._map[HEADER.size + i] & _AT_LEAST[m % 30]
+        while not byte:
+            i += 1
+            if i >= self._size:
+                return next_prime(self.hi - 1)
+            byte = self._map[HEADER.size + i]
+        return self.lo + 30 * i + WHEEL[(byte & -byte).bit_length() - 1]
+
+    def prev_prime(self, n):
+        """
+        返回小于 n 的最大质数（n ≤ 2 时返回 None）
+
+        从 n - 1 所在的字节开始向前扫描，跨出位图范围后退回到计算（prime_search）
+        """
+        m = n - 1
+        if m < 7 or not self.lo <= m < self.hi:
+            return prev_prime(n)
+
+        i = (m - self.lo) // 30
+        byte = self._map[HEADER.size + i] & _AT_MOST[m % 30]
+        while not byte:
+            i -= 1
+            if i < 0:
+                return prev_prime(self.lo)
+            byte = self._map[HEADER.size + i]
+        return self.lo + 30 * i + WHEEL[byte.bit_length() - 1]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    """
+    命令行：生成位图，或在位图上查询
+    """
+    parser = argparse.ArgumentParser(description='质数位图（mod 30 轮，每30个整数1个字节）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='生成覆盖 [start, end] 的位图文件')
+    build.add_argument('start', type=int, help='起始值（包含）')
+    build.add_argument('end', type=int, help='结束值（包含）')
+    build.add_argument('bitmap_file', help='输出的位图文件路径')
+    build.add_argument('--workers', type=int, default=1, help='并行筛选的进程数（默认1）')
+    build.add_argument('--backend', type=str, choices=BACKENDS, default=None, help='筛选后端')
+
+    query = subparsers.add_parser('query', help='查询若干个数是否为质数，以及前后最近的质数')
+    query.add_argument('bitmap_file', help='位图文件路径')
+    query.add_argument('numbers', type=int, nargs='+', help='待查询的整数')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        size = (args.end - args.start) // 30 + 1
+        print(f"生成位图: [{args.start:,}, {args.end:,}]，约 {size / 1024 / 1024:,.1f} MB")
+        count = build_bitmap(args.bitmap_file, args.start, args.end, max(1, args.workers), backend=args.backend)
+        print(f"完成，记录质数 {count:,} 个，已保存到: {args.bitmap_file}")
+    else:
+        with PrimeBitmap(args.bitmap_file) as bitmap:
+            for n in args.numbers:
+                source = '位图' if bitmap.covers(n) else '计算'
+                print(f"{n:,}: {'质数' if bitmap.is_prime(n) else '合数'}（{source}）"
+                      f" 前一个质数 {bitmap.prev_prime(n)}，后一个质数 {bitmap.next_prime(n)}")
+
+
+if __name__ == "__main__":
+    main()
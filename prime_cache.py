@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+质因数分解结果缓存
+功能：两级缓存——进程内有界 LRU + 可选的磁盘持久化存储（sqlite），
+     以 n 为键保存质因数分解结果，质数判断、质因数列表和全部因数都由它推导，
+     跨运行、跨进程复用已经算过的结果；进程内按条目数淘汰，磁盘按条目数和/或占用字节数淘汰，
+     并记录命中/未命中次数
+
+多个进程可以同时使用同一个缓存文件：每个进程使用自己的 sqlite 连接（WAL 模式，
+读写互不阻塞）；新结果和磁盘命中的使用时间先攒在内存中，每 FLUSH_INTERVAL 次操作
+（以及 flush() / close() 时）在一个事务中一起写入，不必每条结果提交一次、落盘一次；
+进程池 fork 出的子进程会自动重新连接。
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from prime_batch import batch_factorize
+from prime_factorizer import divisors_from_factorization, factorize
+from prime_primality import is_prime
+
+
+# 攒够多少次写入（新结果和磁盘命中的使用时间）提交一次事务
+FLUSH_INTERVAL = 1000
+
+# 磁盘存储每插入多少条检查一次是否需要淘汰
+_EVICT_CHECK_INTERVAL = 1000
+
+# 素性测试判定为合数、但尚未分解的数字（is_prime 只需要这个结论）
+COMPOSITE = 'composite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS factorizations (
+    n TEXT PRIMARY KEY,
+    factors TEXT NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def _enable_wal(connection, timeout=60):
+    """
+    切换到 WAL 模式
+
+    切换需要独占锁，而别的进程正在打开或关闭同一个文件时 sqlite 直接返回"database is locked"，
+    不会按连接的 timeout 等待，所以在这里重试
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        try:
+            if connection.execute('PRAGMA journal_mode').fetchone()[0] != 'wal':
+                connection.execute('PRAGMA journal_mode=WAL')
+            return
+        except sqlite3.OperationalError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+
+class FactorizationCache:
+    """
+    两级质因数分解缓存
+
+    用法:
+        cache = FactorizationCache('factors.sqlite', max_entries=100000, max_disk_bytes=1 << 30)
+        cache.factorize(360)       # {2: 3, 3: 2, 5: 1}
+        cache.is_prime(97)         # True
+        cache.divisors(12)         # [1, 2, 3, 4, 6, 12]
+        cache.stats                # {'hits': ..., 'disk_hits': ..., 'misses': ..., ...}
+    """
+
+    def __init__(self, path=None, max_entries=100000, max_disk_entries=None, max_disk_bytes=None):
+        """
+        参数:
+            path: sqlite 文件路径（None表示只使用进程内缓存）
+            max_entries: 进程内 LRU 的最大条目数
+            max_disk_entries: 磁盘存储的最大条目数（None表示不限制），超出时淘汰最久未使用的
+            max_disk_bytes: 磁盘存储占用的最大字节数（按 sqlite 已用页数 × 页大小计，None表示不限制），
+                            超出时淘汰最久未使用的；删除腾出的页会被之后的写入复用，文件不再增长
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+        self._memory = OrderedDict()
+        self._connection = None
+        self._pid = None
+        self._inserts = 0
+        # 尚未写入磁盘的新结果 {n: 编码后的结果} 和磁盘命中的使用时间 {n: 时间}
+        self._pending = {}
+        self._touched = {}
+
+    def _db(self):
+        """返回当前进程的 sqlite 连接（fork 之后重新连接）"""
+        if self._pid != os.getpid():
+            # fork 出的子进程不继承父进程尚未写入的内容
+            self._pending = {}
+            self._touched = {}
+            self._connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            _enable_wal(self._connection)
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _remember(self, n, factors):
+        """放入进程内 LRU，超出容量时淘汰最久未使用的"""
+        memory = self._memory
+        memory[n] = factors
+        memory.move_to_end(n)
+        if len(memory) > self.max_entries:
+            memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _lookup(self, n, verdict=False):
+        """
+        依次查两级缓存，未命中时返回 None
+
+        参数:
+            n: 整数
+            verdict: 是否接受只有合数结论（COMPOSITE）、没有分解结果的条目
+        """
+        factors = self._memory.get(n)
+        if factors is None and self.path:
+            db = self._db()
+            encoded = self._pending.get(n)
+            if encoded is None:
+                row = db.execute('SELECT factors FROM factorizations WHERE n = ?', (str(n),)).fetchone()
+                encoded = row[0] if row is not None else None
+                if encoded is not None:
+                    self._touch(n)
+            if encoded is not None:
+                factors = COMPOSITE if encoded == COMPOSITE else {int(p): e for p, e in json.loads(encoded)}
+                self._remember(n, factors)
+                if verdict or factors is not COMPOSITE:
+                    self.stats['disk_hits'] += 1
+                    return factors
+        elif factors is not None:
+            self._memory.move_to_end(n)
+            if verdict or factors is not COMPOSITE:
+                self.stats['hits'] += 1
+                return factors
+
+        self.stats['misses'] += 1
+        return None
+
+    def _touch(self, n):
+        """记下磁盘命中的使用时间（随下一次 flush 一起写入）"""
+        self._touched[n] = time.time()
+        if len(self._pending) + len(self._touched) >= FLUSH_INTERVAL:
+            self.flush()
+
+    def _store(self, n, factors):
+        """写入两级缓存（磁盘部分先攒在内存中）"""
+        self._remember(n, factors)
+        if not self.path:
+            return
+        self._db()
+        self._pending[n] = COMPOSITE if factors is COMPOSITE else json.dumps([[str(p), e]
+                                                                                for p, e in factors.items()])
+        self._inserts += 1
+        if len(self._pending) + len(self._touched) >= FLUSH_INTERVAL:
+            self.flush()
+        if ((self.max_disk_entries is not None or self.max_disk_bytes is not None)
+                and self._inserts % _EVICT_CHECK_INTERVAL == 0):
+            self.evict()
+
+    def flush(self):
+        """把攒下的新结果和使用时间在一个事务中写入磁盘"""
+        if not self.path or self._pid != os.getpid() or not (self._pending or self._touched):
+            return
+        now = time.time()
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany('INSERT OR REPLACE INTO factorizations (n, factors, last_used) VALUES (?, ?, ?)',
+                           [(str(n), encoded, now) for n, encoded in self._pending.items()])
+            db.executemany('UPDATE factorizations SET last_used = ? WHERE n = ?',
+                           [(used, str(n)) for n, used in self._touched.items() if n not in self._pending])
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._pending = {}
+        self._touched = {}
+
+    def disk_usage(self):
+        """磁盘存储已用的字节数（sqlite 已用页数 × 页大小，不含可复用的空闲页）"""
+        db = self._db()
+        page_size = db.execute('PRAGMA page_size').fetchone()[0]
+        used = db.execute('PRAGMA page_count').fetchone()[0] - db.execute('PRAGMA freelist_count').fetchone()[0]
+        return used * page_size
+
+    def evict(self):
+        """把磁盘存储淘汰到 max_disk_entries 条、max_disk_bytes 字节以内（删除最久未使用的）"""
+        if not self.path or (self.max_disk_entries is None and self.max_disk_bytes is None):
+            return
+        self.flush()
+        db = self._db()
+        count = db.execute('SELECT COUNT(*) FROM factorizations').fetchone()[0]
+        excess = count - self.max_disk_entries if self.max_disk_entries is not None else 0
+        if self.max_disk_bytes is not None and count:
+            usage = self.disk_usage()
+            if usage > self.max_disk_bytes:
+                # 按平均每条的字节数估计要删除的条数，再多删 1/16 留出余量（页内碎片使占用不随删除成比例下降）
+                excess = max(excess, math.ceil((usage - self.max_disk_bytes) / (usage / count) + count / 16))
+        if excess > 0:
+            db.execute('DELETE FROM factorizations WHERE n IN '
+                       '(SELECT n FROM factorizations ORDER BY last_used LIMIT ?)', (excess,))
+            self.stats['disk_evictions'] += min(excess, count)
+
+    def factorize(self, n):
+        """
+        分解质因数（优先使用缓存）
+
+        参数:
+            n: 正整数
+
+        返回:
+            {质数: 指数}，按质数从小到大排列（n = 1 时为空字典）；调用方不应修改返回的字典
+        """
+        factors = self._lookup(n)
+        if factors is None:
+            factors = factorize(n)
+            self._store(n, factors)
+        return factors
+
+    def factorize_many(self, numbers):
+        """
+        批量分解质因数：先查缓存，未命中的一起交给 prime_batch.batch_factorize（批量去除小质因数）
+
+        参数:
+            numbers: 正整数序列
+
+        返回:
+            与 numbers 一一对应的 {质数: 指数} 列表；调用方不应修改返回的字典
+        """
+        results = [self._lookup(n) for n in numbers]
+        missing = list(dict.fromkeys(n for n, factors in zip(numbers, results) if factors is None))
+        if missing:
+            computed = dict(zip(missing, batch_factorize(missing)))
+            for n, factors in computed.items():
+                self._store(n, factors)
+            results = [computed[n] if factors is None else factors for n, factors in zip(numbers, results)]
+        return results
+
+    def is_prime(self, n):
+        """
+        判断 n 是否为质数
+
+        已缓存分解结果（或合数结论）时直接推导；否则做素性测试并写入缓存：
+        质数记为 {n: 1}，合数只记下 COMPOSITE 结论（不值得为它做一次完整的分解），
+        之后调用 factorize(n) 时再分解并替换
+        """
+        if n < 2:
+            return False
+        factors = self._lookup(n, verdict=True)
+        if factors is not None:
+            return factors == {n: 1}
+        prime = is_prime(n)
+        self._store(n, {n: 1} if prime else COMPOSITE)
+        return prime
+
+    def prime_factors(self, n):
+        """质因数列表（从小到大，包含重复）"""
+        return [p for p, exponent in self.factorize(n).items() for _ in range(exponent)]
+
+    def divisors(self, n):
+        """全部因数（从小到大）"""
+        return divisors_from_factorization(self.factorize(n))
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -2,105 +2,403 @@
 # -*- coding: utf-8 -*-
 """
 质数判断程序
-功能：判断用户输入的正整数是否为质数，如果不是，则显示所有因数
+功能：判断用户输入的正整数是否为质数，如果不是，则显示所有因数；
+     批量模式下从文件或标准输入流式读取大量数字，用进程池并行判断和分解，
+     按输入顺序输出 JSON Lines 或 CSV 结果
+
+使用示例：
+  python prime_checker.py
+  python prime_checker.py --batch numbers.txt --output results.jsonl --workers 8
+  cat numbers.txt | python prime_checker.py --batch --format csv > results.csv
+  python prime_checker.py --batch numbers.txt --cache factors.sqlite
 """
 
-import math
+import argparse
+import atexit
+import csv
+import json
+import sys
+from collections import deque
+from multiprocessing import Pool
 
+from prime_batch import batch_factorize, batch_is_prime
+from prime_cache import FactorizationCache
+from prime_factorizer import divisors_from_factorization, factorize
+from prime_planner import check_prime, parse_costs, plan_point
 
-def is_prime(n):
+
+# 启用后 is_prime / get_prime_factors / get_all_factors 都先查这个缓存（见 enable_cache）
+_cache = None
+
+
+def enable_cache(path=None, max_entries=100000, max_disk_entries=None, max_disk_bytes=None):
     """
-    判断一个数是否为质数
+    启用质因数分解结果缓存
 
     参数:
-        n: 待判断的正整数
+        path: sqlite 持久化文件路径（None表示只使用进程内 LRU）
+        max_entries: 进程内 LRU 的最大条目数
+        max_disk_entries: 持久化存储的最大条目数（None表示不限制）
+        max_disk_bytes: 持久化存储占用的最大字节数（None表示不限制）
 
     返回:
-        True: 是质数
-        False: 不是质数
+        FactorizationCache（可读取其 stats 查看命中情况）
     """
-    if n < 2:
-        return False
-    if n == 2:
-        return True
-    if n % 2 == 0:
-        return False
+    global _cache
+    disable_cache()
+    _cache = FactorizationCache(path, max_entries, max_disk_entries, max_disk_bytes)
+    return _cache
+
+
+def disable_cache():
+    """关闭并停用缓存"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
 
-    # 只需检查到 sqrt(n)
-    sqrt_n = int(math.sqrt(n))
-    for i in range(3, sqrt_n + 1, 2):
-        if n % i == 0:
-            return False
+# 缓存的新结果攒够一批才写入磁盘，进程退出时写入剩下的
+atexit.register(disable_cache)
 
-    return True
+
+def _open_bitmap(path):
+    """打开质数位图（按需导入，不使用位图时不必载入筛法引擎和 NumPy）"""
+    if not path:
+        return None
+    from prime_bitmap import PrimeBitmap
+    return PrimeBitmap(path)
+
+
+def _factorize(n):
+    return _cache.factorize(n) if _cache is not None else factorize(n)
+
+
+def is_prime(n, bitmap=None, costs=None):
+    """
+    判断一个数是否为质数（位图覆盖 n 时直接查位图，否则启用缓存时查缓存）
+
+    其余情况由查询规划器（prime_planner.plan_point）选择：质数位图或已载入的质数表覆盖时直接查表，
+    其余做素性测试（Miller-Rabin / BPSW）。
+
+    参数:
+        n: 待判断的整数
+        bitmap: 已打开的质数位图（None表示没有）
+        costs: 覆盖规划器代价模型部分系数的字典
+
+    返回:
+        True: 是质数
+        False: 不是质数
+    """
+    if _cache is not None and not (bitmap is not None and bitmap.covers(n)):
+        return _cache.is_prime(n)
+    return check_prime(n, bitmap, costs)
 
 
 def get_all_factors(n):
     """
     获取一个数的所有因数（约数）
 
+    先分解质因数，再由各质因数的幂组合出全部因数，不再逐个扫描到 sqrt(n)
+
     参数:
         n: 待分解的正整数
 
     返回:
         排序后的因数列表
     """
-    factors = []
-    sqrt_n = int(math.sqrt(n))
-
-    for i in range(1, sqrt_n + 1):
-        if n % i == 0:
-            factors.append(i)
-            if i != n // i:  # 避免重复添加（如当n为完全平方数时）
-                factors.append(n // i)
-
-    return sorted(factors)
+    return divisors_from_factorization(_factorize(n))
 
 
 def get_prime_factors(n):
     """
     获取一个数的所有质因数（素因数）
 
+    使用小质数试除 + Pollard-rho（Brent）分解
+
     参数:
         n: 待分解的正整数
 
     返回:
-        质因数列表（按出现顺序，包含重复）
+        质因数列表（从小到大，包含重复）
+    """
+    return [p for p, exponent in _factorize(n).items() for _ in range(exponent)]
+
+
+# 批量模式每个任务包含的数字个数
+DEFAULT_CHUNK_SIZE = 1000
+
+# 批量模式结果的CSV列
+BATCH_FIELDS = ('index', 'n', 'is_prime', 'factors', 'error')
+
+# 批量模式工作进程中打开的质数位图和持久化缓存
+_worker_bitmap = None
+_worker_cache = None
+
+
+def classify(index, text, factor=True, bitmap=None, cache=None):
+    """
+    判断并分解一个输入数字，返回结果记录
+
+    参数:
+        index: 输入序号（从0开始，按输入行计）
+        text: 输入的文本
+        factor: 是否分解合数的质因数
+        bitmap: 质数位图（None表示直接计算）
+        cache: FactorizationCache（None表示使用 enable_cache 启用的缓存，如果有的话）
+
+    返回:
+        字典 {index, n, is_prime, factors}；factors 为 [[质数, 指数], ...]（质数和1为空列表）；
+        输入无效时为 {index, n: 原文本, error: 错误信息}
+    """
+    try:
+        n = int(text)
+    except ValueError:
+        return {'index': index, 'n': text, 'error': '不是有效的整数'}
+    if n < 1:
+        return {'index': index, 'n': n, 'error': '不是正整数'}
+
+    if bitmap:
+        prime = bitmap.is_prime(n)
+    else:
+        prime = cache.is_prime(n) if cache else is_prime(n)
+    record = {'index': index, 'n': n, 'is_prime': prime}
+    if factor:
+        if not prime and n > 1:
+            record['factors'] = [[p, e] for p, e in (cache.factorize(n) if cache else _factorize(n)).items()]
+        else:
+            record['factors'] = []
+    return record
+
+
+def classify_many(items, factor=True, bitmap=None, cache=None):
     """
-    prime_factors = []
+    批量版 classify：一块输入的小质因数用乘积树 / 余数树一次性去掉（见 prime_batch），
+    只有余下的部分才做素性测试和 Pollard-rho；结果与逐个调用 classify 相同
 
-    # 处理因数2
-    while n % 2 == 0:
-        prime_factors.append(2)
-        n = n // 2
+    参数:
+        items: (序号, 文本) 序列
+        factor: 是否分解合数的质因数
+        bitmap: 质数位图（None表示直接计算）
+        cache: FactorizationCache（None表示使用 enable_cache 启用的缓存，如果有的话）
 
-    # 处理奇数因数
-    i = 3
-    while i * i <= n:
-        while n % i == 0:
-            prime_factors.append(i)
-            n = n // i
-        i += 2
+    返回:
+        与 items 一一对应的结果记录列表
+    """
+    cache = cache or _cache
+    records = []
+    valid = []
+    for index, text in items:
+        try:
+            n = int(text)
+        except ValueError:
+            records.append({'index': index, 'n': text, 'error': '不是有效的整数'})
+            continue
+        if n < 1:
+            records.append({'index': index, 'n': n, 'error': '不是正整数'})
+            continue
+        record = {'index': index, 'n': n, 'is_prime': False}
+        records.append(record)
+        valid.append(record)
+
+    def factorize_all(numbers):
+        return cache.factorize_many(numbers) if cache else batch_factorize(numbers)
+
+    numbers = [record['n'] for record in valid]
+    if factor and not bitmap:
+        # 分解结果本身就说明了是否为质数，不必再单独判断一遍
+        for record, factors in zip(valid, factorize_all(numbers)):
+            record['is_prime'] = factors == {record['n']: 1}
+            record['factors'] = [] if record['is_prime'] else [[p, e] for p, e in factors.items()]
+        return records
+
+    if bitmap:
+        primes = [bitmap.is_prime(n) for n in numbers]
+    elif cache:
+        primes = [cache.is_prime(n) for n in numbers]
+    else:
+        primes = batch_is_prime(numbers)
+    for record, prime in zip(valid, primes):
+        record['is_prime'] = prime
+
+    if factor:
+        composites = [record for record in valid if not record['is_prime'] and record['n'] > 1]
+        for record in valid:
+            record['factors'] = []
+        for record, factors in zip(composites, factorize_all([record['n'] for record in composites])):
+            record['factors'] = [[p, e] for p, e in factors.items()]
+    return records
+
+
+def _init_batch_worker(bitmap_path, cache_path=None):
+    """批量模式工作进程初始化：打开质数位图和持久化缓存"""
+    global _worker_bitmap, _worker_cache
+    _worker_bitmap = _open_bitmap(bitmap_path)
+    _worker_cache = FactorizationCache(cache_path) if cache_path else None
+
+
+def _classify_chunk(chunk, factor):
+    """批量模式任务：处理一块 (序号, 文本)"""
+    results = classify_many(chunk, factor, _worker_bitmap, _worker_cache)
+    if _worker_cache:
+        # 进程池的工作进程不会运行退出处理，每块结束时把新结果写入磁盘
+        _worker_cache.flush()
+    return results
+
+
+def _read_chunks(lines, chunk_size):
+    """把输入行分成 (序号, 文本) 块；跳过空行和 # 开头的注释行，但序号仍按行计"""
+    chunk = []
+    for index, line in enumerate(lines):
+        text = line.strip()
+        if not text or text.startswith('#'):
+            continue
+        chunk.append((index, text))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_batch_results(lines, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, factor=True, bitmap_path=None,
+                       cache_path=None):
+    """
+    批量判断和分解，按输入顺序逐条生成结果
+
+    输入按块分给进程池，同时在途的块数限制为 workers 的若干倍，
+    因此可以流式处理任意多的输入，内存占用与输入大小无关。
+
+    参数:
+        lines: 输入行的可迭代对象（每行一个整数）
+        workers: 进程数（1表示在当前进程中计算）
+        chunk_size: 每个任务包含的数字个数
+        factor: 是否分解合数的质因数
+        bitmap_path: 质数位图文件（None表示直接计算）
+        cache_path: 持久化缓存文件（None表示不使用；各进程共用同一个文件）
+
+    生成:
+        classify 返回的结果记录
+    """
+    if workers <= 1:
+        _init_batch_worker(bitmap_path, cache_path)
+        try:
+            for chunk in _read_chunks(lines, chunk_size):
+                yield from _classify_chunk(chunk, factor)
+        finally:
+            if _worker_bitmap:
+                _worker_bitmap.close()
+            if _worker_cache:
+                _worker_cache.close()
+        return
+
+    max_pending = workers * 4
+    pool = Pool(workers, initializer=_init_batch_worker, initargs=(bitmap_path, cache_path))
+    try:
+        pending = deque()
+        for chunk in _read_chunks(lines, chunk_size):
+            if len(pending) >= max_pending:
+                yield from pending.popleft().get()
+            pending.append(pool.apply_async(_classify_chunk, (chunk, factor)))
+        while pending:
+            yield from pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def write_batch_results(results, output, output_format='jsonl'):
+    """
+    把结果记录写成 JSON Lines 或 CSV
 
-    # 如果n大于1，说明n本身是质数
-    if n > 1:
-        prime_factors.append(n)
+    参数:
+        results: 结果记录的可迭代对象
+        output: 文本输出流
+        output_format: 'jsonl' 或 'csv'（CSV 中 factors 写成 "2^3*3^2*5" 的形式）
 
-    return prime_factors
+    返回:
+        写出的记录条数
+    """
+    count = 0
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, BATCH_FIELDS)
+        writer.writeheader()
+        for record in results:
+            row = dict(record)
+            if 'factors' in row:
+                row['factors'] = '*'.join(f"{p}^{e}" if e > 1 else str(p) for p, e in row['factors'])
+            writer.writerow(row)
+            count += 1
+    else:
+        for record in results:
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def run_batch(args):
+    """批量模式：读取输入、并行计算、写出结果"""
+    source = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        results = iter_batch_results(source, max(1, args.workers), args.chunk_size,
+                                     factor=not args.no_factor, bitmap_path=args.bitmap, cache_path=args.cache)
+        count = write_batch_results(results, output, args.format)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"已处理 {count:,} 个数字", file=sys.stderr)
 
 
 def main():
     """
     主程序
     """
-    # Python 3 理论上支持任意大的整数，但考虑算法效率，设定实际限制
-    MAX_VALUE = 10 ** 15  # 1,000,000,000,000,000
+    parser = argparse.ArgumentParser(description='质数判断程序')
+    parser.add_argument('--bitmap', type=str, help='质数位图文件（见 prime_bitmap.py）；范围内的判断直接查表')
+    parser.add_argument('--cache', type=str, default=None,
+                        help='质因数分解结果的持久化缓存文件（sqlite），跨运行、跨进程复用')
+    parser.add_argument('--batch', type=str, nargs='?', const='-', default=None,
+                        help='批量模式：从文件（省略或 - 表示标准输入）读取数字，每行一个')
+    parser.add_argument('--output', type=str, default='-', help='批量模式的输出文件（默认标准输出）')
+    parser.add_argument('--format', type=str, choices=['jsonl', 'csv'], default='jsonl',
+                        help='批量模式的输出格式（默认jsonl）')
+    parser.add_argument('--workers', type=int, default=1, help='批量模式的进程数（默认1，建议设为CPU核心数）')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'批量模式每个任务的数字个数（默认{DEFAULT_CHUNK_SIZE}）')
+    parser.add_argument('--no-factor', action='store_true', help='批量模式只判断是否为质数，不分解质因数')
+    parser.add_argument('--explain', action='store_true', help='判断前打印查询规划（各判断方式的估计耗时和最终选择）')
+    parser.add_argument('--cost', type=str, action='append', metavar='名称=值',
+                        help='覆盖规划器代价模型的系数（纳秒，可重复，见 prime_planner.DEFAULT_COSTS）')
+    args = parser.parse_args()
+    try:
+        costs = parse_costs(args.cost)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.batch is not None:
+        run_batch(args)
+        return
+
+    if args.cache:
+        enable_cache(args.cache)
+
+    # 位图通过 mmap 读取，打开时不加载数据；范围外的数仍然使用素性测试
+    bitmap = _open_bitmap(args.bitmap)
+
+    # 质数判断对任意大的整数都很快；Pollard-rho 的耗时取决于第二大质因数的大小，
+    # 24位以内的合数最坏约1秒，更大的合数若由两个同样大的质因数组成，分解可能较慢
+    MAX_VALUE = 10 ** 24
 
     print("=" * 50)
     print("质数判断程序")
     print("=" * 50)
-    print(f"说明：本程序支持判断 1 到 {MAX_VALUE:,} 之间的正整数")
-    print(f"Python 3 不存在整数溢出问题，但超大数字判断可能耗时较长")
+    print(f"说明：本程序支持判断任意大的正整数（Miller-Rabin / BPSW 素性测试）")
+    print(f"超过 {MAX_VALUE:,} 的合数分解质因数可能耗时较长")
+    if bitmap:
+        print(f"已加载质数位图: [{bitmap.lo:,}, {bitmap.hi:,})")
     print("=" * 50)
     print()
 
@@ -122,23 +420,26 @@ def main():
                 print("错误：请输入大于0的正整数！\n")
                 continue
 
-            if number > MAX_VALUE:
-                print(f"警告：输入值超过推荐范围 {MAX_VALUE:,}，计算可能耗时较长")
-                confirm = input("是否继续？(y/n): ").strip().lower()
-                if confirm != 'y':
-                    print("已取消\n")
-                    continue
-
             # 判断是否为质数
             print(f"\n正在判断 {number:,} ...\n")
+            if args.explain:
+                print(plan_point(number, bitmap, costs).explain() + "\n")
 
             # 特殊处理：数字1既不是质数也不是合数
             if number == 1:
                 print("正整数1既不是质数也不是合数")
-            elif is_prime(number):
+            elif is_prime(number, bitmap, costs):
                 print("YES，这是个质数")
             else:
                 print("NO，这不是质数")
+
+                if number > MAX_VALUE:
+                    print(f"警告：输入值超过推荐范围 {MAX_VALUE:,}，分解质因数可能耗时较长")
+                    confirm = input("是否继续分解？(y/n): ").strip().lower()
+                    if confirm != 'y':
+                        print("已取消\n")
+                        continue
+
                 print("该数的所有质因数为：")
                 prime_factors = get_prime_factors(number)
 
@@ -156,6 +457,9 @@ def main():
         except Exception as e:
             print(f"发生错误：{e}\n")
 
+    if bitmap:
+        bitmap.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,836 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多机分布式遍历（工作单元租约）
+功能：把 [start, end] 划分为固定大小的工作单元，以"租约"的方式分配给各台机器上的工作进程；
+     租约有超时，工作进程定期续约，进程死掉后它的单元会在超时后重新分配给别的工作进程；
+     完成情况记录在清单（manifest）中，全部完成后把各单元的结果按顺序拼接成最终输出
+
+两种协调方式（工作进程的逻辑相同）：
+  TCP   - 一个协调进程（asyncio，JSON Lines 协议）在内存中管理租约并维护清单，
+          工作进程在本地计算，完成后把单元结果上传给协调进程；各机器不需要共享文件系统。
+          默认只监听本机，供其他机器连接时用 --host 0.0.0.0；每个请求都要带上清单中的令牌
+          （协调进程启动时打印，工作进程用 --token 传入），没有令牌的连接不能申请租约或上传结果
+  目录  - 不需要协调进程：各机器挂载同一个共享目录，用原子创建（O_EXCL）的锁文件作为租约，
+          修改时间作为心跳；结果直接写入共享目录（各机器的时钟需大致同步）
+
+工作目录结构：
+    manifest.json             划分方案与各单元状态
+    units/unit_000000.bin     各单元的质数（prime_store 的二进制格式，附 .idx 索引）
+    leases/unit_000000.lease  目录方式的租约锁文件
+    done/unit_000000.json     目录方式的完成标记
+
+同一单元的结果是确定的，最坏情况（租约刚过期时原工作进程又恢复）只是重复计算，不会出错。
+
+使用示例：
+  # TCP：协调进程 + 各机器上的工作进程
+  python prime_cluster.py serve cluster_work 1000000000000 1999999999999 --output prime_13bits.csv --host 0.0.0.0
+  python prime_cluster.py work --connect coordinator-host:8766 --token <令牌> --workers 8
+  # 共享目录
+  python prime_cluster.py plan /mnt/shared/primes 1000000000000 1999999999999
+  python prime_cluster.py work --dir /mnt/shared/primes --workers 8
+  python prime_cluster.py status /mnt/shared/primes
+  python prime_cluster.py assemble /mnt/shared/primes prime_13bits.csv
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+
+from prime_range_finder import load_checkpoint, save_checkpoint
+from prime_sieve import BACKENDS, DEFAULT_SEGMENT_BYTES, iter_prime_chunks
+from prime_store import PrimeStoreReader, PrimeStoreWriter, index_path
+from prime_writer import COMPRESSIONS, open_prime_writer
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+
+# 每个工作单元覆盖的整数个数（10^12 附近约含3600万个质数，二进制结果约36MB）
+DEFAULT_UNIT_SIZE = 10 ** 9
+
+# 租约超时（秒）：超过该时间没有续约的单元会重新分配；工作进程每隔超时的1/3续约一次
+DEFAULT_LEASE_TIMEOUT = 300.0
+
+# 暂时没有可分配的单元（都已租出）时，工作进程等待多久再来申请（秒）
+RETRY_INTERVAL = 5.0
+
+# 上传单元结果时每次读取的字节数
+UPLOAD_CHUNK = 1 << 20
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def unit_name(index):
+    return f"unit_{index:06d}"
+
+
+def unit_path(work_dir, index):
+    """第 index 个单元的结果文件路径（索引文件为其后加 .idx）"""
+    return os.path.join(work_dir, 'units', unit_name(index) + '.bin')
+
+
+def plan_units(start, end, unit_size=DEFAULT_UNIT_SIZE):
+    """
+    把 [start, end] 划分为工作单元
+
+    返回:
+        [(lo, hi), ...]，各单元首尾相接、都包含两端
+    """
+    if start > end:
+        raise ValueError("起始值不能大于结束值")
+    if unit_size < 1:
+        raise ValueError("单元大小必须是正整数")
+    return [(lo, min(lo + unit_size - 1, end)) for lo in range(start, end + 1, unit_size)]
+
+
+def create_manifest(work_dir, start, end, unit_size=DEFAULT_UNIT_SIZE):
+    """
+    在工作目录中创建清单；清单已存在时检查划分参数一致并直接返回已有清单（继续未完成的工作）
+
+    返回:
+        清单字典
+    """
+    manifest = load_manifest(work_dir)
+    if manifest is not None:
+        if (manifest['start'], manifest['end'], manifest['unit_size']) != (start, end, unit_size):
+            raise ValueError(f"工作目录中已有不同范围或单元大小的清单: {work_dir}")
+        return manifest
+
+    for name in ('units', 'leases', 'done'):
+        os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+    manifest = {
+        'start': start,
+        'end': end,
+        'unit_size': unit_size,
+        'token': uuid.uuid4().hex,
+        'units': [{'index': i, 'lo': lo, 'hi': hi, 'status': 'pending', 'prime_count': None}
+                  for i, (lo, hi) in enumerate(plan_units(start, end, unit_size))],
+    }
+    save_checkpoint(os.path.join(work_dir, MANIFEST_FILE), manifest)
+    return manifest
+
+
+def load_manifest(work_dir):
+    """
+    读取清单，并合并目录方式下各工作进程写下的完成标记和租约
+
+    返回:
+        清单字典；不存在时返回 None
+    """
+    manifest = load_checkpoint(os.path.join(work_dir, MANIFEST_FILE))
+    if manifest is None:
+        return None
+    for unit in manifest['units']:
+        if unit['status'] != 'done':
+            name = unit_name(unit['index'])
+            marker = load_checkpoint(os.path.join(work_dir, 'done', name + '.json'))
+            if marker is not None:
+                unit.update(marker, status='done')
+            elif os.path.exists(os.path.join(work_dir, 'leases', name + '.lease')):
+                unit['status'] = 'leased'
+    return manifest
+
+
+def _write_json(path, data):
+    """原子地写入一个 JSON 文件（临时文件名唯一，多个进程同时写同一文件也不会冲突）"""
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def manifest_summary(manifest):
+    """统计清单中各状态的单元数和已找到的质数个数"""
+    units = manifest['units']
+    done = [unit for unit in units if unit['status'] == 'done']
+    return {
+        'units': len(units),
+        'done': len(done),
+        'leased': sum(unit['status'] == 'leased' for unit in units),
+        'pending': sum(unit['status'] == 'pending' for unit in units),
+        'primes': sum(unit['prime_count'] for unit in done),
+    }
+
+
+def compute_unit(lo, hi, path, heartbeat=None, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    筛出 [lo, hi] 内的全部质数，写成二进制质数文件
+
+    参数:
+        lo, hi: 单元范围（包含两端）
+        path: 结果文件路径
+        heartbeat: 每筛完一段调用一次的函数，返回 False 表示租约已失效，放弃该单元
+        workers: 并行筛选的进程数
+        segment_bytes: 分段筛法每段的字节数
+        backend: 筛选后端
+
+    返回:
+        质数个数；放弃时返回 None（并删除已写的部分）
+    """
+    count = 0
+    with PrimeStoreWriter(path) as writer:
+        chunks = iter_prime_chunks(lo, hi, workers, segment_bytes, backend)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+                count += len(chunk)
+                if heartbeat is not None and not heartbeat():
+                    count = None
+                    break
+        finally:
+            chunks.close()
+    if count is None:
+        _remove_unit_files(path)
+    return count
+
+
+def _remove_unit_files(path):
+    for name in (path, index_path(path)):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+def _move_unit_files(source, target):
+    """把单元结果（连同索引）移动到最终位置（同一文件系统内为原子替换）"""
+    os.replace(index_path(source), index_path(target))
+    os.replace(source, target)
+
+
+def assemble(work_dir, output_file, output_format='csv', compression=None):
+    """
+    把全部单元的结果按顺序拼接成最终输出（序号连续）
+
+    参数:
+        work_dir: 工作目录
+        output_file: 输出文件路径
+        output_format: 'csv' 或 'bin'
+        compression: CSV 的压缩方式
+
+    返回:
+        质数总数
+    """
+    manifest = load_manifest(work_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"找不到清单: {work_dir}")
+    missing = [unit['index'] for unit in manifest['units'] if unit['status'] != 'done']
+    if missing:
+        raise RuntimeError(f"还有 {len(missing)} 个单元未完成（第一个为 {missing[0]}）")
+
+    total = 0
+    with open_prime_writer(output_file, output_format, compression) as writer:
+        for unit in manifest['units']:
+            with PrimeStoreReader(unit_path(work_dir, unit['index'])) as reader:
+                for _, primes in reader.iter_blocks():
+                    writer.write(primes)
+                    total += len(primes)
+    return total
+
+
+class DirectoryLeases:
+    """
+    基于共享目录的租约（不需要协调进程）
+
+    租约是 leases/ 下以 O_EXCL 原子创建的锁文件，文件内容为持有者的随机令牌，修改时间即最后一次心跳；
+    超时的租约先被原子地改名再删除，保证同一时刻只有一个工作进程能接手。
+    """
+
+    def __init__(self, work_dir, worker_id=None, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        self.work_dir = work_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = lease_timeout / 3
+        self.retry = min(RETRY_INTERVAL, lease_timeout)
+        manifest = load_manifest(work_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"找不到清单（先运行 plan）: {work_dir}")
+        self.units = manifest['units']
+        self._done = {unit['index'] for unit in self.units if unit['status'] == 'done'}
+        self._tokens = {}
+
+    def _lease_path(self, index):
+        return os.path.join(self.work_dir, 'leases', unit_name(index) + '.lease')
+
+    def _done_path(self, index):
+        return os.path.join(self.work_dir, 'done', unit_name(index) + '.json')
+
+    def _create_lease(self, index):
+        """尝试原子地创建锁文件，成功时返回 True"""
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(self._lease_path(index), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'worker': self.worker_id, 'token': token}, f)
+        self._tokens[index] = token
+        return True
+
+    def _break_stale_lease(self, index):
+        """租约已超时时把它移走，成功时返回 True"""
+        path = self._lease_path(index)
+        try:
+            if time.time() - os.stat(path).st_mtime <= self.lease_timeout:
+                return False
+            stale = f"{path}.{uuid.uuid4().hex}.stale"
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return False
+        # 检查与改名之间别的进程可能已经接手并刷新了租约：此时放回原处
+        if time.time() - os.stat(stale).st_mtime <= self.lease_timeout:
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+            os.remove(stale)
+            return False
+        os.remove(stale)
+        return True
+
+    def _holds(self, index):
+        """当前进程是否仍持有该单元的租约"""
+        try:
+            with open(self._lease_path(index), encoding='utf-8') as f:
+                return json.load(f).get('token') == self._tokens.get(index)
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def lease(self):
+        """
+        申请一个单元
+
+        返回:
+            单元字典 {'index', 'lo', 'hi'}；暂时没有可分配的单元时返回 None；全部完成时返回 False
+        """
+        for unit in self.units:
+            index = unit['index']
+            if index in self._done:
+                continue
+            if os.path.exists(self._done_path(index)):
+                self._done.add(index)
+                continue
+            if self._create_lease(index) or (self._break_stale_lease(index) and self._create_lease(index)):
+                # 申请期间单元可能刚被完成
+                if os.path.exists(self._done_path(index)):
+                    self.release(index)
+                    self._done.add(index)
+                    continue
+                return {'index': index, 'lo': unit['lo'], 'hi': unit['hi']}
+        return False if len(self._done) == len(self.units) else None
+
+    def heartbeat(self, index):
+        """续约，返回是否仍持有租约"""
+        if not self._holds(index):
+            return False
+        os.utime(self._lease_path(index))
+        return True
+
+    def scratch_path(self, index):
+        """计算过程中的临时结果路径（与最终位置在同一文件系统，完成时原子改名）"""
+        return f"{unit_path(self.work_dir, index)}.{uuid.uuid4().hex}.tmp"
+
+    def complete(self, index, path, prime_count):
+        """把计算好的结果移到最终位置，写完成标记并释放租约"""
+        _move_unit_files(path, unit_path(self.work_dir, index))
+        _write_json(self._done_path(index), {
+            'prime_count': prime_count,
+            'worker': self.worker_id,
+            'completed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        self._done.add(index)
+        self.release(index)
+
+    def release(self, index):
+        """放弃租约（只删除自己持有的锁文件）"""
+        if self._holds(index):
+            try:
+                os.remove(self._lease_path(index))
+            except FileNotFoundError:
+                pass
+        self._tokens.pop(index, None)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class LeaseCoordinator:
+    """
+    TCP 协调进程：在内存中管理租约，完成情况写入清单
+
+    协议（每行一个 JSON 对象，每个请求一个响应；每个请求都带有 "token": 清单中的令牌，下面省略）：
+        {"op": "lease", "worker": "host:pid"}
+            -> {"unit": {"index": 0, "lo": ..., "hi": ...}, "lease_timeout": 300}
+            -> {"unit": null, "retry": 5}（暂时没有可分配的单元）/ {"unit": null, "done": true}
+        {"op": "heartbeat", "worker": ..., "index": 0}               -> {"ok": true/false}
+        {"op": "complete", "worker": ..., "index": 0, "prime_count": n, "sizes": [数据长度, 索引长度]}
+            请求行之后紧跟上传的数据文件和索引文件内容                   -> {"ok": true}
+        {"op": "release", "worker": ..., "index": 0}                 -> {"ok": true}
+        {"op": "status"}                                             -> {"result": {...}}
+    令牌错误、请求格式错误或上传失败时返回错误信息并断开连接（上传的内容可能还没有读完，不能再按行解析）。
+    协调进程重启后从清单继续：已完成的单元保留，租出未完成的单元重新分配。
+    """
+
+    def __init__(self, work_dir, lease_timeout=DEFAULT_LEASE_TIMEOUT, output_file=None, output_format='csv',
+                 compression=None):
+        """
+        参数:
+            work_dir: 工作目录（已用 create_manifest 创建清单）
+            lease_timeout: 租约超时（秒）
+            output_file: 全部完成后拼接输出的文件（None表示不拼接）
+            output_format: 输出格式
+            compression: CSV 的压缩方式
+        """
+        self.work_dir = work_dir
+        self.lease_timeout = lease_timeout
+        self.output_file = output_file
+        self.output_format = output_format
+        self.compression = compression
+        self.manifest = load_manifest(work_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"找不到清单: {work_dir}")
+        self.units = self.manifest['units']
+        if 'token' not in self.manifest:
+            # 旧版本创建的清单没有令牌
+            self.manifest['token'] = uuid.uuid4().hex
+            self._save()
+        self.token = self.manifest['token']
+        for unit in self.units:
+            if unit['status'] == 'leased':
+                unit['status'] = 'pending'
+        self._leases = {}   # index -> (worker, 到期时间)
+        self._writers = set()
+        self.finished = asyncio.Event()
+        self.assembled = None
+
+    def _save(self):
+        save_checkpoint(os.path.join(self.work_dir, MANIFEST_FILE), self.manifest)
+
+    def _lease(self, worker):
+        now = time.monotonic()
+        for unit in self.units:
+            if unit['status'] == 'done':
+                continue
+            lease = self._leases.get(unit['index'])
+            if lease is not None and lease[1] > now:
+                continue
+            unit['status'] = 'leased'
+            unit['worker'] = worker
+            unit['attempts'] = unit.get('attempts', 0) + 1
+            self._leases[unit['index']] = (worker, now + self.lease_timeout)
+            return {'unit': {'index': unit['index'], 'lo': unit['lo'], 'hi': unit['hi']},
+                    'lease_timeout': self.lease_timeout}
+        if all(unit['status'] == 'done' for unit in self.units):
+            return {'unit': None, 'done': True}
+        return {'unit': None, 'retry': min(RETRY_INTERVAL, self.lease_timeout)}
+
+    def _unit_index(self, request):
+        """取出请求中的单元序号并检查范围"""
+        index = request.get('index')
+        if type(index) is not int or not 0 <= index < len(self.units):
+            raise ValueError(f"无效的单元序号: {index!r}")
+        return index
+
+    def _heartbeat(self, worker, index):
+        lease = self._leases.get(index)
+        if lease is None or lease[0] != worker or self.units[index]['status'] == 'done':
+            return {'ok': False}
+        self._leases[index] = (worker, time.monotonic() + self.lease_timeout)
+        return {'ok': True}
+
+    async def _complete(self, request, reader):
+        # 先检查请求本身，再读取上传的内容
+        index = self._unit_index(request)
+        sizes = request.get('sizes')
+        prime_count = request.get('prime_count')
+        if (not isinstance(sizes, list) or len(sizes) != 2 or not all(type(s) is int and s >= 0 for s in sizes)
+                or type(prime_count) is not int or prime_count < 0):
+            raise ValueError("complete 请求缺少或带有格式错误的 sizes / prime_count")
+        data_size, index_size = sizes
+        target = unit_path(self.work_dir, index)
+        temp = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            for path, size in ((temp, data_size), (index_path(temp), index_size)):
+                with open(path, 'wb') as f:
+                    while size > 0:
+                        data = await reader.readexactly(min(size, UPLOAD_CHUNK))
+                        f.write(data)
+                        size -= len(data)
+            with PrimeStoreReader(temp) as check:
+                if len(check) != prime_count:
+                    raise ValueError("上传的单元结果与报告的质数个数不一致")
+        except BaseException:
+            _remove_unit_files(temp)
+            raise
+
+        unit = self.units[index]
+        if unit['status'] == 'done':
+            # 租约过期后重复完成的单元：结果相同，保留先到的一份
+            _remove_unit_files(temp)
+            return {'ok': True}
+        _move_unit_files(temp, target)
+        self._leases.pop(index, None)
+        unit.update(status='done', prime_count=prime_count, worker=request.get('worker'),
+                    completed_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        self._save()
+        if all(unit['status'] == 'done' for unit in self.units):
+            asyncio.get_running_loop().create_task(self._finish())
+        return {'ok': True}
+
+    async def _finish(self):
+        """全部完成：拼接输出（在线程中进行，不阻塞事件循环），然后通知服务结束"""
+        if self.output_file:
+            loop = asyncio.get_running_loop()
+            self.assembled = await loop.run_in_executor(
+                None, assemble, self.work_dir, self.output_file, self.output_format, self.compression)
+        self.finished.set()
+
+    def _release(self, worker, index):
+        lease = self._leases.get(index)
+        if lease is not None and lease[0] == worker:
+            del self._leases[index]
+            if self.units[index]['status'] == 'leased':
+                self.units[index]['status'] = 'pending'
+        return {'ok': True}
+
+    def status(self):
+        """当前进度（租约已过期的单元计为待分配）"""
+        now = time.monotonic()
+        for unit in self.units:
+            lease = self._leases.get(unit['index'])
+            if unit['status'] == 'leased' and (lease is None or lease[1] <= now):
+                unit['status'] = 'pending'
+        return manifest_summary(self.manifest)
+
+    async def handle_request(self, request, reader):
+        """处理一个请求对象，返回响应对象"""
+        if not isinstance(request, dict):
+            raise ValueError("请求必须是 JSON 对象")
+        token = request.get('token')
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8')):
+            raise PermissionError("令牌错误")
+        op = request.get('op')
+        if op == 'lease':
+            return self._lease(request['worker'])
+        if op == 'heartbeat':
+            return self._heartbeat(request['worker'], self._unit_index(request))
+        if op == 'complete':
+            return await self._complete(request, reader)
+        if op == 'release':
+            return self._release(request['worker'], self._unit_index(request))
+        if op == 'status':
+            return {'result': self.status()}
+        raise ValueError(f"未知操作: {op}")
+
+    async def _handle_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.handle_request(json.loads(line), reader)
+                    failed = False
+                except (ValueError, KeyError, TypeError, AttributeError, OSError) as e:
+                    response = {'error': str(e) or type(e).__name__}
+                    failed = True
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+                if failed:
+                    # 出错后连接上可能还有没读完的上传内容，不能再按行解析
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """开始监听，返回 asyncio.Server"""
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """
+        运行直到全部单元完成（并拼接好输出）
+
+        参数:
+            ready: 开始监听后调用的函数，参数为实际端口
+        """
+        listener = await self.start(host, port)
+        if ready is not None:
+            ready(listener.sockets[0].getsockname()[1])
+        async with listener:
+            if all(unit['status'] == 'done' for unit in self.units):
+                await self._finish()
+            await self.finished.wait()
+            # 断开仍然连着的工作进程，它们会把断开视为结束
+            for writer in list(self._writers):
+                writer.close()
+        return self.assembled
+
+
+class TcpLeases:
+    """
+    通过 TCP 向协调进程申请租约（接口与 DirectoryLeases 相同）
+
+    单元在本地临时目录中计算，完成后上传给协调进程。
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, worker_id=None, scratch_dir=None, timeout=None, token=''):
+        """
+        参数:
+            host, port: 协调进程地址
+            worker_id: 工作进程标识（默认 主机名:进程号）
+            scratch_dir: 本地临时目录
+            timeout: 连接和读写超时（秒，None表示不限制）
+            token: 清单中的令牌（协调进程启动时打印）
+        """
+        self.token = token
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._sock = socket.create_connection((host, port), timeout)
+        self._file = self._sock.makefile('rwb')
+        self.scratch_dir = scratch_dir or tempfile.gettempdir()
+        self.lease_timeout = DEFAULT_LEASE_TIMEOUT
+        self.heartbeat_interval = self.lease_timeout / 3
+        self.retry = RETRY_INTERVAL
+
+    def _request(self, request, *upload_paths):
+        self._file.write(json.dumps(dict(request, token=self.token)).encode('utf-8') + b'\n')
+        for path in upload_paths:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self._file, UPLOAD_CHUNK)
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("协调进程已断开连接")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def lease(self):
+        """申请一个单元；暂时没有时返回 None，全部完成时返回 False"""
+        response = self._request({'op': 'lease', 'worker': self.worker_id})
+        if response['unit'] is None:
+            if response.get('done'):
+                return False
+            self.retry = response.get('retry', RETRY_INTERVAL)
+            return None
+        self.lease_timeout = response['lease_timeout']
+        self.heartbeat_interval = self.lease_timeout / 3
+        return response['unit']
+
+    def heartbeat(self, index):
+        return self._request({'op': 'heartbeat', 'worker': self.worker_id, 'index': index})['ok']
+
+    def scratch_path(self, index):
+        return os.path.join(self.scratch_dir, f"{unit_name(index)}.{uuid.uuid4().hex}.tmp")
+
+    def complete(self, index, path, prime_count):
+        """上传结果并删除本地临时文件"""
+        sizes = [os.path.getsize(path), os.path.getsize(index_path(path))]
+        try:
+            self._request({'op': 'complete', 'worker': self.worker_id, 'index': index,
+                           'prime_count': prime_count, 'sizes': sizes}, path, index_path(path))
+        finally:
+            _remove_unit_files(path)
+
+    def release(self, index):
+        self._request({'op': 'release', 'worker': self.worker_id, 'index': index})
+
+    def status(self):
+        return self._request({'op': 'status'})['result']
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def run_worker(leases, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None, max_units=None, log=print):
+    """
+    工作进程主循环：不断申请单元、计算、提交，直到全部完成
+
+    参数:
+        leases: DirectoryLeases 或 TcpLeases
+        workers: 每个单元并行筛选的进程数
+        segment_bytes: 分段筛法每段的字节数
+        backend: 筛选后端
+        max_units: 最多完成多少个单元后退出（None表示不限制）
+        log: 输出日志的函数（None表示不输出）
+
+    返回:
+        本进程完成的单元数
+    """
+    completed = 0
+    while max_units is None or completed < max_units:
+        unit = leases.lease()
+        if unit is False:
+            break
+        if unit is None:
+            time.sleep(leases.retry)
+            continue
+
+        index = unit['index']
+        last_beat = time.monotonic()
+
+        def heartbeat():
+            nonlocal last_beat
+            if time.monotonic() - last_beat < leases.heartbeat_interval:
+                return True
+            last_beat = time.monotonic()
+            return leases.heartbeat(index)
+
+        started = time.time()
+        path = leases.scratch_path(index)
+        try:
+            count = compute_unit(unit['lo'], unit['hi'], path, heartbeat, workers, segment_bytes, backend)
+        except BaseException:
+            _remove_unit_files(path)
+            try:
+                leases.release(index)
+            except (OSError, RuntimeError):
+                pass  # 连接已断开时租约会自然过期
+            raise
+        if count is None:
+            if log:
+                log(f"单元 {index} 的租约已失效，放弃")
+            continue
+        leases.complete(index, path, count)
+        completed += 1
+        if log:
+            log(f"单元 {index} [{unit['lo']:,}, {unit['hi']:,}] 完成：{count:,} 个质数，"
+                f"耗时 {time.time() - started:.1f} 秒")
+    return completed
+
+
+def _parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def main():
+    """
+    命令行：划分、协调、工作、查看进度、拼接输出
+    """
+    parser = argparse.ArgumentParser(description='多机分布式遍历（工作单元租约）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_range_arguments(sub):
+        sub.add_argument('work_dir', help='工作目录（清单和各单元的结果）')
+        sub.add_argument('start', type=int, help='起始值（包含）')
+        sub.add_argument('end', type=int, help='结束值（包含）')
+        sub.add_argument('--unit-size', type=int, default=DEFAULT_UNIT_SIZE,
+                         help=f'每个工作单元的整数个数（默认{DEFAULT_UNIT_SIZE:,}）')
+
+    def add_output_arguments(sub):
+        sub.add_argument('--format', type=str, choices=['csv', 'bin'], default='csv', help='输出格式')
+        sub.add_argument('--compress', type=str, choices=sorted(COMPRESSIONS), default=None, help='压缩CSV输出')
+
+    plan = subparsers.add_parser('plan', help='在共享目录中创建清单（目录方式）')
+    add_range_arguments(plan)
+
+    serve = subparsers.add_parser('serve', help='启动 TCP 协调进程，全部完成后拼接输出并退出')
+    add_range_arguments(serve)
+    serve.add_argument('--host', type=str, default=DEFAULT_HOST, help=f'监听地址（默认{DEFAULT_HOST}，只接受本机连接；供其他机器连接时用 0.0.0.0）')
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'监听端口（默认{DEFAULT_PORT}）')
+    serve.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT, help='租约超时（秒）')
+    serve.add_argument('--output', type=str, default=None, help='拼接输出的文件')
+    add_output_arguments(serve)
+
+    work = subparsers.add_parser('work', help='启动工作进程')
+    source = work.add_mutually_exclusive_group(required=True)
+    source.add_argument('--connect', type=str, help='协调进程地址 host:port')
+    source.add_argument('--dir', type=str, help='共享工作目录')
+    work.add_argument('--token', type=str, default='', help='协调进程的令牌（TCP 方式，协调进程启动时打印）')
+    work.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT,
+                      help='租约超时（秒，目录方式；所有工作进程应一致）')
+    work.add_argument('--scratch', type=str, default=None, help='本地临时目录（TCP 方式）')
+    work.add_argument('--workers', type=int, default=1, help='每个单元并行筛选的进程数（默认1）')
+    work.add_argument('--backend', type=str, choices=BACKENDS, default=None, help='筛选后端')
+
+    status = subparsers.add_parser('status', help='查看进度')
+    status.add_argument('target', help='共享工作目录，或协调进程地址 host:port')
+    status.add_argument('--token', type=str, default='', help='协调进程的令牌（TCP 方式）')
+
+    assemble_parser = subparsers.add_parser('assemble', help='把全部单元的结果按顺序拼接成输出文件')
+    assemble_parser.add_argument('work_dir', help='工作目录')
+    assemble_parser.add_argument('output', help='输出文件')
+    add_output_arguments(assemble_parser)
+
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        manifest = create_manifest(args.work_dir, args.start, args.end, args.unit_size)
+        print(f"清单已创建: {len(manifest['units'])} 个单元，工作目录 {args.work_dir}")
+    elif args.command == 'serve':
+        manifest = create_manifest(args.work_dir, args.start, args.end, args.unit_size)
+        coordinator = LeaseCoordinator(args.work_dir, args.lease_timeout, args.output, args.format, args.compress)
+        summary = manifest_summary(manifest)
+        print(f"协调进程: {summary['units']} 个单元，已完成 {summary['done']} 个")
+        try:
+            total = asyncio.run(coordinator.serve(
+                args.host, args.port, ready=lambda port: print(f"正在监听 {args.host}:{port}，令牌 {coordinator.token}")))
+        except KeyboardInterrupt:
+            print("\n协调进程已停止，重新启动后从清单继续")
+            return
+        print("全部单元已完成")
+        if total is not None:
+            print(f"已拼接 {total:,} 个质数到: {args.output}")
+    elif args.command == 'work':
+        if args.connect:
+            host, port = _parse_address(args.connect)
+            leases = TcpLeases(host, port, scratch_dir=args.scratch, token=args.token)
+        else:
+            leases = DirectoryLeases(args.dir, lease_timeout=args.lease_timeout)
+        with leases:
+            try:
+                completed = run_worker(leases, max(1, args.workers), backend=args.backend)
+            except KeyboardInterrupt:
+                print("\n工作进程已停止，未完成的单元已释放")
+                return
+            except ConnectionError:
+                print("与协调进程的连接已断开（协调进程在全部完成后会退出）")
+                return
+            except RuntimeError as e:
+                print(f"协调进程拒绝了请求: {e}")
+                return
+        print(f"没有剩余的单元，本进程完成 {completed} 个")
+    elif args.command == 'status':
+        if os.path.isdir(args.target):
+            manifest = load_manifest(args.target)
+            if manifest is None:
+                parser.error(f"找不到清单: {args.target}")
+            summary = manifest_summary(manifest)
+        else:
+            with TcpLeases(*_parse_address(args.target), token=args.token) as client:
+                summary = client.status()
+        print(f"单元: 已完成 {summary['done']} / {summary['units']}，租出 {summary['leased']}，"
+              f"待分配 {summary['pending']}；已找到质数 {summary['primes']:,} 个")
+    else:
+        total = assemble(args.work_dir, args.output, args.format, args.compress)
+        print(f"已拼接 {total:,} 个质数到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
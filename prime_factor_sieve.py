@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+区间批量分解（分段质因数筛）
+功能：一次分解一个连续区间内的每个整数，而不是对每个数单独试除：
+     按段为每个位置保存尚未分解的余因子，对每个不超过 sqrt(hi) 的基础质数 p，
+     从段内第一个 p 的倍数起每隔 p 个位置除尽 p 并记下指数；
+     处理完全部基础质数后，余因子为 1 或一个大于 sqrt(hi) 的质数。
+     每个数的平均开销是 O(log log n)（它的质因数个数），而逐个试除是 O(sqrt(n))。
+     安装了 NumPy 时整段的倍数一次性展开成数组计算，并提供向量化的因数个数 d(n) 与因数和 σ(n)；
+     适用于终点不超过 10^16（MAX_FACTOR_END）的任意窗口：基础质数不超过 10^8，
+     10^7 以内取自质数表，更大的现场分段筛出
+
+使用示例：
+    from prime_factor_sieve import iter_factorizations, divisor_counts
+    for n, factors in iter_factorizations(10**12, 10**12 + 100):
+        print(n, factors)                     # 1000000000000 {2: 12, 5: 12}
+    divisor_counts(10**12, 10**12 + 10**6)    # 每个数的因数个数
+
+    python prime_factor_sieve.py 1000000000000 1000000000100
+    python prime_factor_sieve.py 1000000000000 1000001000000 --summary
+"""
+
+import argparse
+import math
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from prime_table import primes_up_to
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+# 每段的整数个数
+DEFAULT_FACTOR_SEGMENT = 1 << 18
+
+# 区间终点的上限：基础质数不超过 10^8（超出质数表的部分现场筛出），σ(n) < 7n 仍在 int64 范围内；
+# 更大的数请用 prime_factorizer 逐个分解
+MAX_FACTOR_END = 10 ** 16
+
+
+class FactorSegment:
+    """
+    一段连续整数 [lo, hi) 的完全分解
+
+    NumPy 后端以扁平数组保存：index / primes / exponents 为每个 (位置, 小质因数, 指数)，
+    按质数分组；cofactor[i] 为 lo + i 除尽全部小质因数后剩下的 1 或大质数。
+    纯 Python 后端直接保存每个数的 {质因数: 指数}。
+
+    属性:
+        lo: 段起点（包含）
+        hi: 段终点（不包含）
+    """
+
+    def __init__(self, lo, hi, index=None, primes=None, exponents=None, cofactor=None, factors=None):
+        self.lo = lo
+        self.hi = hi
+        self.index = index
+        self.primes = primes
+        self.exponents = exponents
+        self.cofactor = cofactor
+        self._factors = factors
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def factorizations(self):
+        """
+        返回每个数的分解结果
+
+        返回:
+            列表，第 i 项是 lo + i 的 {质因数: 指数}（按质因数升序，1 为空字典）
+        """
+        if self._factors is None:
+            factors = [{} for _ in range(len(self))]
+            # 同一位置的小质因数按质数升序：按位置做稳定排序即可
+            order = np.argsort(self.index, kind='stable')
+            for i, p, e in zip(self.index[order].tolist(), self.primes[order].tolist(),
+                               self.exponents[order].tolist()):
+                factors[i][p] = e
+            for i in np.flatnonzero(self.cofactor > 1).tolist():
+                factors[i][int(self.cofactor[i])] = 1
+            self._factors = factors
+        return self._factors
+
+    def divisor_counts(self):
+        """
+        返回每个数的因数个数 d(n) = ∏(e + 1)
+
+        返回:
+            NumPy 后端为 int64 数组，否则为列表
+        """
+        if self.index is None:
+            return [math.prod(e + 1 for e in factors.values()) for factors in self._factors]
+        counts = np.ones(len(self), dtype=np.int64)
+        np.multiply.at(counts, self.index, self.exponents + 1)
+        counts[self.cofactor > 1] *= 2
+        return counts
+
+    def divisor_sums(self):
+        """
+        返回每个数的全部因数之和 σ(n) = ∏(p^(e+1) - 1) / (p - 1)
+
+        返回:
+            NumPy 后端为 int64 数组，否则为列表
+        """
+        if self.index is None:
+            return [math.prod((p ** (e + 1) - 1) // (p - 1) for p, e in factors.items())
+                    for factors in self._factors]
+        # 1 + p + ... + p^e = p^e + (p^e - 1) / (p - 1)，不会计算 p^(e+1) 而溢出
+        powers = self.primes ** self.exponents
+        sums = np.ones(len(self), dtype=np.int64)
+        np.multiply.at(sums, self.index, powers + (powers - 1) // (self.primes - 1))
+        large = self.cofactor > 1
+        sums[large] *= self.cofactor[large] + 1
+        return sums
+
+
+def factor_segment(lo, hi, base_primes):
+    """
+    分解 [lo, hi) 内的每个整数（纯 Python 实现）
+
+    参数:
+        lo: 段起点（包含，至少为 1）
+        hi: 段终点（不包含）
+        base_primes: 升序的基础质数（含 2），需覆盖到 sqrt(hi - 1)
+
+    返回:
+        FactorSegment
+    """
+    size = hi - lo
+    remaining = list(range(lo, hi))
+    factors = [{} for _ in range(size)]
+    root = math.isqrt(hi - 1)
+    for p in base_primes:
+        if p > root:
+            break
+        for i in range(-lo % p, size, p):
+            n = remaining[i] // p
+            exponent = 1
+            while n % p == 0:
+                n //= p
+                exponent += 1
+            remaining[i] = n
+            factors[i][p] = exponent
+    for i, n in enumerate(remaining):
+        if n > 1:
+            factors[i][n] = 1
+    return FactorSegment(lo, hi, factors=factors)
+
+
+def factor_segment_numpy(lo, hi, base_primes):
+    """
+    NumPy 后端：分解 [lo, hi) 内的每个整数
+
+    把每个基础质数在段内的全部倍数一次性展开成扁平数组（共约 (hi - lo)·ln ln sqrt(hi) 项），
+    然后对仍能整除的项反复除以 p 求出指数，最后用各质数幂之积求出余因子。
+
+    参数:
+        lo: 段起点（包含，至少为 1）
+        hi: 段终点（不包含）
+        base_primes: 升序的基础质数（含 2，int64 数组），需覆盖到 sqrt(hi - 1)
+
+    返回:
+        FactorSegment
+    """
+    size = hi - lo
+    values = np.arange(lo, hi, dtype=np.int64)
+    primes = base_primes[:np.searchsorted(base_primes, math.isqrt(hi - 1), side='right')]
+
+    # 每个质数在段内的第一个倍数的位置和倍数个数
+    first = -lo % primes
+    hits = np.maximum((size - first + primes - 1) // primes, 0)
+    hit_primes = np.repeat(primes, hits)
+    starts = np.repeat(np.cumsum(hits) - hits, hits)
+    index = np.repeat(first, hits) + (np.arange(hit_primes.size) - starts) * hit_primes
+
+    # 求指数：只有还能整除的项进入下一轮，轮数不超过 log2(hi)
+    exponents = np.ones(hit_primes.size, dtype=np.int64)
+    quotients = values[index] // hit_primes
+    active = np.flatnonzero(quotients % hit_primes == 0)
+    while active.size:
+        p = hit_primes[active]
+        exponents[active] += 1
+        quotients[active] //= p
+        active = active[quotients[active] % p == 0]
+
+    # 余因子 = n / 各小质因数幂之积（同一位置有多个质数，必须用 multiply.at 累乘）
+    smooth = np.ones(size, dtype=np.int64)
+    np.multiply.at(smooth, index, hit_primes ** exponents)
+    return FactorSegment(lo, hi, index, hit_primes, exponents, values // smooth)
+
+
+def _base_primes(end, use_numpy):
+    """不超过 sqrt(end) 的全部质数（含 2）"""
+    primes = primes_up_to(math.isqrt(end))
+    return np.asarray(primes, dtype=np.int64) if use_numpy else primes.tolist()
+
+
+def _factor(lo, hi, base_primes):
+    if isinstance(base_primes, list):
+        return factor_segment(lo, hi, base_primes)
+    return factor_segment_numpy(lo, hi, base_primes)
+
+
+# 每个工作进程各自持有的基础质数表（由 _init_worker 设置）
+_worker_base_primes = None
+
+
+def _init_worker(end, use_numpy):
+    """工作进程初始化：只计算一次基础质数表"""
+    global _worker_base_primes
+    _worker_base_primes = _base_primes(end, use_numpy)
+
+
+def _factor_task(lo, hi):
+    return _factor(lo, hi, _worker_base_primes)
+
+
+def iter_factor_segments(start, end, segment_size=DEFAULT_FACTOR_SEGMENT, workers=1):
+    """
+    按段惰性分解 [start, end] 内的每个整数
+
+    多进程时各段并行分解，按升序取回；同时在途的段数限制为 workers 的若干倍，内存占用与范围大小无关。
+
+    参数:
+        start: 起始值（包含，至少为 1）
+        end: 结束值（包含，不超过 MAX_FACTOR_END）
+        segment_size: 每段的整数个数
+        workers: 并行进程数（1表示单进程）
+
+    生成:
+        FactorSegment，各段首尾相接、按升序排列
+    """
+    if start < 1:
+        raise ValueError("只能分解正整数")
+    if end > MAX_FACTOR_END:
+        raise ValueError(f"区间终点超过 {MAX_FACTOR_END:,}，基础质数表过大，请用 prime_factorizer 逐个分解")
+    if start > end:
+        return
+    use_numpy = np is not None
+    bounds = ((lo, min(lo + segment_size, end + 1)) for lo in range(start, end + 1, segment_size))
+
+    if workers <= 1:
+        base_primes = _base_primes(end, use_numpy)
+        for lo, hi in bounds:
+            yield _factor(lo, hi, base_primes)
+        return
+
+    pool = Pool(workers, initializer=_init_worker, initargs=(end, use_numpy))
+    try:
+        pending = deque()
+        for lo, hi in bounds:
+            if len(pending) >= workers * 4:
+                yield pending.popleft().get()
+            pending.append(pool.apply_async(_factor_task, (lo, hi)))
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def iter_factorizations(start, end, segment_size=DEFAULT_FACTOR_SEGMENT, workers=1):
+    """
+    逐个生成 [start, end] 内每个整数的分解结果
+
+    参数:
+        start: 起始值（包含，至少为 1）
+        end: 结束值（包含）
+        segment_size: 每段的整数个数
+        workers: 并行进程数（1表示单进程）
+
+    生成:
+        (n, {质因数: 指数})，按 n 升序
+    """
+    for segment in iter_factor_segments(start, end, segment_size, workers):
+        yield from zip(range(segment.lo, segment.hi), segment.factorizations())
+
+
+def _collect(start, end, segment_size, workers, reducer):
+    parts = [reducer(segment) for segment in iter_factor_segments(start, end, segment_size, workers)]
+    if parts and np is not None and isinstance(parts[0], np.ndarray):
+        return np.concatenate(parts)
+    return [value for part in parts for value in part]
+
+
+def divisor_counts(start, end, segment_size=DEFAULT_FACTOR_SEGMENT, workers=1):
+    """
+    返回 [start, end] 内每个整数的因数个数 d(n)
+
+    返回:
+        NumPy 后端为 int64 数组，否则为列表；第 i 项对应 start + i
+    """
+    return _collect(start, end, segment_size, workers, FactorSegment.divisor_counts)
+
+
+def divisor_sums(start, end, segment_size=DEFAULT_FACTOR_SEGMENT, workers=1):
+    """
+    返回 [start, end] 内每个整数的因数和 σ(n)
+
+    返回:
+        NumPy 后端为 int64 数组，否则为列表；第 i 项对应 start + i
+    """
+    return _collect(start, end, segment_size, workers, FactorSegment.divisor_sums)
+
+
+def format_factorization(factors):
+    """把 {质因数: 指数} 格式化为 2^3 × 3 × 5 的形式"""
+    return ' × '.join(f"{p}^{e}" if e > 1 else str(p) for p, e in factors.items()) or '1'
+
+
+def main():
+    """命令行：分解一个区间内的每个整数，或只打印因数个数 / 因数和的汇总"""
+    parser = argparse.ArgumentParser(description='区间批量分解（分段质因数筛）')
+    parser.add_argument('start', type=int, help='起始值（包含，至少为1）')
+    parser.add_argument('end', type=int, help='结束值（包含）')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数（默认1）')
+    parser.add_argument('--summary', action='store_true',
+                        help='不逐个打印分解结果，只汇总因数个数和因数和（最大值、平均值）')
+    args = parser.parse_args()
+    if args.start < 1:
+        parser.error("只能分解正整数")
+
+    started = time.time()
+    if not args.summary:
+        for n, factors in iter_factorizations(args.start, args.end, workers=max(1, args.workers)):
+            print(f"{n} = {format_factorization(factors)}")
+        return
+
+    count, best_d, best_sigma, total_d = 0, (0, 0), (0, 0), 0
+    for segment in iter_factor_segments(args.start, args.end, workers=max(1, args.workers)):
+        counts, sums = segment.divisor_counts(), segment.divisor_sums()
+        if isinstance(counts, list):
+            ratios = [s / n for n, s in zip(range(segment.lo, segment.hi), sums)]
+            i, j = counts.index(max(counts)), ratios.index(max(ratios))
+        else:
+            ratios = sums / np.arange(segment.lo, segment.hi)
+            i, j = int(np.argmax(counts)), int(np.argmax(ratios))
+        best_d = max(best_d, (int(counts[i]), segment.lo + i))
+        best_sigma = max(best_sigma, (float(ratios[j]), segment.lo + j))
+        total_d += int(sum(counts)) if isinstance(counts, list) else int(counts.sum())
+        count += len(segment)
+    print(f"整数个数: {count:,}")
+    print(f"平均因数个数: {total_d / count:.3f}")
+    print(f"因数最多: {best_d[1]:,}（{best_d[0]} 个因数）")
+    print(f"σ(n)/n 最大: {best_sigma[1]:,}（{best_sigma[0]:.4f}）")
+    print(f"耗时: {time.time() - started:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+质因数分解引擎
+功能：小质数试除 + Brent 改进的 Pollard-rho（批量求 gcd），
+     对余下的因子用素性测试判断；耗时取决于第二大质因数，
+     20位以内的整数以及只含一个大质因数的20~30位整数通常在毫秒级分解完成
+"""
+
+import math
+import random
+
+from prime_primality import is_prime
+from prime_table import simple_sieve
+
+
+# 试除使用的小质数（不超过该上界）
+TRIAL_DIVISION_LIMIT = 1000
+_TRIAL_PRIMES = simple_sieve(TRIAL_DIVISION_LIMIT)
+
+
+def pollard_brent(n, seed=None):
+    """
+    用 Brent 改进的 Pollard-rho 算法寻找 n 的一个非平凡因子
+
+    每累积 m 次乘积才求一次 gcd，大幅减少 gcd 的调用次数；
+    若一批乘积的 gcd 恰好等于 n，则回退到逐步求 gcd。
+
+    参数:
+        n: 待分解的合数（不能是质数）
+        seed: 随机数种子（None表示随机）
+
+    返回:
+        n 的一个非平凡因子（1 < d < n）
+    """
+    if n % 2 == 0:
+        return 2
+
+    rng = random.Random(seed)
+    m = 128
+
+    while True:
+        y = rng.randrange(1, n)
+        c = rng.randrange(1, n)
+        g = r = q = 1
+        x = ys = y
+
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+
+        if g == n:
+            # 批量 gcd 越过了因子，从本批起点逐步回溯
+            while True:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+                if g > 1:
+                    break
+
+        if g != n:
+            return g
+        # 本轮失败（x 与 y 同时落入所有因子的循环），换一组参数重试
+
+
+def factorize(n):
+    """
+    分解质因数
+
+    参数:
+        n: 待分解的正整数
+
+    返回:
+        字典 {质因数: 指数}，按质因数升序排列；n = 1 时返回空字典
+    """
+    if n < 1:
+        raise ValueError("只能分解正整数")
+
+    factors = {}
+
+    # 小质数试除
+    for p in _TRIAL_PRIMES:
+        if p * p > n:
+            break
+        if n % p == 0:
+            count = 0
+            while n % p == 0:
+                n //= p
+                count += 1
+            factors[p] = count
+
+    # 余下的因子都大于 TRIAL_DIVISION_LIMIT，用 Pollard-rho 继续拆分
+    return factorize_rough(n, factors)
+
+
+def factorize_rough(n, factors=None):
+    """
+    分解已经去掉小质因数的 n（不再试除，直接用素性测试 + Pollard-rho 拆分）
+
+    参数:
+        n: 正整数（含小质因数时结果仍然正确，只是更慢）
+        factors: 已经求出的 {质因数: 指数}，结果合并进去（None表示从空字典开始）
+
+    返回:
+        字典 {质因数: 指数}，按质因数升序排列
+    """
+    factors = dict(factors) if factors else {}
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+
+        # 完全平方数会让 rho 退化，先直接开方
+        root = math.isqrt(m)
+        if root * root == m:
+            stack.extend((root, root))
+            continue
+
+        d = pollard_brent(m)
+        stack.extend((d, m // d))
+
+    return dict(sorted(factors.items()))
+
+
+def divisors_from_factorization(factors):
+    """
+    由质因数分解结果生成所有因数
+
+    参数:
+        factors: {质因数: 指数} 字典
+
+    返回:
+        升序的因数列表
+    """
+    divisors = [1]
+    for p, exponent in factors.items():
+        divisors = [d * p ** e for d in divisors for e in range(exponent + 1)]
+    return sorted(divisors)
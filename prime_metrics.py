@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段运行指标与性能剖析
+功能：在范围筛选时按段记录结构化指标——墙钟时间按筛选/格式化/写入拆分、
+     每秒检查的候选数、找到的质数、写入队列深度、常驻内存（RSS），
+     逐段以 JSON Lines 写入指标文件，并定期原子地刷新一个 Prometheus textfile 格式的快照
+     （供 node_exporter 的 textfile collector 采集）；还可以按需对每隔若干段的处理过程
+     做 cProfile 采样，结果保存为 pstats 文件
+
+未启用时调用方不创建 RunMetrics，筛选循环中只有一次 None 判断，没有额外开销。
+
+使用示例：
+  python prime_range_finder.py --mode full --metrics run.jsonl --prom /var/lib/node_exporter/prime.prom
+  python prime_range_finder.py --mode full --profile run.prof --profile-every 100
+  python -m pstats run.prof
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = 'prime_finder'
+
+# 指标文件刷新到磁盘、Prometheus 快照重写的最小间隔（秒）
+DEFAULT_SNAPSHOT_INTERVAL = 10.0
+
+# 计时拆分的阶段：sieve 为计算线程等待下一段筛选结果的时间（多进程时即等待工作进程的时间），
+# format / write 为写入器的格式化和写入时间（使用后台写入线程时在写入线程中累计）
+PHASES = ('sieve', 'format', 'write')
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """
+    返回当前进程的常驻内存（字节）
+
+    Linux 上读取 /proc/self/statm（当前值）；其他系统退回到 getrusage 的峰值；都不可用时返回 None
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
+class RunMetrics:
+    """
+    一次范围筛选的分段指标记录器
+
+    用法:
+        with RunMetrics('run.jsonl', prom_path='prime.prom') as metrics:
+            find_primes_in_range(start, end, 'primes.csv', metrics=metrics)
+
+    find_primes_in_range 在开始遍历前调用 start()，每处理完一段调用 segment()，结束时调用 finish()；
+    运行被中断时 close() 会补做 finish()，已记录的指标和剖析结果不会丢失。
+    """
+
+    def __init__(self, jsonl_path=None, prom_path=None, profile_path=None, profile_every=10,
+                 snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        参数:
+            jsonl_path: 逐段指标的 JSON Lines 文件（None表示不写）
+            prom_path: Prometheus textfile 快照文件（None表示不写）
+            profile_path: cProfile 结果文件（None表示不剖析）
+            profile_every: 每隔多少段剖析一段（1表示剖析每一段）
+            snapshot_interval: 指标文件刷新、快照重写的最小间隔（秒）
+        """
+        if profile_every < 1:
+            raise ValueError("profile_every 必须是正整数")
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.profile_path = profile_path
+        self.profile_every = profile_every
+        self.snapshot_interval = snapshot_interval
+
+        self.totals = {'segments': 0, 'candidates': 0, 'primes': 0, 'profiled_segments': 0}
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.last = None
+
+        self._file = open(jsonl_path, 'a', encoding='utf-8') if jsonl_path else None
+        self._profiler = cProfile.Profile() if profile_path else None
+        self._profiling = False
+        self._range = None
+        self._started = None
+        self._segment_started = None
+        self._last_timings = None
+        self._last_snapshot = 0.0
+        self._finished = False
+
+    def start(self, start, end, timings=None):
+        """
+        开始计时（在取第一段之前调用）
+
+        参数:
+            start: 范围起点
+            end: 范围终点
+            timings: 写入器的累计耗时字典（各段的格式化、写入时间按其增量计算）
+        """
+        self._range = (start, end)
+        self._started = self._segment_started = time.perf_counter()
+        self._last_timings = dict(timings) if timings else None
+        self._last_snapshot = time.time()
+        self._set_profiling(True)
+
+    def _set_profiling(self, enabled):
+        """按需打开或关闭 cProfile（只剖析调用 start()/segment() 的线程）"""
+        if self._profiler is None or enabled == self._profiling:
+            return
+        if enabled:
+            self._profiler.enable()
+        else:
+            self._profiler.disable()
+        self._profiling = enabled
+
+    def segment(self, lo, hi, candidates, primes, sieved_at, timings=None, queue_depth=0):
+        """
+        记录处理完的一段
+
+        参数:
+            lo, hi: 段的范围 [lo, hi)
+            candidates: 本段检查的奇数个数
+            primes: 本段找到的质数个数
+            sieved_at: 拿到本段筛选结果时的 time.perf_counter()
+            timings: 写入器的累计耗时字典
+            queue_depth: 后台写入队列中等待的批次数
+        """
+        now = time.perf_counter()
+        elapsed = now - self._segment_started
+        sieve = sieved_at - self._segment_started
+        self._segment_started = now
+
+        format_seconds = write_seconds = 0.0
+        if timings is not None:
+            previous = self._last_timings or {}
+            format_seconds = timings['format'] - previous.get('format', 0.0)
+            write_seconds = timings['write'] - previous.get('write', 0.0)
+            self._last_timings = dict(timings)
+
+        index = self.totals['segments']
+        if self._profiling:
+            self.totals['profiled_segments'] += 1
+
+        totals = self.totals
+        totals['segments'] += 1
+        totals['candidates'] += candidates
+        totals['primes'] += primes
+        self.seconds['sieve'] += sieve
+        self.seconds['format'] += format_seconds
+        self.seconds['write'] += write_seconds
+
+        self.last = {
+            'time': round(time.time(), 3),
+            'segment': index,
+            'lo': lo,
+            'hi': hi,
+            'candidates': candidates,
+            'primes': primes,
+            'seconds': round(elapsed, 6),
+            'sieve_seconds': round(sieve, 6),
+            'format_seconds': round(format_seconds, 6),
+            'write_seconds': round(write_seconds, 6),
+            'candidates_per_second': round(candidates / elapsed) if elapsed > 0 else None,
+            'queue_depth': queue_depth,
+            'rss_bytes': rss_bytes(),
+        }
+        if self._file:
+            self._file.write(json.dumps(self.last) + '\n')
+        if time.time() - self._last_snapshot >= self.snapshot_interval:
+            self._snapshot()
+
+        # 决定下一段是否剖析
+        self._set_profiling((index + 1) % self.profile_every == 0)
+
+    def _snapshot(self):
+        """刷新指标文件并重写 Prometheus 快照"""
+        self._last_snapshot = time.time()
+        if self._file:
+            self._file.flush()
+        if self.prom_path:
+            temp_path = f"{self.prom_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            # 原子替换，采集器不会读到写了一半的文件
+            os.replace(temp_path, self.prom_path)
+
+    def prometheus_text(self):
+        """
+        生成 Prometheus 文本格式的当前快照
+
+        返回:
+            字符串
+        """
+        totals = self.totals
+        last = self.last or {}
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        start, end = self._range or (0, 0)
+        position = last.get('hi', start)
+
+        metrics = [
+            ('segments_total', 'counter', '已处理的段数', [('', totals['segments'])]),
+            ('candidates_total', 'counter', '已检查的奇数个数', [('', totals['candidates'])]),
+            ('primes_total', 'counter', '已找到的质数个数', [('', totals['primes'])]),
+            ('phase_seconds_total', 'counter', '各阶段累计耗时（秒）',
+             [(f'{{phase="{phase}"}}', round(self.seconds[phase], 6)) for phase in PHASES]),
+            ('elapsed_seconds', 'gauge', '本次运行的墙钟时间（秒）', [('', round(elapsed, 3))]),
+            ('candidates_per_second', 'gauge', '最近一段每秒检查的奇数个数',
+             [('', last.get('candidates_per_second') or 0)]),
+            ('writer_queue_depth', 'gauge', '后台写入队列中等待的批次数', [('', last.get('queue_depth', 0))]),
+            ('rss_bytes', 'gauge', '计算进程的常驻内存（字节）', [('', last.get('rss_bytes') or 0)]),
+            ('position', 'gauge', '已处理到的位置（不包含）', [('', position)]),
+            ('progress_ratio', 'gauge', '范围内已处理的比例',
+             [('', round((position - start) / (end + 1 - start), 9) if end >= start else 1)]),
+            ('last_update_timestamp_seconds', 'gauge', '快照的生成时间', [('', round(time.time(), 3))]),
+        ]
+
+        lines = []
+        for name, kind, help_text, samples in metrics:
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            lines.extend(f"{full_name}{labels} {value}" for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+    def finish(self, timings=None):
+        """
+        运行结束：停止剖析，写出最终快照和剖析结果
+
+        参数:
+            timings: 写入器关闭后的累计耗时字典（最后一段之后的写入计入总计）
+        """
+        if self._finished or self._started is None:
+            return
+        self._finished = True
+        self._set_profiling(False)
+        if timings is not None:
+            previous = self._last_timings or {}
+            for phase in ('format', 'write'):
+                self.seconds[phase] += timings[phase] - previous.get(phase, 0.0)
+        self._snapshot()
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.profile_path)
+
+    def close(self):
+        self.finish()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询规划器
+功能：按请求的形状选出预计最快的执行方式，find_primes_in_range 和 prime_checker.is_prime 都经过这里：
+     - 范围查询：很窄的范围逐个做素性测试；稠密的宽范围用分段筛法（python / numpy / bucket 后端）；
+       极高处的窄窗口只用小质数预筛，余下的候选再做概率素性测试（不必生成 sqrt(end) 以内的基础质数）
+     - 单个数：已载入的质数表或质数位图覆盖时直接查表，否则做素性测试（试除 / Miller-Rabin / BPSW）
+     每种方式的耗时由一个简单的代价模型估算，各项系数（纳秒）都可以覆盖（costs 参数或命令行 --cost 名称=值），
+     explain() 列出全部候选方式的估计耗时
+
+使用示例：
+    from prime_planner import plan_range
+    print(plan_range(10**30, 10**30 + 10**5).explain())
+    plan_range(10**12, 2 * 10**12 - 1, costs={'sieve_numpy': 5}).engine     # 'sieve'
+"""
+
+import math
+import unicodedata
+from bisect import bisect_left
+
+from prime_primality import _BASES_64, _BASES_LARGE, _BASES_LARGE_LIMIT, _TRIAL_LIMIT, SMALL_PRIMES
+from prime_primality import is_prime
+from prime_table import prime_table, primes_up_to, table_limit, table_loaded
+
+# 范围查询用到的筛法引擎（和 NumPy）在第一次做范围规划时才导入，
+# 只判断单个数的程序（prime_checker）不必载入它们
+
+
+# 代价模型的默认系数（纳秒，在 10^12 附近的单核机器上实测拟合）
+DEFAULT_COSTS = {
+    # 素性测试
+    'call': 1500,            # 每个候选调用一次 is_prime（含循环开销，以及试除到第一个小因子为止）
+    'trial': 3000,           # 没有小因子的候选试除全部 SMALL_PRIMES
+    'mr_round': 13000,       # 64 位整数的一轮 Miller-Rabin（按位数的平方增长，40 位以下按 40 位计）
+    'lucas': 3,              # 强 Lucas 测试相当于几轮 Miller-Rabin
+    # 分段筛法
+    'sieve_python': 100,     # 纯 Python 后端每个奇数
+    'sieve_numpy': 22,       # NumPy 后端每个奇数
+    'base_python': 700,      # 纯 Python 后端每段遍历一个基础质数
+    'base_numpy': 80,        # NumPy 后端每段遍历一个基础质数
+    'segment': 20000,        # 分段筛法每段的固定开销
+    'bucket': 30,            # 桶筛法每个奇数（40 位以内）
+    'bucket_bit': 1.2,       # 超过 40 位时每多一位，桶筛法每个奇数增加的耗时
+    'bucket_insert': 40,     # 桶筛法建桶时每个大基础质数
+    'bucket_generate': 6,    # 桶筛法分段生成基础质数，sqrt(end) 以内每个整数
+    'base_generate': 30,     # 基础质数超出质数表时现场筛出，sqrt(end) 以内每个整数
+    'table_load': 5e7,       # 第一次载入共享质数表
+    'pool_start': 1e8,       # 启动一个工作进程
+    # 单点查询
+    'table_lookup': 2000,    # 在已载入的质数表中二分查找
+    'bitmap_lookup': 3000,   # 在质数位图中做一次位测试
+}
+
+# 范围查询中预筛引擎尝试的小质数上界（2 表示不预筛，逐个测试）
+PRESIEVE_LIMITS = (1 << 8, 1 << 10, 1 << 12, 1 << 14, 1 << 16)
+
+# 分段筛法只能输出小于该值的质数（PrimeChunk 是 array('Q')）
+_SIEVE_LIMIT = 1 << 64
+
+# 预筛后余下的奇数比例（按上界缓存）
+_survivors = {}
+
+
+def parse_costs(items):
+    """
+    解析命令行的代价系数覆盖项
+
+    参数:
+        items: 形如 '名称=值' 的字符串序列（None 表示没有覆盖）
+
+    返回:
+        {名称: 浮点数} 字典
+
+    异常:
+        ValueError: 格式错误或名称未知
+    """
+    costs = {}
+    for item in items or ():
+        name, sep, value = item.partition('=')
+        name = name.strip()
+        if not sep or name not in DEFAULT_COSTS:
+            raise ValueError(f"未知的代价系数: {item}（可用: {', '.join(DEFAULT_COSTS)}）")
+        costs[name] = float(value)
+    return costs
+
+
+def _cost_model(costs):
+    """默认系数加上覆盖项"""
+    if not costs:
+        return DEFAULT_COSTS
+    unknown = set(costs) - set(DEFAULT_COSTS)
+    if unknown:
+        raise ValueError(f"未知的代价系数: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_COSTS, **costs}
+
+
+def survivor_fraction(limit):
+    """奇数中没有不超过 limit 的奇质因数的比例 Π(1 - 1/p)（3 ≤ p ≤ limit）"""
+    fraction = _survivors.get(limit)
+    if fraction is None:
+        fraction = 1.0
+        for p in primes_up_to(limit)[1:]:
+            fraction *= 1 - 1 / p
+        _survivors[limit] = fraction
+    return fraction
+
+
+def _prime_count_estimate(x):
+    """π(x) 的粗略估计 x / (ln x - 1)"""
+    return x / (math.log(x) - 1) if x > 10 else 4
+
+
+def _test_cost(n, survivors, costs):
+    """
+    对 n 附近一个没有小因子的候选做素性测试的期望耗时（纳秒）：合数通常第一轮就被排除，
+    质数要做完全部轮次；候选中质数的比例约为 (2 / ln n) / survivors
+    """
+    if n < _TRIAL_LIMIT:
+        return costs['trial']
+    if n < 2 ** 64:
+        rounds = len(_BASES_64)
+    elif n < _BASES_LARGE_LIMIT:
+        rounds = len(_BASES_LARGE)
+    else:
+        rounds = 1 + costs['lucas']
+    round_cost = costs['mr_round'] * max(0.625, n.bit_length() / 64) ** 2
+    prime_share = min(1.0, 2 / math.log(n) / survivors)
+    return costs['trial'] + round_cost * (1 + prime_share * (rounds - 1))
+
+
+class Plan:
+    """
+    一次查询的执行计划
+
+    属性:
+        kind: 'range' 或 'point'
+        engine: 范围查询为 'direct'、'presieve' 或 'sieve'；单点查询为 'bitmap'、'table' 或 'test'
+        backend: 分段筛法的后端（其他引擎为 None）
+        presieve: 预筛引擎的小质数上界（其他引擎为 None）
+        seconds: 所选方式的估计耗时（秒）
+        candidates: 全部候选方式 [(说明, 估计耗时(秒), engine, backend, presieve)]，按耗时升序
+        start, end: 范围查询的范围（单点查询时都等于该数）
+        workers, segment_bytes: 执行范围查询时使用的进程数和每段字节数
+        forced: 是否由调用方指定了后端（不按代价选择）
+    """
+
+    def __init__(self, kind, start, end, candidates, choice, workers=1, segment_bytes=None, forced=False):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.candidates = sorted(candidates, key=lambda c: c[1])
+        self.label, self.seconds, self.engine, self.backend, self.presieve = choice
+        self.workers = workers
+        self.segment_bytes = segment_bytes
+        self.forced = forced
+
+    def explain(self):
+        """返回可读的规划说明：请求的形状、各候选方式的估计耗时和最终选择"""
+        if self.kind == 'point':
+            lines = [f"查询规划: 判断 {self.start:,} 是否为质数（{self.start.bit_length()} 位）"]
+        else:
+            width = self.end - self.start + 1 if self.end >= self.start else 0
+            height = max(self.end, 2)
+            lines = [f"查询规划: [{self.start:,}, {self.end:,}]",
+                     f"  宽度 {width:,} 个整数，高度约 2^{height.bit_length()}，"
+                     f"sqrt(end) ≈ {math.isqrt(height):,}，进程数 {self.workers}"]
+        lines.append("  候选方式（估计耗时）:")
+        width = max(_display_width(c[0]) for c in self.candidates)
+        for label, seconds, *_ in self.candidates:
+            mark = '*' if label == self.label else ' '
+            padding = ' ' * (width - _display_width(label))
+            lines.append(f"  {mark} {label}{padding}  {_format_seconds(seconds)}")
+        reason = "由调用方指定" if self.forced else "估计耗时最短"
+        lines.append(f"  选择: {self.label}（{reason}）")
+        return '\n'.join(lines)
+
+
+def _display_width(text):
+    """终端显示宽度（全角字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+
+
+def _format_seconds(seconds):
+    """把秒数格式化为紧凑的耗时"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} 微秒"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} 毫秒"
+    if seconds < 3600:
+        return f"{seconds:.1f} 秒"
+    return f"{seconds / 3600:.1f} 小时"
+
+
+def _sieve_seconds(backend, start, end, odds, workers, segment_bytes, costs):
+    """分段筛法的估计耗时（秒）"""
+    from prime_sieve import DEFAULT_BUCKET_WINDOW_BYTES, segment_span
+    root = math.isqrt(end)
+    base_count = _prime_count_estimate(root)
+    pool = costs['pool_start'] * workers if workers > 1 else 0
+
+    if backend == 'bucket':
+        if workers > 1:
+            tasks = math.ceil(2 * odds / segment_span(end, workers, segment_bytes, backend))
+            setup = costs['bucket_generate'] * root / workers + costs['bucket_insert'] * base_count * tasks / workers
+        else:
+            setup = costs['bucket_generate'] * root + costs['bucket_insert'] * base_count
+        windows = math.ceil(odds / max(segment_bytes, DEFAULT_BUCKET_WINDOW_BYTES))
+        per_odd = costs['bucket'] + costs['bucket_bit'] * max(0, end.bit_length() - 40)
+        return (pool + setup + (windows * costs['segment'] + odds * per_odd) / workers) / 1e9
+
+    if root <= table_limit():
+        setup = 0 if table_loaded() else costs['table_load']
+    else:
+        setup = costs['base_generate'] * root
+    segments = math.ceil(odds / segment_bytes)
+    work = odds * costs['sieve_' + backend] + segments * (costs['segment'] + base_count * costs['base_' + backend])
+    return (pool + setup + work / workers) / 1e9
+
+
+def _presieve_seconds(limit, end, odds, segment_bytes, costs):
+    """只预筛到 limit、余下候选逐个测试的估计耗时（秒）；limit 为 2 时不预筛"""
+    if limit <= 2:
+        survivors = survivor_fraction(SMALL_PRIMES[-1])
+        per_odd = costs['call'] + survivors * _test_cost(end, survivors, costs)
+        return odds * per_odd / 1e9
+    setup = 0 if table_loaded() or limit > table_limit() else costs['table_load']
+    segments = math.ceil(odds / segment_bytes)
+    survivors = survivor_fraction(limit)
+    per_odd = costs['sieve_python'] + survivors * (costs['call'] + _test_cost(end, survivors, costs))
+    return (setup + segments * len(primes_up_to(limit)) * costs['base_python'] + odds * per_odd) / 1e9
+
+
+def plan_range(start, end, workers=1, segment_bytes=None, backend=None, costs=None):
+    """
+    为范围查询 [start, end] 选择执行方式
+
+    候选方式：逐个素性测试；预筛到 PRESIEVE_LIMITS 中各上界后再测试（上界须小于 sqrt(end)）；
+    各个可用后端的分段筛法（终点须小于 2^64）。分段筛法按 workers 个进程估算，
+    其余方式在当前进程中执行。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        workers: 并行进程数
+        segment_bytes: 每段的字节数（每字节对应一个奇数；None表示 prime_sieve.DEFAULT_SEGMENT_BYTES）
+        backend: 指定筛选后端时不按代价选择，直接使用该后端的分段筛法（None表示按代价选择）
+        costs: 覆盖 DEFAULT_COSTS 中部分系数的字典（纳秒）
+
+    返回:
+        Plan
+    """
+    from prime_sieve import BACKENDS, DEFAULT_SEGMENT_BYTES
+
+    costs = _cost_model(costs)
+    if segment_bytes is None:
+        segment_bytes = DEFAULT_SEGMENT_BYTES
+    end = max(end, 2)
+    odds = max((end - max(start, 1)) // 2 + 1, 1)
+    root = math.isqrt(end)
+
+    candidates = [("逐个素性测试", _presieve_seconds(2, end, odds, segment_bytes, costs), 'direct', None, 2)]
+    for limit in PRESIEVE_LIMITS:
+        if limit < root:
+            candidates.append((f"预筛到 {limit:,} + 素性测试", _presieve_seconds(limit, end, odds, segment_bytes, costs),
+                               'presieve', None, limit))
+    if end < _SIEVE_LIMIT:
+        for name in BACKENDS:
+            label = f"分段筛法（{name} 后端）"
+            candidates.append((label, _sieve_seconds(name, start, end, odds, workers, segment_bytes, costs),
+                               'sieve', name, None))
+
+    if backend is not None:
+        if end >= _SIEVE_LIMIT:
+            raise ValueError("分段筛法只支持小于 2^64 的范围")
+        choices = [c for c in candidates if c[2] == 'sieve' and c[3] == backend]
+        if not choices:
+            raise ValueError(f"不可用的筛选后端: {backend}")
+        choice = choices[0]
+        return Plan('range', start, end, candidates, choice, workers, segment_bytes, forced=True)
+    choice = min(candidates, key=lambda c: c[1])
+    return Plan('range', start, end, candidates, choice, workers, segment_bytes)
+
+
+class _PrimeList(list):
+    """2^64 以上的一块升序质数（list），与 PrimeChunk 一样记录覆盖的范围 [lo, hi)"""
+
+    def __init__(self, primes, lo, hi):
+        super().__init__(primes)
+        self.lo = lo
+        self.hi = hi
+
+
+def iter_planned_chunks(plan, start, end):
+    """
+    按计划惰性生成 [start, end] 内的质数块（续传时 start 可以在计划的范围之内）
+
+    参数:
+        plan: plan_range 返回的 Plan
+        start: 起始值（包含）
+        end: 结束值（包含）
+
+    生成:
+        与 prime_sieve.iter_prime_chunks 相同的质数块（有 lo / hi 属性，首尾相接、按升序排列）
+    """
+    from prime_search import iter_presieved_segments
+    from prime_sieve import PrimeChunk, iter_prime_chunks
+
+    if plan.engine == 'sieve':
+        yield from iter_prime_chunks(start, end, plan.workers, plan.segment_bytes, plan.backend)
+        return
+    for lo, hi, primes in iter_presieved_segments(start, end, plan.presieve, plan.segment_bytes):
+        yield PrimeChunk(primes, lo, hi) if hi <= _SIEVE_LIMIT else _PrimeList(primes, lo, hi)
+
+
+def plan_point(n, bitmap=None, costs=None):
+    """
+    为单个数的素性判断选择执行方式：质数位图覆盖 n 时查位图，n 不超过已载入的质数表时查表，
+    否则做素性测试（试除 / 确定性 Miller-Rabin / BPSW）；查表方式只在已经可用时才参与比较
+
+    参数:
+        n: 待判断的整数
+        bitmap: 已打开的 prime_bitmap.PrimeBitmap（None表示没有）
+        costs: 覆盖 DEFAULT_COSTS 中部分系数的字典（纳秒）
+
+    返回:
+        Plan
+    """
+    costs = _cost_model(costs)
+    if n < _TRIAL_LIMIT:
+        label = "试除"
+    elif n < 2 ** 64:
+        label = f"确定性 Miller-Rabin（{len(_BASES_64)} 个底数）"
+    elif n < _BASES_LARGE_LIMIT:
+        label = f"确定性 Miller-Rabin（{len(_BASES_LARGE)} 个底数）"
+    else:
+        label = "Baillie-PSW"
+    survivors = survivor_fraction(SMALL_PRIMES[-1])
+    test = costs['call'] + survivors * _test_cost(max(n, 2), survivors, costs)
+    candidates = [(label, test / 1e9, 'test', None, None)]
+    if bitmap is not None and bitmap.covers(n):
+        candidates.append(("查质数位图", costs['bitmap_lookup'] / 1e9, 'bitmap', None, None))
+    if table_loaded() and n <= table_limit():
+        candidates.append(("查质数表", costs['table_lookup'] / 1e9, 'table', None, None))
+    return Plan('point', n, n, candidates, min(candidates, key=lambda c: c[1]))
+
+
+def check_prime(n, bitmap=None, costs=None):
+    """
+    按 plan_point 选出的方式判断 n 是否为质数（没有可用的表时直接做素性测试，不做规划）
+
+    参数:
+        n: 待判断的整数
+        bitmap: 已打开的 prime_bitmap.PrimeBitmap（None表示没有）
+        costs: 覆盖 DEFAULT_COSTS 中部分系数的字典（纳秒）
+
+    返回:
+        True / False
+    """
+    if not (bitmap is not None and bitmap.covers(n)) and not (table_loaded() and n <= table_limit()):
+        return is_prime(n)
+    engine = plan_point(n, bitmap, costs).engine
+    if engine == 'bitmap':
+        return bitmap.is_prime(n)
+    if engine == 'table':
+        table = prime_table()
+        i = bisect_left(table, n)
+        return i < len(table) and table[i] == n
+    return is_prime(n)
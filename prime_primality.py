@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+质数判断（素性测试）公共模块
+功能：确定性 Miller-Rabin（n < 3.3×10^24 时结果严格正确），
+     更大的数使用 Baillie-PSW 测试，任意大小的整数都能在微秒到毫秒级给出结果
+"""
+
+import math
+
+
+# 先用小质数试除，能快速排除绝大多数合数
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+# 小于该值时，通过小质数试除即可确定是质数（最小的未试除质数是53）
+_TRIAL_LIMIT = 53 * 53
+
+# n < 2^64 时使用这7个底数即可保证结果正确（Jim Sinclair）
+_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+# n < 3,317,044,064,679,887,385,961,981 时使用前13个质数作为底数即可保证结果正确
+_BASES_LARGE_LIMIT = 3317044064679887385961981
+_BASES_LARGE = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def miller_rabin(n, bases):
+    """
+    对奇数 n 做强伪素数测试（Miller-Rabin）
+
+    参数:
+        n: 待测试的奇数（n > 2）
+        bases: 测试使用的底数序列
+
+    返回:
+        True: 对所有底数都是强可能质数
+        False: 一定是合数
+    """
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in bases:
+        a %= n
+        if a == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def jacobi(a, n):
+    """
+    计算雅可比符号 (a/n)，n 为正奇数
+
+    返回:
+        -1、0 或 1
+    """
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def strong_lucas(n):
+    """
+    强 Lucas 可能质数测试（Selfridge 方法 A 选取参数 D, P=1, Q）
+
+    参数:
+        n: 待测试的奇数，且不是完全平方数
+
+    返回:
+        True: 是强 Lucas 可能质数
+        False: 一定是合数
+    """
+    # 依次尝试 D = 5, -7, 9, -11, ...，直到 (D/n) = -1
+    D = 5
+    while True:
+        j = jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+
+    # n + 1 = d × 2^s
+    d = n + 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def half(x):
+        # 模 n 意义下除以2
+        return (x if x % 2 == 0 else x + n) // 2 % n
+
+    # 从 k = 1 开始按 d 的二进制位计算 U_d, V_d（P = 1）
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            U, V = half(U + V), half(D * U + V)
+            Qk = Qk * Q % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+
+def is_prime(n):
+    """
+    判断一个数是否为质数
+
+    n < 3.3×10^24 时使用确定性 Miller-Rabin，结果严格正确；
+    更大的数使用 Baillie-PSW（底数2的 Miller-Rabin + 强 Lucas 测试），
+    至今没有已知的反例。
+
+    参数:
+        n: 待判断的整数
+
+    返回:
+        True: 是质数
+        False: 不是质数
+    """
+    if n < 2:
+        return False
+
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < _TRIAL_LIMIT:
+        return True
+
+    if n < 2 ** 64:
+        return miller_rabin(n, _BASES_64)
+    if n < _BASES_LARGE_LIMIT:
+        return miller_rabin(n, _BASES_LARGE)
+
+    # Baillie-PSW
+    if not miller_rabin(n, (2,)):
+        return False
+    if math.isqrt(n) ** 2 == n:
+        return False
+    return strong_lucas(n)
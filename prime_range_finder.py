@@ -8,72 +8,128 @@
 """
 
 import csv
+import gzip
+import io
+import json
+import lzma
 import math
+import os
 import time
 import argparse
 from datetime import datetime
 
+from prime_analytics import DEFAULT_MODULI, PrimeAnalytics, default_reducers
+from prime_counting import count_primes_in_range, prime_pi_error_bound, riemann_r
+from prime_metrics import RunMetrics
+from prime_planner import iter_planned_chunks, parse_costs, plan_range
+from prime_primality import is_prime  # 保留 prime_range_finder.is_prime 供外部调用
+from prime_search import primes_after
+from prime_store import DEFAULT_BLOCK_SIZE, HEADER, INDEX_RECORD, encode_gaps
+from prime_sieve import BACKENDS, DEFAULT_SEGMENT_BYTES, default_backend, iter_prime_chunks, segment_span
+from prime_writer import COMPRESSIONS, GZIP_LEVEL, LZMA_PRESET, open_prime_writer
 
-def is_prime(n):
+
+def load_checkpoint(checkpoint_file):
     """
-    高效的质数判断算法（Miller-Rabin素性测试的简化版本）
+    读取检查点日志
 
     参数:
-        n: 待判断的正整数
+        checkpoint_file: 检查点文件路径
 
     返回:
-        True: 是质数
-        False: 不是质数
+        检查点字典；文件不存在时返回 None
     """
-    # 处理小于2的情况
-    if n < 2:
-        return False
-
-    # 处理2和3
-    if n == 2 or n == 3:
-        return True
+    if not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-    # 排除偶数
-    if n % 2 == 0:
-        return False
 
-    # 排除3的倍数
-    if n % 3 == 0:
-        return False
-
-    # 6k±1优化：所有质数都可以表示为6k±1的形式（除了2和3）
-    # 只需检查到sqrt(n)
-    sqrt_n = int(math.sqrt(n))
+def save_checkpoint(checkpoint_file, state):
+    """
+    原子地写入检查点日志（先写临时文件并落盘，再整体替换）
 
-    # 从5开始，按6k±1的形式检查
-    i = 5
-    while i <= sqrt_n:
-        if n % i == 0 or n % (i + 2) == 0:
-            return False
-        i += 6
+    参数:
+        checkpoint_file: 检查点文件路径
+        state: 检查点字典
+    """
+    temp_file = checkpoint_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, checkpoint_file)
+
+
+def find_primes_in_range(start, end, output_file, max_primes=None, batch_size=10000, progress_interval=10000000,
+                         segment_bytes=DEFAULT_SEGMENT_BYTES, workers=1,
+                         checkpoint_file=None, resume=False, checkpoint_interval=60, output_format='csv',
+                         backend=None, compression=None, writer_queue=16, metrics=None, plan=None, costs=None,
+                         analytics=None):
+    """
+    在指定范围内查找所有质数并写入CSV文件或二进制质数文件，或只做流式统计
 
-    return True
+    给出 analytics 时，每段质数生成后立即交给统计归约器（间隔、质数组、剩余类等）；
+    output_file 为 None 时不保存任何质数，只得到统计结果，检查点中同时记录统计状态。
 
-
-def find_primes_in_range(start, end, output_file, max_primes=None, batch_size=10000, progress_interval=10000000):
-    """
-    在指定范围内查找所有质数并写入CSV文件
+    执行方式由查询规划器（prime_planner.plan_range）按范围的高度和宽度选择：
+    很窄的范围逐个做素性测试，稠密的宽范围用分段筛法，极高处的窄窗口先预筛再做素性测试。
 
     参数:
         start: 起始值（包含）
         end: 结束值（包含）
-        output_file: 输出CSV文件路径
+        output_file: 输出文件路径（None表示不输出质数，只做统计）
         max_primes: 最大质数数量限制（None表示无限制）
         batch_size: 批量写入的大小（减少I/O操作）
-        progress_interval: 进度报告间隔
+        progress_interval: 进度报告间隔（按检查的奇数个数计）
+        segment_bytes: 分段筛法每段的字节数（每字节对应一个奇数）
+        workers: 并行筛选的进程数（1表示单进程）
+        checkpoint_file: 检查点日志路径（None表示不记录检查点）
+        resume: 是否从检查点继续（截掉检查点之后的残缺内容，以追加模式续写）
+        checkpoint_interval: 写检查点的最小间隔（秒）
+        output_format: 输出格式，'csv'（序号,质数）或 'bin'（间隔编码的二进制质数文件，见 prime_store）
+        backend: 筛选后端，'python'、'numpy' 或 'bucket'（指定时总是使用该后端的分段筛法；None表示由规划器选择）
+        compression: CSV 的压缩方式，None、'gzip' 或 'lzma'
+        writer_queue: 后台写入线程的队列长度（按批次计，限制内存占用）；0 表示在计算线程中直接写入
+        metrics: 分段指标记录器 prime_metrics.RunMetrics（None表示不记录）
+        plan: 预先做好的执行计划 prime_planner.Plan（None表示现场规划）
+        costs: 覆盖规划器代价模型部分系数的字典（见 prime_planner.DEFAULT_COSTS）
+        analytics: 流式统计状态 prime_analytics.PrimeAnalytics（None表示不统计）；
+                   续传时用检查点中的状态替换它的内容
     """
+    if plan is None:
+        plan = plan_range(start, end, workers, segment_bytes, backend, costs)
+    # 读取检查点，确定从哪里继续
+    checkpoint = None
+    if resume:
+        if not checkpoint_file:
+            raise ValueError("断点续传需要指定检查点文件")
+        checkpoint = load_checkpoint(checkpoint_file)
+        if checkpoint is None:
+            raise FileNotFoundError(f"找不到检查点文件: {checkpoint_file}")
+        if (checkpoint['start'] != start or checkpoint['end'] != end or checkpoint['output_file'] != output_file
+                or checkpoint.get('output_format', 'csv') != output_format
+                or checkpoint.get('compression') != compression):
+            raise ValueError("检查点记录的范围或输出文件与本次运行不一致，无法续传")
+        if (analytics is not None) != ('analytics' in checkpoint):
+            raise ValueError("检查点的统计状态与本次运行不一致，无法续传")
+
     print("=" * 70)
     print("大范围质数遍历程序")
     print("=" * 70)
     print(f"起始值: {start:,}")
     print(f"结束值: {end:,}")
     print(f"范围大小: {end - start + 1:,} 个数字")
-    print(f"输出文件: {output_file}")
+    print(f"输出文件: {output_file or '无（只做统计）'}")
+    if output_file is None:
+        pass
+    elif output_format == 'bin':
+        print(f"输出格式: 二进制间隔编码（可用 prime_store.py 转换为CSV）")
+    elif compression:
+        print(f"输出格式: {compression} 压缩的CSV")
+    print(f"执行方式: {plan.label}")
+    if workers > 1:
+        print(f"并行进程数: {workers}")
     if max_primes:
         print(f"质数数量限制: {max_primes} 个")
     else:
@@ -81,65 +137,139 @@ def find_primes_in_range(start, end, output_file, max_primes=None, batch_size=10
     print("=" * 70)
     print()
 
-    # 确保起始值是奇数（偶数除了2都不是质数）
-    if start % 2 == 0:
-        start += 1
-
-    prime_count = 0
-    checked_count = 0
+    if checkpoint:
+        position = checkpoint['position']
+        prime_count = checkpoint['prime_count']
+        checked_count = checkpoint['checked_count']
+        print(f"从检查点继续: 下一个数字 {position:,}，已找到质数 {prime_count:,} 个")
+        if analytics is not None:
+            analytics.load(checkpoint['analytics'])
+        print()
+    else:
+        position = start
+        prime_count = 0
+        checked_count = 0
     batch = []
 
     start_time = time.time()
     last_progress_time = start_time
+    last_progress_count = checked_count
+    last_checkpoint_time = start_time
 
-    # 打开CSV文件准备写入
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
-
-        # 写入标题行
-        csv_writer.writerow(['序号', '质数'])
+    def write_checkpoint():
+        """把已缓冲的质数全部写入并落盘，然后记录检查点"""
+        nonlocal batch
+        if batch:
+            writer.write(batch)
+        batch = []
+        offset, index_offset = writer.sync()
+        state = {
+            'start': start,
+            'end': end,
+            'output_file': output_file,
+            'output_format': output_format,
+            'compression': compression,
+            'position': position,
+            'prime_count': prime_count,
+            'checked_count': checked_count,
+            'offset': offset,
+            'index_offset': index_offset,
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if analytics is not None:
+            state['analytics'] = analytics.to_dict()
+        save_checkpoint(checkpoint_file, state)
+
+    # 续传时截掉最后一个检查点之后可能残缺的内容，再以追加模式续写
+    # 格式化、压缩和磁盘写入都在后台写入线程中进行，计算线程只交出整批质数
+    resume_offsets = (checkpoint['offset'], checkpoint['index_offset']) if checkpoint else None
+    output = open_prime_writer(output_file, output_format, compression, prime_count + 1, resume_offsets,
+                               writer_queue)
+
+    with output as writer:
+        if not checkpoint and checkpoint_file:
+            write_checkpoint()
+
+        # 已经达到质数数量限制的检查点无需继续
+        if max_primes and prime_count >= max_primes:
+            position = end + 1
 
         print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"正在遍历质数...\n")
 
-        # 遍历范围内的所有奇数
-        for num in range(start, end + 1, 2):
-            checked_count += 1
+        # 按计划逐段生成质数：分段筛法每次筛出一整段，多进程时各段并行筛选，但仍按升序取回，保证序号连续
+        chunks = iter_planned_chunks(plan, position, end)
+        if metrics is not None:
+            metrics.start(start, end, writer.timings)
+
+        for primes in chunks:
+            if metrics is not None:
+                sieved_at = time.perf_counter()
+            seg_lo, seg_hi = primes.lo, primes.hi
+            segment_checked = checked_count
+            # 检查是否达到质数数量限制，只保留需要的部分
+            reached_limit = max_primes and prime_count + len(primes) >= max_primes
+            if reached_limit:
+                primes = primes[:max_primes - prime_count]
+                # 只统计到最后一个质数为止检查过的奇数
+                checked_count += (primes[-1] - seg_lo) // 2 + 1 if primes else 0
+            else:
+                checked_count += (seg_hi - seg_lo + 1) // 2
+
+            if analytics is not None:
+                analytics.update(primes, seg_lo, primes[-1] + 1 if reached_limit and primes else seg_hi)
+
+            # 攒够一批再交给写入线程（交出后换一个新列表，不与写入线程共享）
+            if output_file is not None:
+                batch.extend(primes)
+                if len(batch) >= batch_size:
+                    writer.write(batch)
+                    batch = []
 
-            # 检查是否为质数
-            if is_prime(num):
-                prime_count += 1
-                batch.append([prime_count, num])
+            prime_count += len(primes)
+            position = primes[-1] + 1 if reached_limit and primes else seg_hi
 
-                # 批量写入，减少I/O操作
-                if len(batch) >= batch_size:
-                    csv_writer.writerows(batch)
-                    batch.clear()
+            if metrics is not None:
+                metrics.segment(seg_lo, position, checked_count - segment_checked, len(primes), sieved_at,
+                                writer.timings, getattr(writer, 'queue_depth', 0))
+
+            if reached_limit:
+                print(f"\n已找到 {max_primes} 个质数，达到限制，停止遍历")
+                break
 
-                # 检查是否达到质数数量限制
-                if max_primes and prime_count >= max_primes:
-                    print(f"\n已找到 {max_primes} 个质数，达到限制，停止遍历")
-                    break
+            # 定期记录检查点（只在整段处理完之后记录，保证位置与文件内容一致）
+            if checkpoint_file and time.time() - last_checkpoint_time >= checkpoint_interval:
+                write_checkpoint()
+                last_checkpoint_time = time.time()
 
-            # 定期显示进度
-            if checked_count % progress_interval == 0:
-                elapsed_time = time.time() - start_time
+            # 定期显示进度（每跨过一个 progress_interval 报告一次）
+            if checked_count // progress_interval > last_progress_count // progress_interval:
                 current_time = time.time()
+                elapsed_time = current_time - start_time
                 interval_time = current_time - last_progress_time
                 last_progress_time = current_time
 
-                progress = (num - start) / (end - start) * 100
-                speed = progress_interval / interval_time if interval_time > 0 else 0
+                progress = (seg_hi - 1 - start) / (end - start) * 100 if end > start else 100.0
+                speed = (checked_count - last_progress_count) / interval_time if interval_time > 0 else 0
+                last_progress_count = checked_count
 
                 print(f"进度: {progress:.2f}% | "
-                      f"当前数字: {num:,} | "
+                      f"当前数字: {seg_hi - 1:,} | "
                       f"已找到质数: {prime_count:,} | "
                       f"速度: {speed:,.0f} 个/秒 | "
                       f"耗时: {elapsed_time:.1f}秒")
 
+        # 提前停止时及时关闭进程池
+        chunks.close()
+
         # 写入剩余的质数
-        if batch:
-            csv_writer.writerows(batch)
+        if checkpoint_file:
+            write_checkpoint()
+        elif batch:
+            writer.write(batch)
+
+    if metrics is not None:
+        metrics.finish(writer.timings)
 
     # 计算总耗时
     total_time = time.time() - start_time
@@ -151,58 +281,240 @@ def find_primes_in_range(start, end, output_file, max_primes=None, batch_size=10
     print(f"总耗时: {total_time:.2f} 秒 ({total_time/3600:.2f} 小时)")
     print(f"检查数字总数: {checked_count:,}")
     print(f"找到质数总数: {prime_count:,}")
-    print(f"平均速度: {checked_count/total_time:,.0f} 个/秒")
-    print(f"质数密度: {prime_count/checked_count*100:.4f}%")
-    print(f"结果已保存到: {output_file}")
+    print(f"平均速度: {checked_count/total_time if total_time > 0 else 0:,.0f} 个/秒")
+    print(f"质数密度: {prime_count/checked_count*100 if checked_count else 0:.4f}%")
+    if output_file is not None:
+        print(f"结果已保存到: {output_file}")
+    if analytics is not None:
+        print("-" * 70)
+        print(analytics.report())
     print("=" * 70)
 
 
-def estimate_time_and_space(mode, start, end):
+def find_first_primes(start, end, count, output_file=None, output_format='csv', compression=None):
+    """
+    直接定位 [start, end] 内最小的 count 个质数（只筛 start 附近的小窗口，不扫描整个范围）
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        count: 质数个数
+        output_file: 输出文件路径（None表示不写文件）
+        output_format: 输出格式，'csv' 或 'bin'
+        compression: CSV 的压缩方式（None、'gzip'、'lzma'）
+
+    返回:
+        升序的质数列表（范围内不足 count 个时返回全部）
+    """
+    primes = [p for p in primes_after(start - 1, count) if p <= end]
+    if output_file:
+        with open_prime_writer(output_file, output_format, compression, max_queue=0) as writer:
+            writer.write(primes)
+    return primes
+
+
+def calibrate_speed(start, end, backend=None, workers=1, output_format='csv',
+                    segment_bytes=DEFAULT_SEGMENT_BYTES, groups=4, compression=None):
     """
-    估算运行时间和磁盘空间
+    在目标量级上实际运行一小段筛选（包括输出格式化，不写磁盘），测量吞吐量
+
+    第一组段包含基础质数表计算和进程池启动等一次性开销，单独记为准备时间；
+    其余每组（workers 个段）各测一次速度，取最快和最慢作为速度区间。
+
+    参数:
+        start: 目标范围起始值
+        end: 目标范围结束值
+        backend: 筛选后端（None表示自动选择）
+        workers: 并行进程数
+        output_format: 输出格式 (csv/bin)
+        segment_bytes: 每段的字节数
+        groups: 测量的组数（不含第一组）
+        compression: CSV 的压缩方式；给出时顺便压缩样本输出，测量压缩率
+
+    返回:
+        字典 {setup: 准备时间(秒), rate: 平均速度, rate_low: 最慢速度, rate_high: 最快速度,
+              compression_ratio: 压缩后与压缩前的大小之比（不压缩时为1）}
+        速度单位为每秒处理的整数个数
+    """
+    # 后端按整个目标范围选择，而不是按样本的终点；每组至少包含 workers 个完整的段
+    # （桶筛法的一段是一个窗口，多进程时是一个任务）
+    if backend is None:
+        backend = default_backend(end)
+    span = segment_span(end, workers, segment_bytes, backend)
+    sample_end = min(end, start + span * workers * (groups + 1) - 1)
+    chunks = iter_prime_chunks(start, sample_end, workers, segment_bytes, backend)
+
+    sink = io.StringIO()
+    csv_writer = csv.writer(sink)
+    sample = []
+    started = last = time.perf_counter()
+    setup = None
+    rates = []
+    group_numbers = 0
+    group_segments = 0
+    sequence = 0
+
+    for primes in chunks:
+        # 与正式运行一样格式化输出，只是不写磁盘
+        if output_format == 'bin':
+            encode_gaps(primes)
+        else:
+            csv_writer.writerows(zip(range(sequence + 1, sequence + len(primes) + 1), primes))
+            if compression:
+                sample.append(sink.getvalue())
+            sink.seek(0)
+            sink.truncate()
+        sequence += len(primes)
+
+        group_numbers += primes.hi - primes.lo
+        group_segments += 1
+        if group_segments == workers:
+            now = time.perf_counter()
+            if setup is None:
+                setup = now - last
+                first_numbers = group_numbers
+            else:
+                rates.append(group_numbers / max(now - last, 1e-9))
+            last = now
+            group_numbers = group_segments = 0
+    chunks.close()
+
+    total = time.perf_counter() - started
+    ratio = 1.0
+    if sample:
+        # 压缩在后台写入线程中进行，不计入计算速度
+        data = ''.join(sample).encode('utf-8')
+        if compression == 'gzip':
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+        else:
+            compressed = lzma.compress(data, preset=LZMA_PRESET)
+        ratio = len(compressed) / len(data)
+
+    if not rates:
+        # 样本太小，只能用总速度
+        rate = (sample_end - start + 1) / max(total, 1e-9)
+        return {'setup': 0.0, 'rate': rate, 'rate_low': rate, 'rate_high': rate, 'compression_ratio': ratio}
+
+    rate = sum(rates) / len(rates)
+    # 第一组里扣除按平均速度处理这些数字所需的时间，剩下的就是一次性开销
+    setup = max(setup - first_numbers / rate, 0.0)
+    return {'setup': setup, 'rate': rate, 'rate_low': min(rates), 'rate_high': max(rates),
+            'compression_ratio': ratio}
+
+
+def _prime_digit_total(start, end, count):
+    """估算 [start, end] 内 count 个质数的十进制位数之和（按各位数区间的质数比例分摊）"""
+    low_digits, high_digits = len(str(start)), len(str(end))
+    if low_digits == high_digits:
+        return count * low_digits
+
+    total_estimate = max(riemann_r(end) - riemann_r(max(start - 1, 2)), 1.0)
+    digits = 0.0
+    for d in range(low_digits, high_digits + 1):
+        lo, hi = max(start, 10 ** (d - 1)), min(end, 10 ** d - 1)
+        share = (riemann_r(hi) - riemann_r(max(lo - 1, 2))) / total_estimate
+        digits += count * share * d
+    return digits
+
+
+def estimate_output_bytes(count, start, end, output_format='csv'):
+    """
+    估算输出 count 个质数的文件大小（字节）
+
+    CSV：标题行 + 每行 "序号,质数\r\n"（csv 模块默认以 \r\n 结尾），序号的位数精确累加；
+    bin：文件头 + 每个质数1字节的间隔编码（块首质数只记在索引中）+ 每4096个质数一条24字节的索引。
+
+    参数:
+        count: 质数个数
+        start: 范围起始值
+        end: 范围结束值
+        output_format: 输出格式 (csv/bin)
+    """
+    count = int(count)
+    if output_format == 'bin':
+        blocks = -(-count // DEFAULT_BLOCK_SIZE)
+        return HEADER.size + count - blocks + INDEX_RECORD.size * blocks
+
+    header = len('序号,质数\r\n'.encode('utf-8'))
+    sequence_digits = 0
+    for d in range(1, len(str(count)) + 1):
+        sequence_digits += d * (min(count, 10 ** d - 1) - 10 ** (d - 1) + 1)
+    return header + sequence_digits + _prime_digit_total(start, end, count) + 3 * count
+
+
+def estimate_time_and_space(mode, start, end, output_format='csv', backend=None, workers=1,
+                            calibration=None, compression=None):
+    """
+    估算运行时间和磁盘空间（含置信区间）
+
+    速度来自在目标量级上的实际校准（calibrate_speed），质数个数用 Riemann R 函数估算，
+    其误差界取 √x·ln(x)/(8π)；磁盘空间按所选输出格式的实际记录大小计算，
+    压缩的CSV再乘以校准样本上实测的压缩率。
 
     参数:
         mode: 运行模式 (mini/pro/full)
         start: 起始值
         end: 结束值
+        output_format: 输出格式 (csv/bin)
+        backend: 筛选后端（None表示自动选择）
+        workers: 并行进程数
+        calibration: 已有的校准结果（None表示现场校准）
+        compression: CSV 的压缩方式（None、'gzip'、'lzma'）
 
     返回:
-        (预计时间秒数, 预计磁盘空间MB, 预计质数数量)
+        字典，包含预计时间(秒)、磁盘空间(MB)、质数数量，以及各自的下限/上限：
+        time, time_low, time_high, space, space_low, space_high, primes, primes_low, primes_high
     """
-    # 基于测试的速度：万亿级别约900个/秒
-    CHECK_SPEED = 900  # 每秒检查的数字数量
-
-    # 每个CSV行约占用字节数（序号+逗号+质数+换行，约30字节）
-    BYTES_PER_PRIME = 30
-
-    if mode == 'mini':
-        target_primes = 10
-        # 根据质数定理，1e12附近质数密度约为 1/ln(n) ≈ 1/27.6
-        # 平均每28个数有1个质数，所以找10个质数约需检查280个数
-        estimated_checks = target_primes * 28
-        estimated_time = estimated_checks / CHECK_SPEED
-        estimated_space = target_primes * BYTES_PER_PRIME / (1024 * 1024)  # MB
-        return estimated_time, estimated_space, target_primes
-
-    elif mode == 'pro':
-        target_primes = 100
-        estimated_checks = target_primes * 28
-        estimated_time = estimated_checks / CHECK_SPEED
-        estimated_space = target_primes * BYTES_PER_PRIME / (1024 * 1024)  # MB
-        return estimated_time, estimated_space, target_primes
-
-    else:  # full
-        # 完整范围：需要检查的奇数数量
-        total_checks = (end - start) // 2
-        # 根据质数定理估算质数数量
-        # π(x) ≈ x / ln(x)
-        primes_at_start = start / math.log(start)
-        primes_at_end = end / math.log(end)
-        estimated_primes = int(primes_at_end - primes_at_start)
-
-        estimated_time = total_checks / CHECK_SPEED
-        estimated_space = estimated_primes * BYTES_PER_PRIME / (1024 * 1024)  # MB
-        return estimated_time, estimated_space, estimated_primes
+    if calibration is None:
+        calibration = calibrate_speed(start, end, backend, workers, output_format, compression=compression)
+
+    if mode in ('mini', 'pro'):
+        target_primes = 10 if mode == 'mini' else 100
+        # 质数定理：start 附近平均每 ln(start) 个数有一个质数；筛法按整段处理，至少筛一组段
+        numbers = max(target_primes * math.log(start), 2 * DEFAULT_SEGMENT_BYTES * workers)
+        primes = primes_low = primes_high = target_primes
+    else:
+        numbers = end - start + 1
+        primes = riemann_r(end) - riemann_r(max(start - 1, 2))
+        error = prime_pi_error_bound(end) + prime_pi_error_bound(start)
+        primes_low, primes_high = max(primes - error, 0), primes + error
+
+    setup = calibration['setup']
+    mb = 1024 * 1024 / calibration.get('compression_ratio', 1.0)
+    return {
+        'time': setup + numbers / calibration['rate'],
+        'time_low': setup + numbers / calibration['rate_high'],
+        'time_high': setup + numbers / calibration['rate_low'],
+        'space': estimate_output_bytes(primes, start, end, output_format) / mb,
+        'space_low': estimate_output_bytes(primes_low, start, end, output_format) / mb,
+        'space_high': estimate_output_bytes(primes_high, start, end, output_format) / mb,
+        'primes': int(primes),
+        'primes_low': int(primes_low),
+        'primes_high': int(primes_high),
+    }
+
+
+def format_duration(seconds):
+    """把秒数格式化为易读的时长"""
+    if seconds < 1:
+        return f"{seconds:.2f} 秒"
+    elif seconds < 60:
+        return f"{seconds:.1f} 秒"
+    elif seconds < 3600:
+        return f"{seconds/60:.1f} 分钟"
+    elif seconds < 86400:
+        return f"{seconds/3600:.1f} 小时"
+    days = seconds / 86400
+    return f"{days:.1f} 天 ({days/30:.1f} 月)"
+
+
+def format_size(mb):
+    """把MB数格式化为易读的大小"""
+    if mb < 1:
+        return f"{mb*1024:.2f} KB"
+    elif mb < 1024:
+        return f"{mb:.2f} MB"
+    return f"{mb/1024:.2f} GB"
 
 
 def main():
@@ -215,14 +527,24 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 运行模式说明：
-  mini  - 找到前10个质数后停止（快速测试）
-  pro   - 找到前100个质数后停止（中等测试）
-  full  - 完整遍历整个范围（需要数天甚至数月）
+  mini  - 直接定位范围内的前10个质数（瞬间完成）
+  pro   - 直接定位范围内的前100个质数（瞬间完成）
+  full  - 完整遍历整个范围（需要十几个小时）
 
 使用示例：
   python prime_range_finder.py --mode mini
   python prime_range_finder.py --mode pro
   python prime_range_finder.py --mode full
+  python prime_range_finder.py --mode full --workers 32
+  python prime_range_finder.py --mode full --resume
+  python prime_range_finder.py --mode full --format bin
+  python prime_range_finder.py --mode full --compress gzip
+  python prime_range_finder.py --mode full --metrics run.jsonl --prom prime.prom
+  python prime_range_finder.py --mode full --profile run.prof --profile-every 100
+  python prime_range_finder.py --count-only
+  python prime_range_finder.py --analytics --workers 32 --mod 6 --mod 30
+  python prime_range_finder.py --mode full --explain
+  python prime_range_finder.py --mode full --explain --cost sieve_numpy=40 --cost bucket=20
         """
     )
 
@@ -234,13 +556,150 @@ def main():
         help='运行模式：mini(10个质数) / pro(100个质数) / full(完整遍历)'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='并行筛选的进程数（默认1，建议设为CPU核心数）'
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次中断处的检查点继续（截掉残缺内容，追加写入）'
+    )
+
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['csv', 'bin'],
+        default='csv',
+        help='输出格式：csv(序号,质数) / bin(间隔编码的二进制文件，体积约为CSV的1/30)'
+    )
+
+    parser.add_argument(
+        '--compress',
+        type=str,
+        choices=sorted(COMPRESSIONS),
+        default=None,
+        help='压缩CSV输出：gzip(较快) / lzma(更小)；压缩在后台写入线程中进行'
+    )
+
+    parser.add_argument(
+        '--backend',
+        type=str,
+        choices=BACKENDS,
+        default=None,
+        help='筛选后端（默认：安装了NumPy时使用numpy，范围超过10^14时使用bucket桶筛法，否则使用python）'
+    )
+
+    parser.add_argument(
+        '--metrics',
+        type=str,
+        default=None,
+        help='把逐段指标（耗时拆分、速度、质数个数、队列深度、RSS）以 JSON Lines 追加到该文件'
+    )
+
+    parser.add_argument(
+        '--prom',
+        type=str,
+        default=None,
+        help='定期把指标快照写成 Prometheus textfile 格式（供 node_exporter 采集）'
+    )
+
+    parser.add_argument(
+        '--profile',
+        type=str,
+        default=None,
+        help='对遍历过程做 cProfile 采样，结果保存为 pstats 文件'
+    )
+
+    parser.add_argument(
+        '--profile-every',
+        type=int,
+        default=10,
+        help='每隔多少段剖析一段（默认10，1表示剖析每一段）'
+    )
+
+    parser.add_argument(
+        '--count-only',
+        action='store_true',
+        help='只计算范围内的质数个数（π(end) - π(start-1)），不枚举质数、不写文件'
+    )
+
+    parser.add_argument(
+        '--analytics',
+        action='store_true',
+        help='遍历整个范围只做流式统计（间隔直方图、最大间隔、孪生/表兄弟/四元组、剩余类），不保存质数'
+    )
+
+    parser.add_argument(
+        '--mod',
+        type=int,
+        action='append',
+        help='--analytics 统计该模数的剩余类（可重复，默认6）'
+    )
+
+    parser.add_argument(
+        '--explain',
+        action='store_true',
+        help='只打印查询规划（各执行方式的估计耗时和最终选择），不运行'
+    )
+
+    parser.add_argument(
+        '--cost',
+        type=str,
+        action='append',
+        metavar='名称=值',
+        help='覆盖规划器代价模型的系数（纳秒，可重复，见 prime_planner.DEFAULT_COSTS）'
+    )
+
     args = parser.parse_args()
+    try:
+        costs = parse_costs(args.cost)
+    except ValueError as e:
+        parser.error(str(e))
     mode = args.mode
+    output_format = args.format
+    workers = max(1, args.workers)
 
     # 定义范围
     START = 1 * 10**12  # 1,000,000,000,000
     END = 2 * 10**12 - 1  # 1,999,999,999,999
-    OUTPUT_FILE = "prime_13bits.csv"
+    OUTPUT_FILE = "prime_13bits.csv" if output_format == 'csv' else "prime_13bits.bin"
+    if args.compress:
+        if output_format == 'bin':
+            parser.error("二进制格式已经是紧凑编码，不能再使用 --compress")
+        OUTPUT_FILE += COMPRESSIONS[args.compress]
+    CHECKPOINT_FILE = OUTPUT_FILE + ".ckpt"
+
+    if args.count_only:
+        print("\n" + "=" * 70)
+        print("质数计数（Lucy_Hedgehog 算法，不枚举质数）")
+        print("=" * 70)
+        print(f"查找范围: {START:,} 到 {END:,}")
+        print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        start_time = time.time()
+        count = count_primes_in_range(START, END)
+        print(f"质数个数: {count:,}")
+        print(f"总耗时: {time.time() - start_time:.2f} 秒")
+        print("=" * 70)
+        return
+
+    if args.analytics:
+        # 流式统计：与完整遍历相同的生成过程，但不写质数文件，检查点中保存统计状态
+        analytics_file = "prime_13bits.analytics.json"
+        analytics = PrimeAnalytics(default_reducers(args.mod or DEFAULT_MODULI))
+        try:
+            find_primes_in_range(START, END, None, workers=workers, checkpoint_file=analytics_file + ".ckpt",
+                                 resume=args.resume, backend=args.backend, costs=costs, analytics=analytics)
+        except KeyboardInterrupt:
+            print("\n\n程序被用户中断！使用 --analytics --resume 可从检查点继续")
+            return
+        with open(analytics_file, 'w', encoding='utf-8') as f:
+            json.dump(analytics.to_dict(), f)
+        print(f"统计状态已保存到: {analytics_file}")
+        return
 
     # 根据模式设置质数数量限制
     MODE_CONFIG = {
@@ -252,8 +711,35 @@ def main():
     max_primes = MODE_CONFIG[mode]['max_primes']
     mode_description = MODE_CONFIG[mode]['description']
 
-    # 估算时间和磁盘空间
-    estimated_time, estimated_space, estimated_primes = estimate_time_and_space(mode, START, END)
+    if args.explain:
+        if max_primes is not None:
+            print(f"{mode.upper()} 模式只在起点附近定位前 {max_primes} 个质数（prime_search.primes_after），"
+                  f"不经过范围规划；完整遍历的规划如下：")
+        print(plan_range(START, END, workers, backend=args.backend, costs=costs).explain())
+        return
+
+    if max_primes is not None:
+        # 只需要范围开头的少量质数：直接在起点附近定位，无需扫描、校准和确认
+        print("\n" + "=" * 70)
+        print(f"运行模式: {mode.upper()} - {mode_description}")
+        print(f"查找范围: {START:,} 到 {END:,}")
+        print("=" * 70)
+        start_time = time.time()
+        primes = find_first_primes(START, END, max_primes, OUTPUT_FILE, output_format, args.compress)
+        for i, p in enumerate(primes[:10], 1):
+            print(f"{i:>4}: {p:,}")
+        if len(primes) > 10:
+            print(f"  ...（共 {len(primes)} 个）")
+        print(f"总耗时: {time.time() - start_time:.3f} 秒")
+        print(f"结果已保存到: {OUTPUT_FILE}")
+        print("=" * 70)
+        return
+
+    # 在目标量级上按计划选出的后端校准速度，估算时间和磁盘空间
+    plan = plan_range(START, END, workers, backend=args.backend, costs=costs)
+    print("\n正在目标量级上校准速度...")
+    estimate = estimate_time_and_space(mode, START, END, output_format, plan.backend or args.backend, workers,
+                                       compression=args.compress)
 
     # 显示模式信息
     print("\n" + "=" * 70)
@@ -266,49 +752,29 @@ def main():
 
     # 显示预估信息
     print("\n【预估信息】")
-    print(f"预计找到质数: {estimated_primes:,} 个")
-
-    if estimated_time < 1:
-        print(f"预计运行时间: {estimated_time:.2f} 秒")
-    elif estimated_time < 60:
-        print(f"预计运行时间: {estimated_time:.1f} 秒")
-    elif estimated_time < 3600:
-        print(f"预计运行时间: {estimated_time/60:.1f} 分钟")
-    elif estimated_time < 86400:
-        print(f"预计运行时间: {estimated_time/3600:.1f} 小时")
-    else:
-        days = estimated_time / 86400
-        print(f"预计运行时间: {days:.1f} 天 ({days/30:.1f} 月)")
-
-    if estimated_space < 1:
-        print(f"预计磁盘空间: {estimated_space*1024:.2f} KB")
-    elif estimated_space < 1024:
-        print(f"预计磁盘空间: {estimated_space:.2f} MB")
-    else:
-        print(f"预计磁盘空间: {estimated_space/1024:.2f} GB")
+    print(f"预计找到质数: {estimate['primes']:,} 个"
+          f"（{estimate['primes_low']:,} ~ {estimate['primes_high']:,}）")
+    print(f"预计运行时间: {format_duration(estimate['time'])}"
+          f"（{format_duration(estimate['time_low'])} ~ {format_duration(estimate['time_high'])}）")
+    print(f"预计磁盘空间: {format_size(estimate['space'])}"
+          f"（{format_size(estimate['space_low'])} ~ {format_size(estimate['space_high'])}）")
 
     print(f"输出文件: {OUTPUT_FILE}")
 
-    # 根据模式显示不同的警告
-    if mode == 'full':
-        print("\n" + "!" * 70)
-        print("【重要警告】")
-        print("!" * 70)
-        print("完整模式将遍历整个范围，这需要极长的时间和大量磁盘空间！")
-        print(f"- 预计需要检查约 {(END - START)//2:,} 个奇数")
-        print(f"- 可能需要 {estimated_time/86400:.0f} 天甚至更长时间")
-        print(f"- 磁盘空间需求约 {estimated_space/1024:.1f} GB")
-        print("\n建议：")
-        print("1. 确保有足够的磁盘空间")
-        print("2. 建议在高性能服务器上运行")
-        print("3. 考虑使用 mini 或 pro 模式进行测试")
-        print("4. 可以按 Ctrl+C 随时中断程序")
-        print("!" * 70)
-    else:
-        print("\n提示：")
-        print("- 程序会在找到指定数量的质数后自动停止")
-        print("- 可以按 Ctrl+C 随时中断程序")
-        print("- 已找到的质数会自动保存到文件")
+    # 完整模式的警告
+    print("\n" + "!" * 70)
+    print("【重要警告】")
+    print("!" * 70)
+    print("完整模式将遍历整个范围，这需要极长的时间和大量磁盘空间！")
+    print(f"- 预计需要检查约 {(END - START)//2:,} 个奇数")
+    print(f"- 可能需要 {format_duration(estimate['time_high'])}")
+    print(f"- 磁盘空间需求约 {format_size(estimate['space_high'])}")
+    print("\n建议：")
+    print("1. 确保有足够的磁盘空间")
+    print("2. 建议在高性能服务器上运行")
+    print("3. 考虑使用 mini 或 pro 模式进行测试")
+    print("4. 可以按 Ctrl+C 随时中断程序，之后用 --resume 继续")
+    print("!" * 70)
 
     # 二次确认
     print("\n" + "=" * 70)
@@ -324,15 +790,24 @@ def main():
     print()
 
     # 开始查找质数
+    metrics = None
+    if args.metrics or args.prom or args.profile:
+        metrics = RunMetrics(args.metrics, args.prom, args.profile, max(1, args.profile_every))
     try:
-        find_primes_in_range(START, END, OUTPUT_FILE, max_primes=max_primes)
+        find_primes_in_range(START, END, OUTPUT_FILE, max_primes=max_primes, workers=workers,
+                             checkpoint_file=CHECKPOINT_FILE, resume=args.resume, output_format=output_format,
+                             compression=args.compress, metrics=metrics, plan=plan)
     except KeyboardInterrupt:
         print("\n\n程序被用户中断！")
         print(f"已找到的质数已保存到 {OUTPUT_FILE}")
+        print(f"使用 --resume 参数可从检查点 {CHECKPOINT_FILE} 继续")
     except Exception as e:
         print(f"\n发生错误：{e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if metrics is not None:
+            metrics.close()
 
 
 if __name__ == "__main__":
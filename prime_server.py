@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地质数查询服务
+功能：常驻进程，通过 TCP 或 Unix 套接字接收 JSON Lines 请求，
+     一次请求可以包含任意多个数字，回答 is_prime / next_prime / prev_prime / factor / nth_prime / pi 查询；
+     质因数分解等耗 CPU 的计算交给进程池，事件循环始终保持响应；
+     结果缓存、质数位图等在各次请求之间保持常驻，避免每次都启动新的 Python 进程
+
+协议（每行一个 JSON 对象）：
+    请求  {"id": 1, "op": "is_prime", "n": [97, 100, 1000000000039]}
+    响应  {"id": 1, "result": [true, false, true]}
+    出错  {"id": 1, "error": "..."}
+    "n" 也可以是单个整数，此时 "result" 也是单个值；factor 的结果为 [[质数, 指数], ...]
+
+使用示例：
+  python prime_server.py serve --port 8765 --workers 8
+  python prime_server.py serve --unix /tmp/prime.sock --bitmap primes_13bits.bitmap
+  python prime_server.py query is_prime 97 100 1000000000039
+  echo '{"id": 1, "op": "pi", "n": 1000000}' | nc 127.0.0.1 8765
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from prime_bitmap import PrimeBitmap
+from prime_counting import prime_pi
+from prime_factorizer import factorize
+from prime_primality import is_prime
+from prime_search import next_prime, nth_prime, prev_prime
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 各操作是否需要交给进程池（True）还是直接在事件循环中计算（False）
+OPERATIONS = {
+    'is_prime': False,
+    'next_prime': False,
+    'prev_prime': False,
+    'factor': True,
+    'nth_prime': True,
+    'pi': True,
+}
+
+# 快速操作的数字个数超过该值时，也分块交给进程池，避免一次请求长时间占用事件循环
+INLINE_LIMIT = 256
+
+# 快速操作中有数字超过该位数时也交给进程池：几百位的 next_prime 要筛多个窗口并做 BPSW，
+# 在事件循环中计算会让所有连接都等待
+INLINE_MAX_BITS = 128
+
+# 单行请求的最大长度（字节）
+MAX_LINE = 64 * 1024 * 1024
+
+# 每个进程（主进程和工作进程）中打开的质数位图
+_bitmap = None
+
+
+def _open_bitmap(path):
+    """在当前进程中打开质数位图（进程池的初始化函数）"""
+    global _bitmap
+    _bitmap = PrimeBitmap(path) if path else None
+
+
+def compute(op, n):
+    """
+    计算一个查询的结果（JSON 可序列化）
+
+    参数:
+        op: 操作名（见 OPERATIONS）
+        n: 整数
+    """
+    if op == 'is_prime':
+        return _bitmap.is_prime(n) if _bitmap else is_prime(n)
+    if op == 'next_prime':
+        return _bitmap.next_prime(n) if _bitmap else next_prime(n)
+    if op == 'prev_prime':
+        return _bitmap.prev_prime(n) if _bitmap else prev_prime(n)
+    if op == 'factor':
+        if n < 1:
+            raise ValueError("只能分解正整数")
+        return [[p, e] for p, e in factorize(n).items()]
+    if op == 'nth_prime':
+        return nth_prime(n)
+    if op == 'pi':
+        return prime_pi(n)
+    raise ValueError(f"未知操作: {op}")
+
+
+def compute_many(op, numbers):
+    """进程池任务：依次计算一批数字"""
+    return [compute(op, n) for n in numbers]
+
+
+class PrimeQueryServer:
+    """
+    质数查询服务
+
+    结果按 (操作, 数字) 缓存在主进程中（LRU），重复的查询不再计算；
+    同一请求中尚未缓存的数字分块并发交给进程池。
+    """
+
+    def __init__(self, workers=None, cache_size=100000, bitmap_path=None):
+        """
+        参数:
+            workers: 进程池大小（None表示CPU核心数）
+            cache_size: 结果缓存的最大条目数
+            bitmap_path: 质数位图文件（见 prime_bitmap.py），范围内的快速查询直接查表
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.stats = {'requests': 0, 'numbers': 0, 'cache_hits': 0, 'errors': 0, 'pool_tasks': 0}
+        self._connections = set()
+        _open_bitmap(bitmap_path)
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_open_bitmap, initargs=(bitmap_path,))
+
+    async def _compute(self, op, numbers):
+        """计算一批数字的结果：慢操作、大批量或很大的数字交给进程池，否则直接计算"""
+        if (not OPERATIONS[op] and len(numbers) <= INLINE_LIMIT
+                and all(abs(n).bit_length() <= INLINE_MAX_BITS for n in numbers)):
+            return compute_many(op, numbers)
+
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(numbers) // (self.workers * 4))) if not OPERATIONS[op] else 1
+        futures = [loop.run_in_executor(self._pool, compute_many, op, numbers[i:i + size])
+                   for i in range(0, len(numbers), size)]
+        self.stats['pool_tasks'] += len(futures)
+        results = []
+        for part in await asyncio.gather(*futures):
+            results.extend(part)
+        return results
+
+    async def handle_request(self, request):
+        """
+        处理一个请求对象，返回响应对象
+
+        参数:
+            request: {"id": ..., "op": ..., "n": 整数或整数列表}
+        """
+        response = {'id': request.get('id')} if isinstance(request, dict) else {'id': None}
+        self.stats['requests'] += 1
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是 JSON 对象")
+            op = request.get('op')
+            if op == 'stats':
+                response['result'] = dict(self.stats, cache_size=len(self._cache))
+                return response
+            if op not in OPERATIONS:
+                raise ValueError(f"未知操作: {op}")
+
+            single = not isinstance(request.get('n'), list)
+            numbers = [request.get('n')] if single else request['n']
+            if not all(isinstance(n, int) and not isinstance(n, bool) for n in numbers):
+                raise ValueError("n 必须是整数或整数列表")
+            self.stats['numbers'] += len(numbers)
+
+            # 先查缓存（在等待计算之前取出，避免被并发请求淘汰），只计算未命中的，重复的数字只算一次
+            cache = self._cache
+            known = {}
+            for n in numbers:
+                key = (op, n)
+                if key in cache:
+                    known[n] = cache[key]
+                    cache.move_to_end(key)
+            missing = [n for n in dict.fromkeys(numbers) if n not in known]
+            self.stats['cache_hits'] += len(numbers) - len(missing)
+
+            for n, result in zip(missing, await self._compute(op, missing)):
+                known[n] = cache[(op, n)] = result
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+            results = [known[n] for n in numbers]
+            response['result'] = results[0] if single else results
+        except Exception as e:
+            self.stats['errors'] += 1
+            response['error'] = str(e) or type(e).__name__
+        return response
+
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接：逐行读取请求，按顺序写回响应"""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {'id': None, 'error': f"无效的 JSON: {e}"}
+                else:
+                    response = await self.handle_request(request)
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # stop() 断开仍在等待请求的连接
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """
+        开始监听
+
+        参数:
+            host: TCP 监听地址
+            port: TCP 端口（0 表示由系统分配）
+            unix_path: Unix 套接字路径；给出时不监听 TCP
+
+        返回:
+            asyncio.Server
+        """
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle_connection, unix_path, limit=MAX_LINE)
+        return await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE)
+
+    async def stop(self, listener):
+        """停止监听并断开所有连接"""
+        listener.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await listener.wait_closed()
+
+    def close(self):
+        """关闭进程池和位图"""
+        self._pool.shutdown(cancel_futures=True)
+        if _bitmap:
+            _bitmap.close()
+            _open_bitmap(None)
+
+
+class PrimeQueryClient:
+    """
+    同步客户端：保持一个连接，可以连续发送多次查询
+
+    用法:
+        with PrimeQueryClient(port=8765) as client:
+            client.query('is_prime', [97, 100])     # [True, False]
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, timeout=None):
+        if unix_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout)
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+
+    def query(self, op, n):
+        """
+        发送一次查询并等待结果
+
+        参数:
+            op: 操作名
+            n: 整数或整数列表
+
+        返回:
+            结果（与 n 的形式对应）；服务端出错时抛出 RuntimeError
+        """
+        self._next_id += 1
+        request = {'id': self._next_id, 'op': op, 'n': n}
+        self._file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def serve(host, port, unix_path, workers, cache_size, bitmap_path):
+    """运行服务直到被中断"""
+    server = PrimeQueryServer(workers, cache_size, bitmap_path)
+    try:
+        listener = await server.start(host, port, unix_path)
+        address = unix_path or f"{host}:{listener.sockets[0].getsockname()[1]}"
+        print(f"质数查询服务已启动: {address}（进程池 {server.workers} 个进程）")
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    """
+    命令行：启动服务，或发送一次查询
+    """
+    parser = argparse.ArgumentParser(description='本地质数查询服务（JSON Lines 协议）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('serve', '启动服务'), ('query', '发送一次查询并打印结果')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--host', type=str, default=DEFAULT_HOST, help=f'TCP 地址（默认{DEFAULT_HOST}）')
+        sub.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'TCP 端口（默认{DEFAULT_PORT}）')
+        sub.add_argument('--unix', type=str, default=None, help='使用 Unix 套接字（给出路径）')
+        if name == 'serve':
+            sub.add_argument('--workers', type=int, default=None, help='进程池大小（默认CPU核心数）')
+            sub.add_argument('--cache-size', type=int, default=100000, help='结果缓存的最大条目数（默认100000）')
+            sub.add_argument('--bitmap', type=str, default=None, help='质数位图文件（见 prime_bitmap.py）')
+        else:
+            sub.add_argument('op', choices=sorted(OPERATIONS) + ['stats'], help='操作名')
+            sub.add_argument('numbers', type=int, nargs='*', help='待查询的整数')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.cache_size, args.bitmap))
+        except KeyboardInterrupt:
+            print("\n服务已停止")
+    else:
+        with PrimeQueryClient(args.host, args.port, args.unix) as client:
+            results = client.query(args.op, args.numbers)
+            if args.op == 'stats':
+                print(json.dumps(results, ensure_ascii=False))
+            else:
+                for n, result in zip(args.numbers, results):
+                    print(f"{n}\t{json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段筛法引擎
+功能：用分段埃拉托斯特尼筛法（只筛奇数）快速枚举大范围内的质数
+     安装了 NumPy 时自动使用向量化后端，否则使用纯 Python 后端，两者输出完全相同；
+     10^14 以上的高位窗口（直到 2^64）使用桶筛法后端：大的基础质数在每个窗口内至多命中一次，
+     按下一次命中的窗口分桶存放，每个窗口只处理真正落在其中的命中，基础质数分块增量生成
+"""
+
+import math
+import os
+import tempfile
+from array import array
+from collections import deque
+from itertools import compress
+from multiprocessing import Pool
+
+from prime_table import primes_up_to, simple_sieve  # simple_sieve 保留在本模块中供外部调用
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+# 每段的字节数：每个字节对应一个奇数，1 MB 覆盖 2×10^6 个整数，
+# 大致能放进 L2/L3 缓存，同时摊薄每段遍历基础质数的解释器开销
+DEFAULT_SEGMENT_BYTES = 1 << 20
+
+# 可用的筛选后端（'bucket' 为大范围模式，需要 NumPy）
+BACKENDS = ('python', 'numpy', 'bucket') if np is not None else ('python',)
+
+# NumPy 后端中，小于该值（或段长的1/64，取较大者）的基础质数在段内命中次数多，逐个用步长切片划掉；
+# 其余质数命中次数少，把所有命中位置一次性算出来统一划掉
+_NUMPY_SMALL_PRIME_LIMIT = 1024
+
+# 范围终点超过该值时默认使用桶筛法：此时 sqrt(end) 以内的基础质数太多，
+# 逐段遍历全部基础质数的开销超过了筛选本身（实测 10^14 附近桶筛法已快近一倍，10^16 附近快十倍）
+BUCKET_THRESHOLD = 10 ** 14
+
+# 桶筛法每个窗口的字节数（每字节对应一个奇数）：不大于窗口的基础质数每个窗口都会命中，逐窗口处理；
+# 更大的质数每个窗口至多命中一次，放进桶里。窗口越大，桶的个数（约 sqrt(end) / 窗口）越少
+DEFAULT_BUCKET_WINDOW_BYTES = 1 << 23
+
+# 桶筛法增量生成基础质数时，每攒够这么多个再一起放进桶
+_BUCKET_INSERT_BATCH = 1 << 22
+
+# 计算第一次命中时每次处理的基础质数个数（中间数组能放进缓存，比整批计算快约一倍）
+_BUCKET_FILTER_CHUNK = 1 << 16
+
+# 多进程桶筛法每个任务至少包含的窗口数
+BUCKET_TASK_WINDOWS = 8
+
+# 多进程桶筛法中，基础质数由主进程生成一次、写入临时文件，各进程以内存映射方式共享；
+# 但每个任务仍要对全部 π(sqrt(end)) 个大基础质数算出第一次命中、建立桶（每个质数约 40ns，
+# 而每个候选奇数的筛选约 36ns）。每个任务的窗口数至少为 该值 × π(sqrt(end)) / 窗口字节数，
+# 使建桶的开销不超过筛选的约 1/4（10^18 附近约24个窗口，10^19 附近约70个）
+_BUCKET_SETUP_RATIO = 4
+
+
+def default_backend(end=None):
+    """
+    返回默认后端：未安装 NumPy 时为 'python'；
+    否则范围终点 end 超过 BUCKET_THRESHOLD 时为 'bucket'，其余为 'numpy'
+    """
+    if np is None:
+        return 'python'
+    if end is not None and end > BUCKET_THRESHOLD:
+        return 'bucket'
+    return 'numpy'
+
+
+def sieve_segment(lo, hi, base_primes):
+    """
+    筛出 [lo, hi) 区间内的奇数质数标记
+
+    参数:
+        lo: 区间起点（必须为奇数）
+        hi: 区间终点（不包含）
+        base_primes: 升序的奇数基础质数序列，需覆盖到 sqrt(hi)
+
+    返回:
+        bytearray，第 i 个字节为 1 表示 lo + 2*i 是质数
+    """
+    size = (hi - lo + 1) // 2
+    flags = bytearray([1]) * size
+    zeros = memoryview(bytes(size))
+
+    for p in base_primes:
+        square = p * p
+        if square >= hi:
+            break
+
+        # 第一个需要划掉的奇数倍数：不小于 p² 且不小于 lo
+        if square >= lo:
+            first = square
+        else:
+            first = lo + (-lo) % p
+            if first % 2 == 0:
+                first += p
+
+        index = (first - lo) // 2
+        if index < size:
+            count = (size - 1 - index) // p + 1
+            flags[index::p] = zeros[:count]
+
+    # 1 不是质数
+    if lo == 1 and size:
+        flags[0] = 0
+
+    return flags
+
+
+def segment_primes(lo, hi, base_primes):
+    """
+    返回 [lo, hi) 区间内的奇数质数列表（lo 必须为奇数）
+    """
+    flags = sieve_segment(lo, hi, base_primes)
+    return list(compress(range(lo, hi, 2), flags))
+
+
+def segment_primes_numpy(lo, hi, base_primes):
+    """
+    NumPy 后端：返回 [lo, hi) 区间内的奇数质数列表（lo 必须为奇数）
+
+    参数:
+        lo: 区间起点（必须为奇数）
+        hi: 区间终点（不包含）
+        base_primes: 升序的奇数基础质数（int64 数组），需覆盖到 sqrt(hi)
+
+    返回:
+        升序的质数列表（Python int）
+    """
+    return _segment_prime_array(lo, hi, base_primes).tolist()
+
+
+def _segment_prime_array(lo, hi, base_primes):
+    """segment_primes_numpy 的 NumPy 数组版本（int64，要求 hi 小于 2^63）"""
+    size = (hi - lo + 1) // 2
+    flags = np.ones(size, dtype=np.uint8)
+
+    primes = base_primes[:np.searchsorted(base_primes, math.isqrt(hi - 1), side='right')]
+
+    # 每个质数第一个需要划掉的奇数倍数：不小于 p² 且不小于 lo
+    first = np.maximum(primes * primes, lo + (-lo) % primes)
+    first += (first % 2 == 0) * primes
+    _cross_off(flags, primes, (first - lo) // 2)
+
+    # 1 不是质数
+    if lo == 1 and size:
+        flags[0] = 0
+
+    return lo + 2 * np.flatnonzero(flags)
+
+
+def _cross_off(flags, primes, index):
+    """
+    在标记数组中划掉各质数的全部倍数
+
+    参数:
+        flags: uint8 标记数组，下标 i 对应某个奇数起点之后的第 i 个奇数
+        primes: 升序的奇数质数（int64 数组）
+        index: 各质数第一个需要划掉的下标（int64 数组，可以超出 flags 的长度）
+    """
+    size = len(flags)
+
+    # 小质数：步长切片赋值
+    small = np.searchsorted(primes, max(_NUMPY_SMALL_PRIME_LIMIT, size >> 6))
+    for p, i in zip(primes[:small].tolist(), index[:small].tolist()):
+        flags[i::p] = 0
+
+    # 大质数：一次性生成全部命中位置
+    large_primes = primes[small:]
+    large_index = index[small:]
+    counts = np.maximum((size - 1 - large_index) // large_primes + 1, 0)
+    total = int(counts.sum())
+    if total:
+        group_start = np.repeat(np.cumsum(counts) - counts, counts)
+        steps = np.arange(total, dtype=np.int64) - group_start
+        flags[np.repeat(large_index, counts) + steps * np.repeat(large_primes, counts)] = 0
+
+
+def _first_multiple_index(lo, primes):
+    """
+    求各质数在 lo 之后第一个需要划掉的奇数倍数（不小于 p² 且不小于 lo）的下标，下标 i 对应 lo + 2i
+
+    全部使用 uint64 运算，lo 可以接近 2^64（质数须小于 2^32），中间结果不超过 2p，不会溢出。
+
+    参数:
+        lo: 奇数起点（Python int，小于 2^64）
+        primes: 奇数质数（uint64 数组）
+
+    返回:
+        uint64 数组
+    """
+    lo64 = np.uint64(lo)
+    # r = -lo mod p（取值 1..p），2i ≡ r (mod p)：r 为偶数时 i = r/2，否则 i = (r+p)/2；r = p 时 i = 0
+    r = primes - lo64 % primes
+    index = (r + (r & np.uint64(1)) * primes) >> np.uint64(1)
+    index[index >= primes] = 0
+    squares = primes * primes
+    late = squares > lo64
+    if late.any():
+        index[late] = (squares[late] - lo64) >> np.uint64(1)
+    return index
+
+
+def _distribute(buckets, windows, primes, offsets):
+    """把一批 (质数, 窗口内下标) 按所在窗口编号放进各个桶（每个桶是若干对数组的列表）"""
+    if not len(windows):
+        return
+    keys = windows - windows.min()
+    if keys.max() < 1 << 16:
+        keys = keys.astype(np.uint16)  # 16位整数的稳定排序是基数排序
+    order = np.argsort(keys, kind='stable')
+    windows = windows[order]
+    primes = primes[order]
+    offsets = offsets[order]
+    bounds = (np.flatnonzero(np.diff(windows)) + 1).tolist()
+    for i, j in zip([0] + bounds, bounds + [len(windows)]):
+        # 复制出独立的小数组，已处理的部分可以立即释放
+        buckets.setdefault(int(windows[i]), []).append((primes[i:j].copy(), offsets[i:j].copy()))
+
+
+def _iter_base_prime_arrays(lo, hi, segment_bytes=DEFAULT_SEGMENT_BYTES):
+    """按段增量生成 [lo, hi] 内的奇数质数（int64 数组），不一次性生成全部"""
+    lo |= 1
+    if lo > hi:
+        return
+    base_primes = np.asarray(primes_up_to(math.isqrt(hi))[1:], dtype=np.int64)
+    span = 2 * segment_bytes
+    while lo <= hi:
+        segment_hi = min(lo + span, hi + 1)
+        yield _segment_prime_array(lo, segment_hi, base_primes)
+        lo += span
+
+
+def iter_bucket_segments(start, end, window_bytes=DEFAULT_BUCKET_WINDOW_BYTES, base_primes=None):
+    """
+    桶筛法（Oliveira e Silva）：按窗口遍历 [start, end] 范围内的质数，适用于 10^14 以上直到 2^64 的高位窗口
+
+    不大于窗口宽度的基础质数每个窗口都有命中，逐窗口计算起点后划掉；
+    更大的基础质数在每个窗口内至多命中一次：按下一次命中所在的窗口编号放进桶里，
+    处理到该窗口时只取出这个桶，划掉后算出再下一次命中，放进对应的桶。
+    这样每个窗口的工作量只与真正落在其中的命中数成正比，每个候选数的平均开销几乎与高度无关。
+
+    大的基础质数分块增量生成、直接放进桶里，不生成完整的列表；桶里每个质数只占8字节
+    （uint32 质数 + uint32 窗口内下标），第一次命中就超出范围的质数不保存，
+    因此内存占用与范围宽度无关，至多约为 8 × π(sqrt(end)) 字节（10^18 附近约400MB），窄范围时远小于此。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含，必须小于 2^64）
+        window_bytes: 每个窗口的字节数（每字节对应一个奇数）
+        base_primes: 预先算好的升序奇数基础质数（NumPy 数组，可以是 np.memmap，需覆盖到 sqrt(end)；
+                     None表示增量生成）
+
+    生成:
+        与 iter_prime_segments 相同的 (窗口起点, 窗口终点(不包含), 该窗口内升序质数列表)
+    """
+    if end < 2 or start > end:
+        return
+    if end >= 1 << 64:
+        raise ValueError("桶筛法只支持小于 2^64 的范围")
+
+    include_two = start <= 2
+    base = max(start, 1) | 1
+    if base > end:
+        if include_two:
+            yield 2, 3, [2]
+        return
+
+    # 下标 i 对应 base + 2i；total 为范围内的奇数个数
+    total = (end - base) // 2 + 1
+    root = math.isqrt(end)
+    dense_limit = min(root, window_bytes)
+    if base_primes is None:
+        dense = np.asarray(primes_up_to(dense_limit)[1:], dtype=np.uint64)
+        large_blocks = _iter_base_prime_arrays(dense_limit + 1, root)
+    else:
+        split = int(np.searchsorted(base_primes, dense_limit, side='right'))
+        stop = int(np.searchsorted(base_primes, root, side='right'))
+        dense = np.asarray(base_primes[:split], dtype=np.uint64)
+        large_blocks = (base_primes[i:min(i + _BUCKET_INSERT_BATCH, stop)]
+                        for i in range(split, stop, _BUCKET_INSERT_BATCH))
+    dense_i64 = dense.astype(np.int64)
+
+    # 大的基础质数增量生成，按第一次命中所在的窗口放进桶里
+    buckets = {}
+    pending = []
+    pending_count = 0
+
+    def insert(blocks):
+        # 分成能放进缓存的小块计算第一次命中，先丢掉超出范围的，再一起分桶
+        kept_primes, kept_index = [], []
+        for block in blocks:
+            for i in range(0, len(block), _BUCKET_FILTER_CHUNK):
+                primes = np.asarray(block[i:i + _BUCKET_FILTER_CHUNK], dtype=np.uint64)
+                index = _first_multiple_index(base, primes)
+                keep = index < np.uint64(total)
+                kept_primes.append(primes[keep].astype(np.uint32))
+                kept_index.append(index[keep].astype(np.int64))
+        primes = np.concatenate(kept_primes)
+        index = np.concatenate(kept_index)
+        windows = index // window_bytes
+        _distribute(buckets, windows, primes, (index - windows * window_bytes).astype(np.uint32))
+
+    for block in large_blocks:
+        pending.append(block)
+        pending_count += len(block)
+        if pending_count >= _BUCKET_INSERT_BATCH:
+            insert(pending)
+            pending, pending_count = [], 0
+    if pending_count:
+        insert(pending)
+    del pending
+
+    window = 0
+    while window * window_bytes < total:
+        first = window * window_bytes
+        size = min(window_bytes, total - first)
+        lo = base + 2 * first
+        flags = np.ones(size, dtype=np.uint8)
+
+        # 小质数：每个窗口都有命中
+        _cross_off(flags, dense_i64, _first_multiple_index(lo, dense).astype(np.int64))
+
+        # 大质数：只处理本窗口的桶，划掉后移到下一次命中的窗口
+        chunks = buckets.pop(window, None)
+        if chunks:
+            primes = np.concatenate([chunk[0] for chunk in chunks])
+            offsets = np.concatenate([chunk[1] for chunk in chunks])
+            del chunks
+            flags[offsets] = 0
+            following = offsets.astype(np.int64) + primes
+            keep = following < total - first
+            primes = primes[keep]
+            following = following[keep]
+            ahead = following // window_bytes
+            _distribute(buckets, ahead + window, primes, (following - ahead * window_bytes).astype(np.uint32))
+
+        if lo == 1:
+            flags[0] = 0
+        found = (np.uint64(lo) + 2 * np.flatnonzero(flags).astype(np.uint64)).tolist()
+        if include_two:
+            found.insert(0, 2)
+            include_two = False
+        yield lo, lo + 2 * size, found
+        window += 1
+
+
+def iter_prime_segments(start, end, segment_bytes=DEFAULT_SEGMENT_BYTES, base_primes=None, backend=None):
+    """
+    按段遍历 [start, end] 范围内的质数
+
+    基础质数表（不超过 sqrt(end) 的奇数质数）从共享质数表中取出一次，之后每段复用。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        segment_bytes: 每段的字节数（每字节对应一个奇数）
+        base_primes: 预先算好的奇数基础质数（桶筛法须为 NumPy 数组；None表示从共享质数表中取）
+        backend: 'python'、'numpy' 或 'bucket'（None表示按范围自动选择）
+
+    生成:
+        (段起点, 段终点(不包含), 该段内升序质数列表)
+        段起点总是奇数；若范围包含 2，则第一段的质数列表以 2 开头
+    """
+    if end < 2 or start > end:
+        return
+
+    if backend is None:
+        backend = default_backend(end)
+    if backend == 'bucket':
+        yield from iter_bucket_segments(start, end, max(segment_bytes, DEFAULT_BUCKET_WINDOW_BYTES), base_primes)
+        return
+    if base_primes is None:
+        # 逐个遍历时 list 比 array 略快
+        base_primes = primes_up_to(math.isqrt(end))[1:].tolist()
+    if backend == 'numpy':
+        base_primes = np.asarray(base_primes, dtype=np.int64)
+        sieve = segment_primes_numpy
+    else:
+        sieve = segment_primes
+    span = 2 * segment_bytes
+
+    include_two = start <= 2
+    lo = max(start, 1) | 1
+
+    if include_two and lo > end:
+        yield 2, 3, [2]
+        return
+
+    while lo <= end:
+        hi = min(lo + span, end + 1)
+        primes = sieve(lo, hi, base_primes)
+        if include_two:
+            primes.insert(0, 2)
+            include_two = False
+        yield lo, hi, primes
+        lo += span
+
+
+# 每个工作进程各自持有的基础质数表（由 _init_worker 设置）
+_worker_base_primes = None
+
+
+def _init_worker(end, backend, base_path=None):
+    """工作进程初始化：只计算一次基础质数表（桶筛法以内存映射方式打开主进程写好的文件）"""
+    global _worker_base_primes
+    if backend == 'bucket':
+        if os.path.getsize(base_path):
+            _worker_base_primes = np.memmap(base_path, dtype=np.uint32, mode='r')
+        else:
+            _worker_base_primes = np.zeros(0, dtype=np.uint32)
+        return
+    _worker_base_primes = primes_up_to(math.isqrt(end))[1:].tolist()
+    if backend == 'numpy':
+        _worker_base_primes = np.asarray(_worker_base_primes, dtype=np.int64)
+
+
+def _sieve_chunk(lo, hi, segment_bytes, backend):
+    """工作进程任务：筛出 [lo, hi] 内的质数，以紧凑的 array('Q') 返回"""
+    primes = array('Q')
+    for _, _, segment in iter_prime_segments(lo, hi, segment_bytes, _worker_base_primes, backend):
+        primes.extend(segment)
+    return primes
+
+
+def segment_span(end, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    返回分段生成器每次生成的一段所覆盖的整数个数
+
+    桶筛法按窗口生成；多进程桶筛法按任务生成，任务的窗口数随 π(sqrt(end)) 增长。
+
+    参数:
+        end: 范围终点
+        workers: 并行进程数
+        segment_bytes: 每段的字节数（每字节对应一个奇数）
+        backend: 'python'、'numpy' 或 'bucket'（None表示按范围自动选择）
+    """
+    if backend is None:
+        backend = default_backend(end)
+    if backend != 'bucket':
+        return 2 * segment_bytes
+    window_bytes = max(segment_bytes, DEFAULT_BUCKET_WINDOW_BYTES)
+    if workers <= 1:
+        return 2 * window_bytes
+    root = math.isqrt(end)
+    entries = root / math.log(root) if root > 2 else 0  # π(sqrt(end)) 的估计
+    windows = max(BUCKET_TASK_WINDOWS, math.ceil(_BUCKET_SETUP_RATIO * entries / window_bytes))
+    return 2 * window_bytes * windows
+
+
+def _write_base_primes(end, workers):
+    """把不超过 sqrt(end) 的奇数质数以 uint32 写入临时文件（基础质数多时并行生成），返回文件路径"""
+    root = math.isqrt(end)
+    fd, path = tempfile.mkstemp(prefix='prime_base_', suffix='.u32')
+    with os.fdopen(fd, 'wb') as f:
+        for chunk in iter_prime_chunks(3, root, workers if root > 10 ** 8 else 1, backend='numpy'):
+            np.asarray(chunk, dtype=np.uint32).tofile(f)
+    return path
+
+
+def iter_prime_segments_parallel(start, end, workers, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    用多进程并行筛选，按升序逐段生成 [start, end] 范围内的质数
+
+    范围被切成连续的段分给进程池，结果按原顺序取回。同时在途的段数
+    限制为 workers 的若干倍，因此内存占用与范围大小无关。
+    桶筛法的基础质数由主进程生成一次，写入临时文件后各进程以内存映射方式共享，
+    每个任务只需建立自己的桶；任务宽度见 segment_span。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        workers: 工作进程数
+        segment_bytes: 每段的字节数（每字节对应一个奇数）
+        backend: 'python'、'numpy' 或 'bucket'（None表示按范围自动选择）
+
+    生成:
+        与 iter_prime_segments 相同的 (段起点, 段终点(不包含), 质数序列)
+    """
+    if end < 2 or start > end:
+        return
+
+    if end < 3:
+        yield from iter_prime_segments(start, end, segment_bytes, backend=backend)
+        return
+    if backend is None:
+        backend = default_backend(end)
+
+    span = segment_span(end, workers, segment_bytes, backend)
+    lo = max(start, 1) | 1
+    base_path = None
+    if backend == 'bucket':
+        # 桶筛法的任务很大，只保留刚好让每个进程都有活干的在途任务数
+        max_pending = workers + 2
+        base_path = _write_base_primes(end, workers)
+    else:
+        max_pending = workers * 4
+
+    def chunks():
+        # 第一段从 start 开始，以便包含 2
+        chunk_lo, chunk_start = lo, start
+        while chunk_lo <= end:
+            chunk_hi = min(chunk_lo + span, end + 1)
+            yield chunk_lo, chunk_hi, chunk_start
+            chunk_lo += span
+            chunk_start = chunk_lo
+
+    pool = Pool(workers, initializer=_init_worker, initargs=(end, backend, base_path))
+    try:
+        pending = deque()
+        for chunk_lo, chunk_hi, chunk_start in chunks():
+            if len(pending) >= max_pending:
+                seg_lo, seg_hi, result = pending.popleft()
+                yield seg_lo, seg_hi, result.get()
+            result = pool.apply_async(_sieve_chunk, (chunk_start, chunk_hi - 1, segment_bytes, backend))
+            pending.append((chunk_lo, chunk_hi, result))
+
+        while pending:
+            seg_lo, seg_hi, result = pending.popleft()
+            yield seg_lo, seg_hi, result.get()
+    finally:
+        # 提前结束（如达到 max_primes）时直接终止未完成的任务
+        pool.terminate()
+        pool.join()
+        if base_path is not None:
+            os.remove(base_path)
+
+
+class PrimeChunk(array):
+    """
+    一块升序质数（array('Q')），并记录它覆盖的范围 [lo, hi)
+
+    属性:
+        lo: 该块覆盖范围的起点
+        hi: 该块覆盖范围的终点（不包含）
+    """
+
+    def __new__(cls, primes, lo, hi):
+        chunk = super().__new__(cls, 'Q', primes)
+        chunk.lo = lo
+        chunk.hi = hi
+        return chunk
+
+
+def _open_segments(start, end, workers, segment_bytes, backend):
+    """按进程数选择单进程或多进程的分段生成器"""
+    if workers > 1:
+        return iter_prime_segments_parallel(start, end, workers, segment_bytes, backend)
+    return iter_prime_segments(start, end, segment_bytes, backend=backend)
+
+
+def iter_prime_chunks(start, end, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    按块惰性生成 [start, end] 范围内的质数，每块是一个 PrimeChunk（array('Q')）
+
+    内存占用只与段大小（和在途段数）有关，与范围大小无关；
+    可以随时停止迭代（break 或 close()），多进程模式下会立即终止进程池。
+    质数必须小于 2^64。
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        workers: 并行进程数（1表示单进程）
+        segment_bytes: 每段的字节数（每字节对应一个奇数）
+        backend: 'python'、'numpy' 或 'bucket'（None表示按范围自动选择）
+
+    生成:
+        PrimeChunk，各块首尾相接、按升序排列
+    """
+    segments = _open_segments(start, end, workers, segment_bytes, backend)
+    try:
+        for lo, hi, primes in segments:
+            yield PrimeChunk(primes, lo, hi)
+    finally:
+        segments.close()
+
+
+def iter_primes(start, end, workers=1, segment_bytes=DEFAULT_SEGMENT_BYTES, backend=None):
+    """
+    逐个惰性生成 [start, end] 范围内的质数
+
+    不打印、不写文件，可以在程序中直接消费，随时停止迭代：
+
+        for p in iter_primes(10**12, 2 * 10**12 - 1):
+            if p % 4 == 1:
+                break
+
+    参数:
+        start: 起始值（包含）
+        end: 结束值（包含）
+        workers: 并行进程数（1表示单进程）
+        segment_bytes: 每段的字节数（每字节对应一个奇数）
+        backend: 'python'、'numpy' 或 'bucket'（None表示按范围自动选择）
+
+    生成:
+        升序的质数（Python int）
+    """
+    segments = _open_segments(start, end, workers, segment_bytes, backend)
+    try:
+        for _, _, primes in segments:
+            yield from primes
+    finally:
+        segments.close()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑的二进制质数存储
+功能：把升序质数按"间隔/2"做变长整数（varint）编码分块存储，
+     并维护分块索引（块首质数、块首序号、数据偏移），支持按序号或按数值 O(log n) 定位，
+     以及流式读取和转换回CSV
+
+文件格式:
+    数据文件 xxx.bin：8字节魔数 + 8字节块大小，随后依次是各块的间隔编码
+    索引文件 xxx.bin.idx：每块一条 24 字节记录 (块首质数, 块首序号, 块数据偏移)
+    块首质数只记在索引中，块内记录其余质数与前一个质数的间隔
+"""
+
+import argparse
+import csv
+import os
+import struct
+import time
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+MAGIC = b'PRMSTOR1'
+HEADER = struct.Struct('<8sQ')
+INDEX_RECORD = struct.Struct('<QQQ')
+
+# 每块的质数个数：越大索引越小，越小定位时需要解码的数据越少
+DEFAULT_BLOCK_SIZE = 4096
+
+
+def index_path(path):
+    """返回数据文件对应的索引文件路径"""
+    return path + '.idx'
+
+
+def encode_gaps(primes):
+    """
+    把升序质数序列编码为间隔 varint（不含第一个质数）
+
+    大于2的质数之间的间隔都是偶数，因此存储"间隔/2"，在万亿级别几乎都只占1个字节；
+    唯一的奇数间隔 2→3 原样存储（解码时根据前一个质数是否为2区分）。
+
+    参数:
+        primes: 升序的质数序列
+
+    返回:
+        编码后的 bytes
+    """
+    # 快速路径：所有"间隔/2"都能用1个字节表示时，用 NumPy 整块编码
+    if np is not None and len(primes) > 1 and 2 < primes[0] and primes[-1] < 2 ** 63:
+        half_gaps = np.diff(np.asarray(primes, dtype=np.int64)) >> 1
+        if half_gaps.max() < 0x80:
+            return half_gaps.astype(np.uint8).tobytes()
+
+    out = bytearray()
+    prev = None
+    for p in primes:
+        if prev is not None:
+            value = p - prev if prev == 2 else (p - prev) >> 1
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        prev = p
+    return bytes(out)
+
+
+def decode_gaps(first, data):
+    """
+    解码一个块：由块首质数和间隔编码还原出全部质数
+
+    参数:
+        first: 块首质数
+        data: 该块的间隔编码
+
+    返回:
+        升序的质数列表
+    """
+    primes = [first]
+    prev = first
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += value if prev == 2 else value << 1
+        primes.append(prev)
+        value = 0
+        shift = 0
+    return primes
+
+
+class PrimeStoreWriter:
+    """
+    流式写入二进制质数文件
+
+    timings 累计各阶段耗时（秒）：'format' 为间隔编码，'write' 为写入文件和落盘。
+
+    用法:
+        with PrimeStoreWriter('primes.bin') as writer:
+            writer.write([2, 3, 5, 7])
+    """
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE, first_ordinal=1, resume_offsets=None):
+        """
+        参数:
+            path: 数据文件路径（索引文件为 path + '.idx'）
+            block_size: 每块的质数个数
+            first_ordinal: 下一个写入的质数的序号
+            resume_offsets: (数据文件长度, 索引文件长度)；给出时截断到该长度并追加写入
+        """
+        self.path = path
+        self.next_ordinal = first_ordinal
+        self.timings = {'format': 0.0, 'write': 0.0}
+        self._pending = []
+
+        if resume_offsets is not None:
+            data_size, index_size = resume_offsets
+            os.truncate(path, data_size)
+            os.truncate(index_path(path), index_size)
+            self._data = open(path, 'r+b')
+            self._index = open(index_path(path), 'r+b')
+            _, self.block_size = HEADER.unpack(self._data.read(HEADER.size))
+            self._data.seek(data_size)
+            self._index.seek(index_size)
+        else:
+            self.block_size = block_size
+            self._data = open(path, 'wb')
+            self._index = open(index_path(path), 'wb')
+            self._data.write(HEADER.pack(MAGIC, block_size))
+
+    def write(self, primes):
+        """追加一批升序质数（必须大于已写入的所有质数）"""
+        pending = self._pending
+        pending.extend(primes)
+        if len(pending) >= self.block_size:
+            size = self.block_size
+            full = len(pending) - len(pending) % size
+            for i in range(0, full, size):
+                self._write_block(pending[i:i + size])
+            del pending[:full]
+
+    def _write_block(self, primes):
+        started = time.perf_counter()
+        data = encode_gaps(primes)
+        encoded = time.perf_counter()
+        self._index.write(INDEX_RECORD.pack(primes[0], self.next_ordinal, self._data.tell()))
+        self._data.write(data)
+        self.next_ordinal += len(primes)
+        self.timings['format'] += encoded - started
+        self.timings['write'] += time.perf_counter() - encoded
+
+    def flush(self):
+        """把未满一块的质数也作为一个（较短的）块写出"""
+        if self._pending:
+            self._write_block(self._pending)
+            self._pending = []
+        self._data.flush()
+        self._index.flush()
+
+    def sync(self):
+        """
+        写出全部缓冲内容并落盘
+
+        返回:
+            (数据文件长度, 索引文件长度)，可用于断点续传
+        """
+        self.flush()
+        started = time.perf_counter()
+        os.fsync(self._data.fileno())
+        os.fsync(self._index.fileno())
+        self.timings['write'] += time.perf_counter() - started
+        return self._data.tell(), self._index.tell()
+
+    def close(self):
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _IndexColumn:
+    """把索引文件的某一列包装成只读序列，供 bisect 直接在磁盘上二分查找"""
+
+    def __init__(self, reader, column):
+        self._reader = reader
+        self._column = column
+
+    def __len__(self):
+        return self._reader.block_count
+
+    def __getitem__(self, i):
+        return self._reader._record(i)[self._column]
+
+
+class PrimeStoreReader:
+    """
+    读取二进制质数文件
+
+    支持按序号取第n个质数、查找第一个不小于x的质数，以及顺序流式遍历。
+    索引在磁盘上二分查找，不需要整体载入内存。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = open(path, 'rb')
+        self._index = open(index_path(path), 'rb')
+
+        magic, self.block_size = HEADER.unpack(self._data.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"不是质数存储文件: {path}")
+
+        self._data_size = os.fstat(self._data.fileno()).st_size
+        self.block_count = os.fstat(self._index.fileno()).st_size // INDEX_RECORD.size
+        self._values = _IndexColumn(self, 0)
+        self._ordinals = _IndexColumn(self, 1)
+
+    def _record(self, i):
+        self._index.seek(i * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(self._index.read(INDEX_RECORD.size))
+
+    def read_block(self, i):
+        """
+        解码第 i 块
+
+        返回:
+            (块首序号, 该块的质数列表)
+        """
+        first, ordinal, offset = self._record(i)
+        stop = self._record(i + 1)[2] if i + 1 < self.block_count else self._data_size
+        self._data.seek(offset)
+        return ordinal, decode_gaps(first, self._data.read(stop - offset))
+
+    def __len__(self):
+        """文件中的质数总数"""
+        if self.block_count == 0:
+            return 0
+        ordinal, primes = self.read_block(self.block_count - 1)
+        first_ordinal = self._record(0)[1]
+        return ordinal + len(primes) - first_ordinal
+
+    def __iter__(self):
+        """按升序流式遍历全部质数"""
+        for i in range(self.block_count):
+            yield from self.read_block(i)[1]
+
+    def iter_blocks(self):
+        """按块流式遍历，生成 (块首序号, 质数列表)"""
+        for i in range(self.block_count):
+            yield self.read_block(i)
+
+    def nth_prime(self, n):
+        """
+        返回序号为 n 的质数（序号与写入时的CSV序号一致）
+
+        超出范围时抛出 IndexError
+        """
+        i = bisect_right(self._ordinals, n) - 1
+        if i >= 0:
+            ordinal, primes = self.read_block(i)
+            if n - ordinal < len(primes):
+                return primes[n - ordinal]
+        raise IndexError(f"序号 {n} 超出文件范围")
+
+    def first_at_least(self, x):
+        """
+        返回第一个不小于 x 的质数及其序号
+
+        返回:
+            (序号, 质数)；文件中没有不小于 x 的质数时返回 None
+        """
+        i = max(bisect_right(self._values, x) - 1, 0)
+        while i < self.block_count:
+            ordinal, primes = self.read_block(i)
+            if primes[-1] >= x:
+                k = bisect_right(primes, x - 1)
+                return ordinal + k, primes[k]
+            i += 1
+        return None
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def convert_to_csv(store_file, csv_file):
+    """
+    把二进制质数文件转换回CSV格式（与 find_primes_in_range 输出的CSV相同）
+
+    参数:
+        store_file: 二进制质数文件路径
+        csv_file: 输出CSV文件路径
+
+    返回:
+        写出的质数个数
+    """
+    count = 0
+    with PrimeStoreReader(store_file) as reader, \
+            open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        csv_writer = csv.writer(f)
+        csv_writer.writerow(['序号', '质数'])
+        for ordinal, primes in reader.iter_blocks():
+            csv_writer.writerows(zip(range(ordinal, ordinal + len(primes)), primes))
+            count += len(primes)
+    return count
+
+
+def main():
+    """
+    命令行：把二进制质数文件转换为CSV
+    """
+    parser = argparse.ArgumentParser(description='把二进制质数文件（.bin）转换为CSV')
+    parser.add_argument('store_file', help='二进制质数文件路径')
+    parser.add_argument('csv_file', help='输出CSV文件路径')
+    args = parser.parse_args()
+
+    count = convert_to_csv(args.store_file, args.csv_file)
+    print(f"已转换 {count:,} 个质数到 {args.csv_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享的小质数表
+功能：按需（第一次使用时）生成不超过某个上界（默认10^7）的全部质数，
+     以紧凑的 array('I') 保存在内存中，并缓存到磁盘，之后的运行直接读入；
+     分段筛法的基础质数等都从这里取，不必每次重新筛；
+     导入本模块不做任何计算
+
+磁盘缓存目录由环境变量 PRIME_TABLE_DIR 指定（默认 ~/.cache/prime_finder），设为空字符串则不缓存到磁盘。
+"""
+
+import math
+import os
+from array import array
+from bisect import bisect_right
+from itertools import compress
+
+
+# 质数表的默认上界：10^7 以内共 664,579 个质数，约 2.6 MB
+DEFAULT_TABLE_LIMIT = 10 ** 7
+
+TABLE_DIR_ENV = 'PRIME_TABLE_DIR'
+DEFAULT_TABLE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'prime_finder')
+
+# 已载入内存的质数表及其上界（第一次使用时才生成或读入）
+_table = None
+_table_limit = DEFAULT_TABLE_LIMIT
+
+
+def simple_sieve(limit):
+    """
+    用普通埃拉托斯特尼筛法求出不超过 limit 的所有质数
+
+    参数:
+        limit: 上界（包含）
+
+    返回:
+        升序的质数列表
+    """
+    if limit < 2:
+        return []
+
+    # flags[i] 对应奇数 2*i+1
+    size = (limit - 1) // 2 + 1
+    flags = bytearray([1]) * size
+    flags[0] = 0  # 1 不是质数
+
+    for i in range(1, (math.isqrt(limit) - 1) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 1
+            first = p * p // 2
+            flags[first::p] = bytes(len(range(first, size, p)))
+
+    return [2] + list(compress(range(1, limit + 1, 2), flags))
+
+
+def table_path(limit):
+    """返回上界为 limit 的质数表的磁盘缓存路径（不缓存到磁盘时为 None）"""
+    directory = os.environ.get(TABLE_DIR_ENV, DEFAULT_TABLE_DIR)
+    if not directory:
+        return None
+    return os.path.join(directory, f"primes_{limit}.u32")
+
+
+def _is_complete(table, limit):
+    """
+    检查从缓存读入的质数表是否恰好是不超过 limit 的全部质数（被截断的文件只保留了前面一部分）
+
+    表的最后一个质数必须是不超过 limit 的最大质数：(table[-1], limit] 内不能再有质数，
+    用表中的小质数试除这一段（质数间隔很小，完整的表只需检查几十个数）。
+    """
+    if not table or table[0] != 2 or table[-1] > limit:
+        return False
+    last = table[-1]
+    if last * last < limit:
+        return False  # (last, 2·last] 内必有质数（Bertrand 公设），表不完整
+    for n in range(last + 1, limit + 1):
+        if n % 2 and all(n % p for p in table[1:bisect_right(table, math.isqrt(n))]):
+            return False
+    return True
+
+
+def _load_table(limit):
+    """从磁盘缓存读入质数表；没有缓存、缓存损坏或不完整时现场生成并重写缓存"""
+    path = table_path(limit)
+    if path and os.path.exists(path):
+        table = array('I')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) % table.itemsize == 0:
+                table.frombytes(data)
+                if _is_complete(table, limit):
+                    return table
+        except (OSError, ValueError):
+            pass
+
+    table = array('I', simple_sieve(limit))
+    if path:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                table.tofile(f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # 缓存目录不可写时只保存在内存中
+    return table
+
+
+def set_table_limit(limit):
+    """
+    设置质数表的上界（在第一次使用之前调用；之后调用会在下次使用时按新上界重新载入）
+
+    参数:
+        limit: 上界（2 ≤ limit < 2^32）
+    """
+    global _table, _table_limit
+    if not 2 <= limit < 2 ** 32:
+        raise ValueError("质数表上界必须在 2 到 2^32 之间")
+    if limit != _table_limit:
+        _table = None
+        _table_limit = limit
+
+
+def prime_table():
+    """返回完整的质数表 array('I')（第一次调用时生成或从磁盘读入），调用方不应修改它"""
+    global _table
+    if _table is None:
+        _table = _load_table(_table_limit)
+    return _table
+
+
+def primes_up_to(limit):
+    """
+    返回不超过 limit 的全部质数
+
+    limit 不超过质数表上界时直接从表中切出；否则现场筛选（不缓存）。
+
+    参数:
+        limit: 上界（包含）
+
+    返回:
+        升序质数的 array（limit < 2^32 时为 'I'，否则为 'Q'）
+    """
+    if limit <= _table_limit:
+        table = prime_table()
+        return table[:bisect_right(table, limit)]
+    return array('I' if limit < 2 ** 32 else 'Q', simple_sieve(limit))
+
+
+def table_limit():
+    """返回质数表的上界"""
+    return _table_limit
+
+
+def table_loaded():
+    """质数表是否已经载入内存（查询规划器据此判断查表是否还有载入开销）"""
+    return _table is not None
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+质数输出写入器
+功能：把升序质数写成CSV（可选 gzip/lzma 压缩）或二进制质数文件，
+     并可放到后台线程中执行：计算线程只把批次放进有界队列，
+     格式化、压缩和磁盘写入都在写入线程完成；队列满时计算线程等待（背压），内存占用有上限
+"""
+
+import csv
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+import time
+
+from prime_store import PrimeStoreWriter
+
+
+# 支持的压缩方式及对应的文件扩展名
+COMPRESSIONS = {'gzip': '.gz', 'lzma': '.xz'}
+
+# 压缩级别：质数表的压缩率在较低级别就已接近最好，更高的级别只会让写入线程跟不上计算
+GZIP_LEVEL = 6
+LZMA_PRESET = 1
+
+# 底层文件的写缓冲大小
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+class CsvPrimeWriter:
+    """
+    把质数写成 "序号,质数" 的CSV文件，可选 gzip/lzma 压缩
+
+    压缩时每次 sync() 都会结束当前的压缩流（gzip member / xz stream）再开始新的一个，
+    因此 sync() 返回的字节偏移总落在流的边界上，截断到该处后文件仍然完整可读
+    （gzip 和 xz 都支持多个流首尾相接）。
+
+    timings 累计各阶段耗时（秒）：'format' 为生成CSV文本，'write' 为编码、压缩、写入和落盘。
+    """
+
+    def __init__(self, path, compression=None, first_ordinal=1, resume_offset=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        参数:
+            path: 输出文件路径
+            compression: None、'gzip' 或 'lzma'
+            first_ordinal: 下一个写入的质数的序号
+            resume_offset: 续传时的文件长度；给出时截断到该长度并追加写入，不再写标题行
+            buffer_size: 底层文件的写缓冲大小
+        """
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+
+        self.compression = compression
+        self.next_ordinal = first_ordinal
+        self.timings = {'format': 0.0, 'write': 0.0}
+        # 每批先格式化到内存中的文本，再一次性编码写出
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text)
+
+        if resume_offset is not None:
+            os.truncate(path, resume_offset)
+            self._raw = open(path, 'ab', buffering=buffer_size)
+        else:
+            self._raw = open(path, 'wb', buffering=buffer_size)
+        self._open_stream()
+
+        if resume_offset is None:
+            self._csv.writerow(['序号', '质数'])
+            self._flush_text()
+
+    def _open_stream(self):
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=GZIP_LEVEL)
+        elif self.compression == 'lzma':
+            self._stream = lzma.LZMAFile(self._raw, 'wb', preset=LZMA_PRESET)
+        else:
+            self._stream = self._raw
+
+    def _close_stream(self):
+        if self._stream is not self._raw:
+            # 结束当前压缩流（不会关闭底层文件）
+            self._stream.close()
+
+    def _flush_text(self):
+        """把已格式化的文本编码后写入（压缩）流"""
+        text = self._text
+        data = text.getvalue().encode('utf-8')
+        text.seek(0)
+        text.truncate()
+        self._stream.write(data)
+
+    def write(self, primes):
+        """追加一批升序质数"""
+        started = time.perf_counter()
+        ordinal = self.next_ordinal
+        self._csv.writerows(zip(range(ordinal, ordinal + len(primes)), primes))
+        self.next_ordinal = ordinal + len(primes)
+        formatted = time.perf_counter()
+        self._flush_text()
+        timings = self.timings
+        timings['format'] += formatted - started
+        timings['write'] += time.perf_counter() - formatted
+
+    def sync(self):
+        """
+        写出全部缓冲内容并落盘
+
+        返回:
+            (文件长度, None)，可用于断点续传
+        """
+        started = time.perf_counter()
+        self._close_stream()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        offset = self._raw.tell()
+        self._open_stream()
+        self.timings['write'] += time.perf_counter() - started
+        return offset, None
+
+    def close(self):
+        self._close_stream()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NullPrimeWriter:
+    """不输出任何内容的写入器，用于只做统计（见 prime_analytics）的遍历"""
+
+    def __init__(self):
+        self.timings = {'format': 0.0, 'write': 0.0}
+
+    def write(self, primes):
+        pass
+
+    def sync(self):
+        return 0, None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    把任意写入器（CsvPrimeWriter / PrimeStoreWriter）放到后台线程中执行
+
+    write() 只把批次放入有界队列就返回；队列满时阻塞，从而限制内存占用。
+    写入线程中发生的异常会在下一次 write() / sync() / close() 时在调用方重新抛出。
+    timings 为被包装写入器的累计耗时（在写入线程中累计）。
+    """
+
+    def __init__(self, writer, max_queue=16):
+        """
+        参数:
+            writer: 被包装的写入器，需提供 write(primes)、sync()、close()
+            max_queue: 队列中最多缓存的批次数
+        """
+        self._writer = writer
+        self._queue = queue.Queue(max_queue)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='prime-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            kind, payload = item
+            try:
+                if self._error is None:
+                    if kind == 'write':
+                        self._writer.write(payload)
+                    else:
+                        payload['result'] = self._writer.sync()
+            except BaseException as e:
+                # 出错后继续取走队列中的批次，避免计算线程在 put() 上永远阻塞
+                self._error = e
+            finally:
+                if kind == 'sync':
+                    payload['done'].set()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    @property
+    def timings(self):
+        """被包装写入器的各阶段累计耗时"""
+        return self._writer.timings
+
+    @property
+    def queue_depth(self):
+        """当前队列中等待写入的批次数"""
+        return self._queue.qsize()
+
+    def write(self, primes):
+        """把一批升序质数交给写入线程（队列满时阻塞）"""
+        self._raise_error()
+        self._queue.put(('write', primes))
+
+    def sync(self):
+        """等待队列中的批次全部写完并落盘，返回被包装写入器 sync() 的结果"""
+        request = {'done': threading.Event(), 'result': None}
+        self._queue.put(('sync', request))
+        request['done'].wait()
+        self._raise_error()
+        return request['result']
+
+    def close(self):
+        """写完队列中的全部批次，停止写入线程并关闭文件"""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._writer.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_prime_writer(path, output_format='csv', compression=None, first_ordinal=1, resume_offsets=None,
+                      max_queue=16):
+    """
+    按输出格式创建写入器
+
+    参数:
+        path: 输出文件路径（None表示不输出，返回 NullPrimeWriter）
+        output_format: 'csv' 或 'bin'
+        compression: CSV 的压缩方式（None、'gzip'、'lzma'）；二进制格式不支持压缩
+        first_ordinal: 下一个写入的质数的序号
+        resume_offsets: 续传时检查点记录的 (文件长度, 索引文件长度)；None表示新建文件
+        max_queue: 后台写入队列的长度；0 表示不使用后台线程，直接在调用线程中写入
+
+    返回:
+        写入器，提供 write(primes)、sync()、close()，也可作为上下文管理器使用
+    """
+    if path is None:
+        return NullPrimeWriter()
+    if output_format == 'bin':
+        if compression is not None:
+            raise ValueError("二进制格式已经是紧凑编码，不支持再压缩")
+        writer = PrimeStoreWriter(path, first_ordinal=first_ordinal, resume_offsets=resume_offsets)
+    else:
+        writer = CsvPrimeWriter(path, compression, first_ordinal,
+                                resume_offset=resume_offsets[0] if resume_offsets else None)
+
+    if max_queue > 0:
+        return BackgroundWriter(writer, max_queue)
+    return writer
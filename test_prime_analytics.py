@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试流式质数统计
+"""
+
+import json
+import os
+from collections import Counter
+
+import prime_analytics
+from prime_analytics import Constellations, PrimeAnalytics, ResidueClasses, analyze_range, default_reducers
+from prime_primality import is_prime
+from prime_range_finder import find_primes_in_range
+from prime_sieve import iter_prime_chunks
+
+
+def brute_force(primes, moduli=(6,)):
+    """由完整的质数列表直接算出各项统计"""
+    members = set(primes)
+    gaps = Counter(b - a for a, b in zip(primes, primes[1:]))
+    first = {}
+    for a, b in zip(primes, primes[1:]):
+        first.setdefault(b - a, a)
+    maximal = []
+    for a, b in zip(primes, primes[1:]):
+        if not maximal or b - a > maximal[-1][1]:
+            maximal.append((a, b - a))
+    result = {
+        'count': len(primes),
+        'gaps': dict(sorted(gaps.items())),
+        'records': {'first': dict(sorted(first.items())), 'maximal': maximal},
+        'constellations': {name: sum(all(p + d in members for d in offsets) for p in primes)
+                           for name, offsets in prime_analytics.CONSTELLATIONS.items()},
+    }
+    for m in moduli:
+        result[f'mod{m}'] = dict(sorted(Counter(p % m for p in primes).items()))
+    return result
+
+
+def strip_range(result):
+    return {key: value for key, value in result.items() if key not in ('lo', 'hi')}
+
+
+def test_single_pass():
+    """测试逐段统计的结果与完整列表直接计算的结果相同"""
+    print("测试逐段统计:")
+    print("-" * 40)
+
+    test_cases = [
+        (0, 20000, 64),
+        (2, 9, 64),                        # 包含 2, 3, 5, 7 的四元组边界情况
+        (10**12, 10**12 + 30000, 128),
+        (2**64 - 20000, 2**64 + 20000, 512),  # 超过 2^64：Python 整数路径
+    ]
+    moduli = (4, 6, 30)
+
+    for start, end, segment_bytes in test_cases:
+        primes = [n for n in range(start, end + 1) if is_prime(n)]
+        expected = brute_force(primes, moduli)
+
+        analytics = PrimeAnalytics(default_reducers(moduli))
+        if end < 2**64:
+            chunks = iter_prime_chunks(start, end, segment_bytes=segment_bytes)
+            for chunk in chunks:
+                analytics.update(chunk)
+        else:
+            # 每 7 个质数一块交给统计
+            for i in range(0, len(primes), 7):
+                analytics.update(primes[i:i + 7], primes[i], primes[min(i + 7, len(primes)) - 1] + 1)
+
+        ok = strip_range(analytics.result()) == expected
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]: {len(primes)} 个质数，"
+              f"孪生 {expected['constellations']['twin']}，四元组 {expected['constellations']['quadruplet']}")
+        assert ok
+
+    print()
+
+
+def test_python_fallback():
+    """测试没有 NumPy 时的纯 Python 归约结果相同"""
+    print("测试纯 Python 归约:")
+    print("-" * 40)
+
+    primes = [n for n in range(10**9, 10**9 + 20000) if is_prime(n)]
+    expected = brute_force(primes)
+    saved = prime_analytics.np
+    prime_analytics.np = None
+    try:
+        analytics = PrimeAnalytics()
+        for i in range(0, len(primes), 50):
+            analytics.update(primes[i:i + 50], 0, 0)
+    finally:
+        prime_analytics.np = saved
+    ok = strip_range(analytics.result()) == expected
+    print(f"{'✓' if ok else '✗'} {len(primes)} 个质数")
+    assert ok
+
+    print()
+
+
+def test_merge_shards():
+    """测试分片状态合并后与一次性统计相同，切分点落在质数组中间也不重复、不遗漏"""
+    print("测试分片合并:")
+    print("-" * 40)
+
+    start, end = 0, 5000
+    primes = [n for n in range(start, end + 1) if is_prime(n)]
+    expected = brute_force(primes)
+
+    # 1871, 1873, 1877, 1879 是一个质数四元组，在它内部的每个位置切开
+    cuts_list = [[1872], [1874], [1876, 1878], [1878, 1880], list(range(100, 5000, 37)), [3, 4, 5, 6, 7, 8]]
+    for cuts in cuts_list:
+        bounds = [start] + cuts + [end + 1]
+        merged = PrimeAnalytics(lo=start)
+        for lo, hi in zip(bounds, bounds[1:]):
+            shard = PrimeAnalytics(lo=lo)
+            shard.update([p for p in primes if lo <= p < hi], lo, hi)
+            # 经过 JSON 往返后再合并
+            merged.merge(PrimeAnalytics.from_dict(json.loads(json.dumps(shard.to_dict()))))
+        ok = strip_range(merged.result()) == expected
+        print(f"{'✓' if ok else '✗'} 切成 {len(bounds) - 1} 片（含空分片）")
+        assert ok
+
+    try:
+        PrimeAnalytics(lo=0).merge(PrimeAnalytics(lo=10))
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"{'✓' if ok else '✗'} 拒绝合并不相邻的范围")
+    assert ok
+
+    try:
+        PrimeAnalytics([ResidueClasses(6)]).merge(PrimeAnalytics([ResidueClasses(4)]))
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"{'✓' if ok else '✗'} 拒绝合并归约器不同的状态")
+    assert ok
+
+    try:
+        Constellations({'wide': (0, 12)})
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"{'✓' if ok else '✗'} 拒绝跨度超过8的质数组")
+    assert ok
+
+    print()
+
+
+def test_analyze_range():
+    """测试按分片（单进程和多进程）统计整个范围"""
+    print("测试 analyze_range:")
+    print("-" * 40)
+
+    start, end = 10**10 + 1, 10**10 + 60001
+    expected = brute_force([n for n in range(start, end + 1) if is_prime(n)])
+    for workers, shards in [(1, None), (1, 7), (2, None)]:
+        analytics = analyze_range(start, end, workers=workers, shards=shards, segment_bytes=1024)
+        ok = strip_range(analytics.result()) == expected and (analytics.lo, analytics.hi) == (start, end + 1)
+        print(f"{'✓' if ok else '✗'} workers={workers}, shards={shards}: {analytics.count} 个质数")
+        assert ok
+
+    print()
+
+
+def test_find_primes_analytics():
+    """测试 find_primes_in_range 的统计模式：不输出质数，可从检查点继续"""
+    print("测试遍历时统计:")
+    print("-" * 40)
+
+    start, end = 10**12, 10**12 + 40000
+    expected = brute_force([n for n in range(start, end + 1) if is_prime(n)])
+
+    analytics = PrimeAnalytics()
+    find_primes_in_range(start, end, None, progress_interval=10**9, segment_bytes=512, analytics=analytics)
+    ok = strip_range(analytics.result()) == expected
+    print(f"{'✓' if ok else '✗'} 不输出质数时统计正确: {analytics.count} 个质数")
+    assert ok
+
+    # 写 CSV 的同时统计
+    output_file = "test_analytics.csv"
+    analytics = PrimeAnalytics()
+    find_primes_in_range(start, end, output_file, progress_interval=10**9, segment_bytes=512, analytics=analytics)
+    with open(output_file, encoding='utf-8') as f:
+        rows = sum(1 for _ in f) - 1
+    os.remove(output_file)
+    ok = strip_range(analytics.result()) == expected and rows == expected['count']
+    print(f"{'✓' if ok else '✗'} 写CSV的同时统计")
+    assert ok
+
+    # 从中途的检查点继续：统计状态随检查点恢复
+    checkpoint_file = "test_analytics.ckpt"
+    middle = 10**12 + 20000
+    first = PrimeAnalytics()
+    find_primes_in_range(start, middle - 1, None, progress_interval=10**9, segment_bytes=512,
+                         checkpoint_file=checkpoint_file, analytics=first)
+    with open(checkpoint_file, encoding='utf-8') as f:
+        state = json.load(f)
+    state['end'] = end
+    with open(checkpoint_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    resumed = PrimeAnalytics()
+    find_primes_in_range(start, end, None, progress_interval=10**9, segment_bytes=512,
+                         checkpoint_file=checkpoint_file, resume=True, analytics=resumed)
+    os.remove(checkpoint_file)
+    ok = strip_range(resumed.result()) == expected
+    print(f"{'✓' if ok else '✗'} 从检查点 {middle:,} 继续后统计正确")
+    assert ok
+
+    # 最多 N 个质数时只统计这些质数
+    analytics = PrimeAnalytics()
+    find_primes_in_range(start, end, None, max_primes=25, progress_interval=10**9, segment_bytes=512,
+                         analytics=analytics)
+    ok = analytics.count == 25
+    print(f"{'✓' if ok else '✗'} 质数数量限制: {analytics.count} 个")
+    assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_single_pass()
+    test_python_fallback()
+    test_merge_shards()
+    test_analyze_range()
+    test_find_primes_analytics()
+    print("=" * 50)
+    print("所有测试完成！")
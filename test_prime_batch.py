@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试乘积树 / 余数树批量去除小质因数
+"""
+
+import random
+
+from prime_batch import (batch_factorize, batch_is_prime, product_tree, remainder_tree, smooth_parts,
+                         strip_small_factors)
+from prime_factorizer import factorize
+from prime_primality import is_prime
+from prime_table import simple_sieve
+
+
+def test_trees():
+    """测试乘积树的根和余数树的结果"""
+    print("测试乘积树 / 余数树:")
+    print("-" * 40)
+
+    values = [3, 10, 7, 1000003, 12, 99991, 5]
+    tree = product_tree(values)
+    x = 2 ** 200 + 12345
+    ok = tree[-1] == [3 * 10 * 7 * 1000003 * 12 * 99991 * 5] and remainder_tree(x, tree) == [x % v for v in values]
+    print(f"{'✓' if ok else '✗'} {len(values)} 个叶子，{len(tree)} 层")
+    assert ok
+
+    print()
+
+
+def test_smooth_parts():
+    """测试光滑部分、去除小质因数与逐个试除一致（块边界、高次幂）"""
+    print("测试批量去除小质因数:")
+    print("-" * 40)
+
+    rng = random.Random(1)
+    numbers = [rng.getrandbits(rng.choice((20, 64, 150))) + 1 for _ in range(600)]
+    numbers += [1, 2, 2 ** 100, 3 ** 40 * 1009 ** 3, 1000003 ** 2]
+
+    small_primes = simple_sieve(1000)
+    expected = []
+    for n in numbers:
+        factors = {}
+        for p in small_primes:
+            while n % p == 0:
+                n //= p
+                factors[p] = factors.get(p, 0) + 1
+        expected.append((factors, n))
+    ok = smooth_parts(numbers, limit=1000, block_size=64) == [n // rest for n, (_, rest) in zip(numbers, expected)]
+    print(f"{'✓' if ok else '✗'} {len(numbers)} 个数的 1000-光滑部分")
+    assert ok
+
+    ok = strip_small_factors(numbers, limit=1000, block_size=64) == expected
+    print(f"{'✓' if ok else '✗'} 去除后余下的因子不含小质因数")
+    assert ok
+
+    print()
+
+
+def test_batch_results():
+    """测试批量分解和批量判断与逐个计算的结果相同"""
+    print("测试批量分解 / 批量判断:")
+    print("-" * 40)
+
+    rng = random.Random(2)
+    numbers = [rng.getrandbits(40) + 1 for _ in range(300)] + [65521 * 65537, 65537 ** 2, 2 ** 64 + 1]
+    ok = batch_factorize(numbers, block_size=50) == [factorize(n) for n in numbers]
+    print(f"{'✓' if ok else '✗'} 批量分解 {len(numbers)} 个数")
+    assert ok
+
+    candidates = [rng.getrandbits(rng.choice((30, 100, 200))) | 1 for _ in range(300)]
+    candidates += [-7, 0, 1, 2, 2 ** 127 - 1, 2 ** 521 - 1, 2 ** 128 + 1]
+    ok = batch_is_prime(candidates) == [is_prime(n) for n in candidates]
+    print(f"{'✓' if ok else '✗'} 批量判断 {len(candidates)} 个数，其中 {sum(batch_is_prime(candidates))} 个质数")
+    assert ok
+
+    ok = batch_is_prime([7, 8, 1, 2 ** 61 - 1]) == [True, False, False, True] and batch_is_prime([]) == []
+    print(f"{'✓' if ok else '✗'} 没有需要预筛的大数")
+    assert ok
+
+    try:
+        batch_factorize([12, 0])
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"{'✓' if ok else '✗'} 非正整数被拒绝")
+    assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_trees()
+    test_smooth_parts()
+    test_batch_results()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试基准测试工具的结果比较
+"""
+
+import json
+import os
+import sys
+import tempfile
+import types
+
+import prime_benchmark
+from prime_benchmark import DEFAULT_BASELINE, build_scenarios, compare_with_baseline, measure, run_gates
+
+
+def test_compare_with_baseline():
+    """测试回归判断：只有变慢超过阈值的场景才算回归"""
+    print("测试与基准比较:")
+    print("-" * 40)
+
+    baseline = [
+        {'name': 'a', 'rate': 1000.0},
+        {'name': 'b', 'rate': 1000.0},
+        {'name': 'c', 'rate': 1000.0},
+    ]
+    results = [
+        {'name': 'a', 'rate': 900.0},    # 慢约11%，在阈值内
+        {'name': 'b', 'rate': 500.0},    # 慢100%，回归
+        {'name': 'c', 'rate': 2000.0},   # 变快
+        {'name': 'd', 'rate': 1.0},      # 基准中没有，忽略
+    ]
+
+    regressions = compare_with_baseline(results, baseline, threshold=0.2)
+    names = [item['name'] for item in regressions]
+    status = "✓" if names == ['b'] else "✗"
+    print(f"{status} 回归场景: {names}")
+    assert names == ['b']
+    assert abs(regressions[0]['slowdown'] - 1.0) < 1e-9
+
+    for threshold, expected in ((0.0, ['a', 'b']), (0.12, ['b']), (1.0, []), (-0.6, ['a', 'b', 'c'])):
+        names = [item['name'] for item in compare_with_baseline(results, baseline, threshold)]
+        ok = names == expected
+        print(f"{'✓' if ok else '✗'} 阈值 {threshold:.0%}: 回归场景 {names}")
+        assert ok
+
+    ok = compare_with_baseline([{'name': 'a', 'rate': 1.0}], [{'name': 'a', 'rate': 0.0}], 0.2) == []
+    print(f"{'✓' if ok else '✗'} 基准吞吐量为0的场景不参与比较")
+    assert ok
+
+    print()
+
+
+def run_main(*argv):
+    """以给定的命令行参数运行 main，返回退出码（正常结束为0）"""
+    saved = sys.argv
+    sys.argv = ['prime_benchmark.py', *argv]
+    try:
+        prime_benchmark.main()
+        return 0
+    except SystemExit as e:
+        return e.code
+    finally:
+        sys.argv = saved
+
+
+def test_regression_exit_code():
+    """测试命令行：场景比基准慢超过阈值时返回非零退出码"""
+    print("测试回归检查的退出码:")
+    print("-" * 40)
+
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        for rate, expected in ((1e12, 1), (1e-3, 0)):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'quick': True, 'results': [{'name': 'is_prime/1e6', 'rate': rate}]}, f)
+            code = run_main('--quick', '--skip-gates', '--repeat', '1', '--filter', 'is_prime/1e6',
+                            '--baseline', path)
+            ok = code == expected
+            print(f"{'✓' if ok else '✗'} 基准吞吐量 {rate:g}: 退出码 {code}")
+            assert ok
+
+        code = run_main('--skip-gates', '--repeat', '1', '--filter', 'is_prime/1e6', '--baseline', path)
+        ok = code == 2
+        print(f"{'✓' if ok else '✗'} 基准与本次的 --quick 设置不同时拒绝比较")
+        assert ok
+    finally:
+        os.remove(path)
+
+    print()
+
+
+def test_committed_baseline():
+    """测试仓库中的基准覆盖全部 --quick 场景"""
+    with open(DEFAULT_BASELINE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    names = {item['name'] for item in baseline['results']}
+    ok = (baseline['quick'] and all(name in names for name, _, _ in build_scenarios(quick=True))
+          and all(item['rate'] > 0 for item in baseline['results']))
+    print(f"{'✓' if ok else '✗'} {DEFAULT_BASELINE}: {len(names)} 个场景")
+    assert ok
+
+
+def test_run_gates():
+    """测试正确性门槛：失败的测试报告错误信息，测试的打印输出被屏蔽"""
+    print("测试正确性门槛:")
+    print("-" * 40)
+
+    module = types.ModuleType('fake_gate_module')
+
+    def test_pass():
+        print("不应出现在输出中")
+
+    def test_fail():
+        assert 1 + 1 == 3, "故意失败"
+
+    module.test_pass = test_pass
+    module.test_fail = test_fail
+    module.helper = lambda: None
+    sys.modules[module.__name__] = module
+    try:
+        gates = run_gates([module.__name__])
+    finally:
+        del sys.modules[module.__name__]
+
+    ok = (sorted(gates) == ['fake_gate_module.test_fail', 'fake_gate_module.test_pass']
+          and gates['fake_gate_module.test_pass'] == 'passed'
+          and 'AssertionError' in gates['fake_gate_module.test_fail'] and '故意失败' in gates['fake_gate_module.test_fail'])
+    print(f"{'✓' if ok else '✗'} 通过的测试记为 passed，失败的测试记下错误信息")
+    assert ok
+
+    print()
+
+
+def test_measure():
+    """测试测量结果的字段"""
+    result = measure('noop', 10, lambda: None, repeat=2)
+    assert result['name'] == 'noop' and result['units'] == 10
+    assert result['seconds'] >= 0 and result['rate'] > 0
+
+
+if __name__ == "__main__":
+    test_compare_with_baseline()
+    test_regression_exit_code()
+    test_committed_baseline()
+    test_run_gates()
+    test_measure()
+    print("=" * 50)
+    print("所有测试完成！")
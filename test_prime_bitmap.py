@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试质数位图
+"""
+
+import os
+
+from prime_bitmap import PrimeBitmap, build_bitmap
+from prime_primality import is_prime
+from prime_sieve import BACKENDS, simple_sieve
+
+
+def test_small_range():
+    """测试从0开始的小范围：逐个比较 is_prime，以及 2、3、5 和范围边界"""
+    print("测试小范围位图:")
+    print("-" * 40)
+
+    test_file = "test_small.bitmap"
+    count = build_bitmap(test_file, 0, 10000, segment_bytes=256)
+
+    with PrimeBitmap(test_file) as bitmap:
+        mismatches = [n for n in range(-5, 10100) if bitmap.is_prime(n) != is_prime(n)]
+        print(f"{'✓' if not mismatches else '✗'} [{bitmap.lo}, {bitmap.hi}) 记录 {count} 个质数，"
+              f"与 is_prime 不一致 {len(mismatches)} 个")
+        assert not mismatches and count == len(simple_sieve(bitmap.hi - 1)) - 3
+
+        cases = [
+            (bitmap.next_prime(-3), 2), (bitmap.next_prime(2), 3), (bitmap.next_prime(5), 7),
+            (bitmap.next_prime(7), 11), (bitmap.next_prime(10000), 10007),
+            (bitmap.prev_prime(2), None), (bitmap.prev_prime(3), 2), (bitmap.prev_prime(7), 5),
+            (bitmap.prev_prime(8), 7), (bitmap.prev_prime(10007), 9973),
+        ]
+        ok = all(result == expected for result, expected in cases)
+        print(f"{'✓' if ok else '✗'} next_prime / prev_prime 边界: {[result for result, _ in cases]}")
+        assert ok
+
+    os.remove(test_file)
+    print()
+
+
+def test_trillion_range():
+    """测试 10^12 附近的位图：所有后端、单进程与多进程生成的文件相同，查询与逐个测试一致"""
+    print("测试万亿级别位图:")
+    print("-" * 40)
+
+    start, end = 10**12 + 7, 10**12 + 200000
+    contents = []
+    for backend in BACKENDS:
+        for workers in (1, 2):
+            test_file = f"test_{backend}_{workers}.bitmap"
+            build_bitmap(test_file, start, end, workers=workers, segment_bytes=4096, backend=backend)
+            with open(test_file, 'rb') as f:
+                contents.append(f.read())
+            os.remove(test_file)
+    ok = all(content == contents[0] for content in contents)
+    print(f"{'✓' if ok else '✗'} {len(contents)} 种生成方式结果相同")
+    assert ok
+
+    test_file = "test_trillion.bitmap"
+    build_bitmap(test_file, start, end)
+    with PrimeBitmap(test_file) as bitmap:
+        numbers = list(range(bitmap.lo - 300, bitmap.lo + 3000)) + list(range(bitmap.hi - 3000, bitmap.hi + 300))
+        mismatches = [n for n in numbers if bitmap.is_prime(n) != is_prime(n)]
+        print(f"{'✓' if not mismatches else '✗'} 范围两端内外 {len(numbers)} 个数与 is_prime 一致")
+        assert not mismatches
+
+        walked = []
+        p = bitmap.lo - 100
+        while p < bitmap.hi + 100:
+            p = bitmap.next_prime(p)
+            walked.append(p)
+        expected = [n for n in range(bitmap.lo - 99, walked[-1] + 1) if is_prime(n)]
+        back = [bitmap.prev_prime(q) for q in walked[1:]]
+        ok = walked == expected and back == walked[:-1]
+        print(f"{'✓' if ok else '✗'} 用 next_prime 逐个遍历 {len(walked)} 个质数，prev_prime 逐个回退")
+        assert ok
+
+    os.remove(test_file)
+    print()
+
+
+if __name__ == "__main__":
+    test_small_range()
+    test_trillion_range()
+    print("=" * 50)
+    print("所有测试完成！")
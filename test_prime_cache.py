@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试质因数分解结果缓存
+"""
+
+import os
+from multiprocessing import Pool
+
+import prime_checker
+from prime_bitmap import PrimeBitmap, build_bitmap
+from prime_cache import FLUSH_INTERVAL, FactorizationCache
+from prime_factorizer import factorize
+
+CACHE_FILE = "test_cache.sqlite"
+BITMAP_FILE = "test_cache.bitmap"
+
+
+def _remove_cache_file():
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(CACHE_FILE + suffix):
+            os.remove(CACHE_FILE + suffix)
+
+
+def _factorize_range(bounds):
+    """子进程任务：用同一个缓存文件分解一段数字"""
+    lo, hi = bounds
+    with FactorizationCache(CACHE_FILE) as cache:
+        return [cache.factorize(n) == factorize(n) for n in range(lo, hi)]
+
+
+def test_memory_lru():
+    """测试进程内 LRU：结果正确、命中计数、按容量淘汰"""
+    print("测试进程内缓存:")
+    print("-" * 40)
+
+    cache = FactorizationCache(max_entries=100)
+    ok = (cache.factorize(360) == {2: 3, 3: 2, 5: 1} and cache.divisors(12) == [1, 2, 3, 4, 6, 12]
+          and cache.prime_factors(60) == [2, 2, 3, 5] and cache.is_prime(97) and not cache.is_prime(91)
+          and not cache.is_prime(1) and cache.factorize(1) == {})
+    print(f"{'✓' if ok else '✗'} 分解、因数、质因数和质数判断结果正确")
+    assert ok
+
+    for n in range(2, 300):
+        cache.factorize(n)
+    for n in range(250, 300):
+        cache.factorize(n)
+    ok = len(cache._memory) == 100 and cache.stats['hits'] >= 50 and cache.stats['evictions'] > 0
+    print(f"{'✓' if ok else '✗'} 容量100: {cache.stats}")
+    assert ok
+
+    print()
+
+
+def test_persistent_store():
+    """测试持久化：新实例从磁盘命中，磁盘按容量淘汰"""
+    print("测试持久化缓存:")
+    print("-" * 40)
+
+    _remove_cache_file()
+    big = 1000000016000000063
+    with FactorizationCache(CACHE_FILE) as cache:
+        cache.factorize(big)
+        cache.is_prime(1000000007)
+        cache.is_prime(1000000008)
+
+    with FactorizationCache(CACHE_FILE) as cache:
+        ok = (cache.factorize(big) == {1000000007: 1, 1000000009: 1} and cache.is_prime(1000000007)
+              and not cache.is_prime(1000000008) and cache.stats['disk_hits'] == 3 and cache.stats['misses'] == 0)
+        print(f"{'✓' if ok else '✗'} 新实例从磁盘读到之前的结果（包括合数结论）")
+        assert ok
+
+        ok = cache.factorize(1000000008) == factorize(1000000008) and cache.stats['misses'] == 1
+        print(f"{'✓' if ok else '✗'} 只有合数结论的数字在分解时重新计算")
+        assert ok
+
+    with FactorizationCache(CACHE_FILE) as cache:
+        db = cache._db()
+        before = db.total_changes
+        ok = cache.factorize(big) and cache.factorize(1000000008) and db.total_changes == before
+        print(f"{'✓' if ok else '✗'} 磁盘命中不立即写入")
+        assert ok
+
+        for n in range(2, 2 + FLUSH_INTERVAL - 3):
+            cache.factorize(n)
+        ok = db.total_changes == before
+        cache.factorize(10**6)
+        ok = ok and db.total_changes > before and not cache._pending and not cache._touched
+        print(f"{'✓' if ok else '✗'} 攒够 {FLUSH_INTERVAL} 次写入后在一个事务中写入")
+        assert ok
+        cache.factorize(10**6 + 1)
+    with FactorizationCache(CACHE_FILE) as cache:
+        ok = cache.factorize(10**6 + 1) == factorize(10**6 + 1) and cache.stats['disk_hits'] == 1
+    print(f"{'✓' if ok else '✗'} 关闭时写入剩余的结果")
+    assert ok
+
+    with FactorizationCache(CACHE_FILE, max_disk_entries=500) as cache:
+        for n in range(2, 3000):
+            cache.factorize(n)
+        cache.evict()
+        count = cache._db().execute('SELECT COUNT(*) FROM factorizations').fetchone()[0]
+        kept = cache._db().execute("SELECT 1 FROM factorizations WHERE n = '2999'").fetchone()
+    ok = count == 500 and kept is not None
+    print(f"{'✓' if ok else '✗'} 磁盘容量500: 剩余 {count} 条，最近使用的仍保留")
+    assert ok
+
+    _remove_cache_file()
+    limit = 256 * 1024
+    with FactorizationCache(CACHE_FILE, max_disk_bytes=limit) as cache:
+        for n in range(10**12, 10**12 + 20000):
+            cache.factorize(n)
+        cache.evict()
+        usage = cache.disk_usage()
+        kept = cache._db().execute("SELECT 1 FROM factorizations WHERE n = ?", (str(10**12 + 19999),)).fetchone()
+        size = os.path.getsize(CACHE_FILE)
+    ok = usage <= limit and kept is not None and size <= 2 * limit and cache.stats['disk_evictions'] > 0
+    print(f"{'✓' if ok else '✗'} 磁盘容量 {limit} 字节: 已用 {usage} 字节，文件 {size} 字节")
+    assert ok
+
+    _remove_cache_file()
+    print()
+
+
+def test_concurrent_processes():
+    """测试多个进程同时读写同一个缓存文件"""
+    print("测试多进程并发访问:")
+    print("-" * 40)
+
+    _remove_cache_file()
+    with Pool(3) as pool:
+        results = pool.map(_factorize_range, [(10**12, 10**12 + 300), (10**12 + 100, 10**12 + 400)] * 3)
+    with FactorizationCache(CACHE_FILE) as cache:
+        count = cache._db().execute('SELECT COUNT(*) FROM factorizations').fetchone()[0]
+    ok = all(all(part) for part in results) and count == 400
+    print(f"{'✓' if ok else '✗'} 3个进程、6个任务: 结果全部正确，缓存中 {count} 条")
+    assert ok
+
+    _remove_cache_file()
+    print()
+
+
+def test_checker_integration():
+    """测试 prime_checker 启用缓存后重复查询命中"""
+    print("测试 prime_checker 启用缓存:")
+    print("-" * 40)
+
+    cache = prime_checker.enable_cache()
+    try:
+        first = prime_checker.get_all_factors(1000000016000000063)
+        second = prime_checker.get_prime_factors(1000000016000000063)
+        ok = (first == [1, 1000000007, 1000000009, 1000000016000000063] and second == [1000000007, 1000000009]
+              and prime_checker.is_prime(1000000007) and cache.stats['hits'] == 1)
+        print(f"{'✓' if ok else '✗'} {cache.stats}")
+        assert ok
+
+        build_bitmap(BITMAP_FILE, 0, 100000)
+        with PrimeBitmap(BITMAP_FILE) as bitmap:
+            before = dict(cache.stats)
+            results = [prime_checker.is_prime(n, bitmap) for n in (2, 97, 99991, 100000)]
+            ok = results == [True, True, True, False] and cache.stats == before
+            print(f"{'✓' if ok else '✗'} 位图覆盖的数字直接查位图，不经过缓存")
+            assert ok
+
+            ok = prime_checker.is_prime(1000003, bitmap) and cache.stats['misses'] == before['misses'] + 1
+            print(f"{'✓' if ok else '✗'} 位图范围外的数字仍查缓存")
+            assert ok
+    finally:
+        prime_checker.disable_cache()
+        if os.path.exists(BITMAP_FILE):
+            os.remove(BITMAP_FILE)
+
+    print()
+
+
+if __name__ == "__main__":
+    test_memory_lru()
+    test_persistent_store()
+    test_concurrent_processes()
+    test_checker_integration()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -4,7 +4,12 @@
 测试质数判断程序的核心功能
 """
 
-from prime_checker import is_prime, get_all_factors, get_prime_factors
+import io
+import json
+
+from prime_cache import FactorizationCache
+from prime_checker import (classify, classify_many, is_prime, get_all_factors, get_prime_factors, iter_batch_results,
+                           write_batch_results)
 
 
 def test_is_prime():
@@ -27,6 +32,7 @@ def test_is_prime():
         result = is_prime(num)
         status = "✓" if result == expected else "✗"
         print(f"{status} {num}: {result} - {description}")
+        assert result == expected, description
 
     print()
 
@@ -47,6 +53,7 @@ def test_get_all_factors():
         result = get_all_factors(num)
         status = "✓" if result == expected else "✗"
         print(f"{status} {num}的因数: {result}")
+        assert result == expected
 
     print()
 
@@ -70,6 +77,64 @@ def test_get_prime_factors():
         status = "✓" if result == expected else "✗"
         factorization = " × ".join(map(str, result))
         print(f"{status} {num} = {factorization}")
+        assert result == expected
+
+    print()
+
+
+def test_batch_mode():
+    """测试批量模式：多进程结果按输入顺序输出，与单进程一致，无效输入单独报错"""
+    print("测试批量模式:")
+    print("-" * 40)
+
+    lines = [str(n) for n in range(1, 3000)] + ["", "# 注释", "abc", "-5", "1000000016000000063"]
+    single = list(iter_batch_results(lines, workers=1, chunk_size=100))
+    parallel = list(iter_batch_results(lines, workers=3, chunk_size=100))
+
+    ok = single == parallel and [r['index'] for r in parallel] == [i for i in range(len(lines)) if i not in (2999, 3000)]
+    print(f"{'✓' if ok else '✗'} 3进程与单进程结果一致且按输入顺序: {len(parallel)} 条")
+    assert ok
+
+    by_n = {r['n']: r for r in parallel}
+    ok = (by_n[97] == {'index': 96, 'n': 97, 'is_prime': True, 'factors': []}
+          and by_n[360]['factors'] == [[2, 3], [3, 2], [5, 1]]
+          and by_n[1000000016000000063]['factors'] == [[1000000007, 1], [1000000009, 1]]
+          and 'error' in by_n['abc'] and 'error' in by_n[-5])
+    print(f"{'✓' if ok else '✗'} 单条结果: {by_n[360]}")
+    assert ok
+
+    jsonl, table = io.StringIO(), io.StringIO()
+    write_batch_results(parallel[:3], jsonl, 'jsonl')
+    write_batch_results([by_n[360], by_n['abc']], table, 'csv')
+    rows = table.getvalue().splitlines()
+    ok = ([json.loads(line)['n'] for line in jsonl.getvalue().splitlines()] == [1, 2, 3]
+          and rows[1] == '359,360,False,2^3*3^2*5,' and rows[2].startswith('3001,abc,,,'))
+    print(f"{'✓' if ok else '✗'} JSON Lines / CSV 输出: {rows[1:]}")
+    assert ok
+
+    print()
+
+
+def test_classify_many():
+    """测试批量预筛的结果与逐个 classify 完全相同（包括大数、无效输入和使用缓存时）"""
+    print("测试批量预筛:")
+    print("-" * 40)
+
+    numbers = [1, 2, 97, 65521 * 65537, 2 ** 89 - 1, 2 ** 64 + 1, 3 ** 70 * 65519, 1000000007 * 1000000009 * 10007]
+    items = list(enumerate([str(n) for n in numbers] + ['x', '0']))
+    for factor in (True, False):
+        expected = [classify(index, text, factor) for index, text in items]
+        ok = classify_many(items, factor) == expected
+        with FactorizationCache() as cache:
+            ok = ok and classify_many(items, factor, cache=cache) == expected
+        print(f"{'✓' if ok else '✗'} factor={factor}: {len(items)} 条结果一致")
+        assert ok
+
+    # 全是小数时不做预筛
+    items = list(enumerate(['7', '8', '1', '97']))
+    ok = classify_many(items, factor=False) == [classify(index, text, False) for index, text in items]
+    print(f"{'✓' if ok else '✗'} 只有小数、不分解: {len(items)} 条结果一致")
+    assert ok
 
     print()
 
@@ -108,6 +173,8 @@ if __name__ == "__main__":
     test_is_prime()
     test_get_all_factors()
     test_get_prime_factors()
+    test_batch_mode()
+    test_classify_many()
     demo_output()
     print("=" * 50)
     print("所有测试完成！")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多机分布式遍历（用本机的多个工作进程模拟多台机器）
+"""
+
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from prime_cluster import (DEFAULT_HOST, DirectoryLeases, LeaseCoordinator, TcpLeases, assemble, create_manifest,
+                           load_manifest, run_worker)
+from prime_sieve import simple_sieve
+
+
+START, END, UNIT_SIZE = 1, 300000, 25000
+EXPECTED = simple_sieve(END)
+LEASE_TIMEOUT = 0.5
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    return rows[0], [(int(i), int(p)) for i, p in rows[1:]]
+
+
+def directory_worker(work_dir):
+    with DirectoryLeases(work_dir, lease_timeout=LEASE_TIMEOUT) as leases:
+        run_worker(leases, segment_bytes=4096, log=None)
+
+
+def tcp_worker(address):
+    port, token = address
+    try:
+        with TcpLeases('127.0.0.1', port, token=token) as leases:
+            run_worker(leases, segment_bytes=4096, log=None)
+    except ConnectionError:
+        pass  # 协调进程在全部完成后退出
+
+
+def start_workers(target, arg, count=3):
+    processes = [multiprocessing.Process(target=target, args=(arg,)) for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def test_directory_mode():
+    """测试共享目录方式：死掉的工作进程的单元超时后被接手，拼接结果完整有序"""
+    print("测试共享目录方式:")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp(prefix='test_cluster_')
+    try:
+        manifest = create_manifest(work_dir, START, END, UNIT_SIZE)
+        # 模拟租到单元后死掉的工作进程（不续约、不完成）
+        dead = DirectoryLeases(work_dir, worker_id='dead', lease_timeout=LEASE_TIMEOUT)
+        abandoned = dead.lease()
+
+        processes = start_workers(directory_worker, work_dir)
+        for process in processes:
+            process.join(60)
+
+        summary = load_manifest(work_dir)
+        output_file = os.path.join(work_dir, 'primes.csv')
+        total = assemble(work_dir, output_file)
+        header, rows = read_csv(output_file)
+        ok = (abandoned['index'] == 0 and all(unit['status'] == 'done' for unit in summary['units'])
+              and total == len(EXPECTED) and header == ['序号', '质数']
+              and rows == list(enumerate(EXPECTED, 1)))
+        print(f"{'✓' if ok else '✗'} {len(manifest['units'])} 个单元，{total} 个质数，被放弃的单元已重新分配")
+        assert ok
+    finally:
+        shutil.rmtree(work_dir)
+
+    print()
+
+
+def test_lease_takeover():
+    """测试租约超时后被别的工作进程接手，原持有者续约失败"""
+    work_dir = tempfile.mkdtemp(prefix='test_cluster_')
+    try:
+        create_manifest(work_dir, START, END, UNIT_SIZE)
+        first = DirectoryLeases(work_dir, worker_id='first', lease_timeout=LEASE_TIMEOUT)
+        second = DirectoryLeases(work_dir, worker_id='second', lease_timeout=LEASE_TIMEOUT)
+        unit = first.lease()
+        fresh = second.lease()
+        time.sleep(LEASE_TIMEOUT + 0.2)
+        taken = second.lease()
+        ok = (unit['index'] == 0 and fresh['index'] == 1 and taken['index'] == 0
+              and not first.heartbeat(0) and second.heartbeat(0))
+        print(f"{'✓' if ok else '✗'} 超时的租约被接手，原持有者续约失败")
+        assert ok
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def test_tcp_mode():
+    """测试 TCP 方式：协调进程重新分配断开的工作进程的单元，全部完成后拼接输出并退出"""
+    print("测试 TCP 方式:")
+    print("-" * 40)
+
+    work_dir = tempfile.mkdtemp(prefix='test_cluster_')
+    try:
+        create_manifest(work_dir, START, END, UNIT_SIZE)
+        output_file = os.path.join(work_dir, 'primes.csv')
+        coordinator = LeaseCoordinator(work_dir, LEASE_TIMEOUT, output_file)
+        ready = threading.Event()
+        result = {}
+
+        def serve():
+            result['total'] = asyncio.run(coordinator.serve(
+                '127.0.0.1', 0, ready=lambda port: (result.update(port=port), ready.set())))
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        assert ready.wait(10)
+
+        # 模拟租到单元后断开的工作进程
+        with TcpLeases('127.0.0.1', result['port'], worker_id='dead', token=coordinator.token) as dead:
+            abandoned = dead.lease()
+
+        processes = start_workers(tcp_worker, (result['port'], coordinator.token))
+        for process in processes:
+            process.join(60)
+        thread.join(60)
+
+        header, rows = read_csv(output_file)
+        manifest = load_manifest(work_dir)
+        ok = (not thread.is_alive() and result['total'] == len(EXPECTED)
+              and rows == list(enumerate(EXPECTED, 1))
+              and manifest['units'][abandoned['index']]['attempts'] == 2
+              and sum(unit['prime_count'] for unit in manifest['units']) == len(EXPECTED))
+        print(f"{'✓' if ok else '✗'} {len(manifest['units'])} 个单元，{result['total']} 个质数，"
+              f"被放弃的单元分配了 {manifest['units'][abandoned['index']]['attempts']} 次")
+        assert ok
+    finally:
+        shutil.rmtree(work_dir)
+
+    print()
+
+
+@contextmanager
+def running_coordinator(work_dir):
+    """在后台线程的事件循环中启动协调进程，生成 (协调进程, 端口)"""
+    coordinator = LeaseCoordinator(work_dir, LEASE_TIMEOUT)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        listener = asyncio.run_coroutine_threadsafe(coordinator.start('127.0.0.1', 0), loop).result()
+        yield coordinator, listener.sockets[0].getsockname()[1]
+        listener.close()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        # 结束仍在等待读取的连接处理任务，再关闭事件循环
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+
+def send_raw(port, data):
+    """发送原始字节，返回收到的响应行和连接是否随后被关闭"""
+    with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+        stream = sock.makefile('rwb')
+        stream.write(data)
+        stream.flush()
+        response = json.loads(stream.readline())
+        return response, stream.readline() == b''
+
+
+def test_tcp_protocol_errors():
+    """测试令牌错误和格式错误的请求：返回错误并断开连接，上传内容不会被当成下一个请求"""
+    print("测试 TCP 协议错误:")
+    print("-" * 40)
+
+    ok = DEFAULT_HOST == '127.0.0.1'
+    print(f"{'✓' if ok else '✗'} 默认只监听本机")
+    assert ok
+
+    work_dir = tempfile.mkdtemp(prefix='test_cluster_')
+    try:
+        create_manifest(work_dir, START, END, UNIT_SIZE)
+        with running_coordinator(work_dir) as (coordinator, port):
+            token = coordinator.token
+            # 紧跟在请求行后面的"上传内容"恰好是一个合法的租约请求
+            smuggled = json.dumps({'op': 'lease', 'worker': 'x', 'token': token}).encode('utf-8') + b'\n'
+            cases = [
+                ('没有令牌', {'op': 'lease', 'worker': 'x'}),
+                ('令牌错误', {'op': 'status', 'token': 'wrong'}),
+                ('缺少 sizes', {'op': 'complete', 'index': 0, 'prime_count': 1, 'token': token}),
+                ('sizes 格式错误', {'op': 'complete', 'index': 0, 'prime_count': 1, 'sizes': [-1, 'x'],
+                                  'token': token}),
+                ('单元序号越界', {'op': 'complete', 'index': -1, 'prime_count': 1, 'sizes': [len(smuggled), 0],
+                                'token': token}),
+                ('续约序号越界', {'op': 'heartbeat', 'worker': 'x', 'index': 10**6, 'token': token}),
+            ]
+            for name, request in cases:
+                response, closed = send_raw(port, json.dumps(request).encode('utf-8') + b'\n' + smuggled)
+                ok = 'error' in response and closed
+                print(f"{'✓' if ok else '✗'} {name}: {response['error']}，连接已断开")
+                assert ok
+
+            response, closed = send_raw(port, b'not json\n' + smuggled)
+            ok = 'error' in response and closed
+            print(f"{'✓' if ok else '✗'} 无效的 JSON 行后断开连接")
+            assert ok
+
+            ok = all(unit['status'] == 'pending' for unit in coordinator.units)
+            print(f"{'✓' if ok else '✗'} 上传内容中的请求没有被执行")
+            assert ok
+
+            with TcpLeases('127.0.0.1', port, token=token) as client:
+                ok = client.status()['pending'] == len(coordinator.units)
+            print(f"{'✓' if ok else '✗'} 带正确令牌的请求正常回答")
+            assert ok
+    finally:
+        shutil.rmtree(work_dir)
+
+    print()
+
+
+if __name__ == "__main__":
+    test_directory_mode()
+    test_lease_takeover()
+    test_tcp_mode()
+    test_tcp_protocol_errors()
+    print("=" * 50)
+    print("所有测试完成！")
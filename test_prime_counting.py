@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试质数计数函数 π(x)
+"""
+
+from prime_counting import count_primes_in_range, lucy_table_numpy, lucy_table_python, prime_pi
+from prime_sieve import simple_sieve
+
+
+def test_prime_pi():
+    """测试 π(x) 的已知值"""
+    print("测试 π(x):")
+    print("-" * 40)
+
+    test_cases = [
+        (0, 0),
+        (1, 0),
+        (2, 1),
+        (3, 2),
+        (100, 25),
+        (10 ** 6, 78498),
+        (10 ** 9, 50847534),
+    ]
+
+    for x, expected in test_cases:
+        result = prime_pi(x)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} π({x:,}) = {result:,}")
+        assert result == expected
+
+    # 与筛法逐点比较（覆盖各种 √x 边界）
+    primes = simple_sieve(5000)
+    mismatches = [x for x in range(5000) if prime_pi(x) != sum(1 for p in primes if p <= x)]
+    print(f"{'✓' if not mismatches else '✗'} 0 到 5000 逐点比较")
+    assert not mismatches
+
+    print()
+
+
+def test_count_primes_in_range():
+    """测试范围内的质数计数"""
+    print("测试范围计数:")
+    print("-" * 40)
+
+    test_cases = [
+        (1000, 1100, 16),
+        (1, 10, 4),
+        (10, 1, 0),
+        (10 ** 8, 2 * 10 ** 8 - 1, 5317482),      # start - 1 = end // 2，复用同一张表
+        (123456, 7654321, 518012 - 11601),
+    ]
+
+    for start, end, expected in test_cases:
+        result = count_primes_in_range(start, end)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} [{start:,}, {end:,}]: {result:,}")
+        assert result == expected
+
+    print()
+
+
+def test_lucy_backends():
+    """测试 NumPy 与纯 Python 的 Lucy 表完全相同"""
+    print("测试 Lucy 表两种实现:")
+    print("-" * 40)
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("未安装 NumPy，跳过")
+        print()
+        return
+
+    for x in [1, 2, 3, 4, 8, 9, 10, 24, 25, 26, 1000, 12345, 10 ** 6, 99991 * 99991]:
+        ok = lucy_table_numpy(x) == lucy_table_python(x)
+        print(f"{'✓' if ok else '✗'} x = {x:,}")
+        assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_prime_pi()
+    test_count_primes_in_range()
+    test_lucy_backends()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试区间批量分解（分段质因数筛）
+"""
+
+import prime_factor_sieve
+from prime_checker import get_all_factors
+from prime_factor_sieve import (divisor_counts, divisor_sums, factor_segment, format_factorization,
+                                iter_factor_segments, iter_factorizations)
+from prime_factorizer import factorize
+
+
+def test_factorizations():
+    """测试区间内每个数的分解结果与逐个分解相同"""
+    print("测试区间分解:")
+    print("-" * 40)
+
+    test_cases = [
+        (1, 3000, 97),
+        (2**40 - 200, 2**40 + 200, 64),                    # 高次幂
+        (999983**2 - 100, 999983**2 + 100, 50),            # 最大基础质数的平方
+        (10**12 - 500, 10**12 + 500, 333),
+        (10**14 - 300, 10**14, 1 << 18),
+    ]
+
+    for start, end, segment_size in test_cases:
+        found = list(iter_factorizations(start, end, segment_size))
+        ok = found == [(n, factorize(n)) for n in range(start, end + 1)]
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]，每段 {segment_size} 个: {len(found)} 个数")
+        assert ok
+
+    segments = list(iter_factor_segments(10**9, 10**9 + 1000, 128))
+    ok = (segments[0].lo == 10**9 and segments[-1].hi == 10**9 + 1001
+          and all(a.hi == b.lo for a, b in zip(segments, segments[1:])))
+    print(f"{'✓' if ok else '✗'} {len(segments)} 段首尾相接")
+    assert ok
+
+    ok = format_factorization({2: 3, 3: 1, 5: 2}) == '2^3 × 3 × 5^2' and format_factorization({}) == '1'
+    print(f"{'✓' if ok else '✗'} 格式化分解结果")
+    assert ok
+
+    for start, end in [(0, 10), (10**17, 10**17 + 10)]:
+        try:
+            list(iter_factor_segments(start, end))
+            ok = False
+        except ValueError:
+            ok = True
+        print(f"{'✓' if ok else '✗'} 拒绝 [{start:,}, {end:,}]")
+        assert ok
+
+    print()
+
+
+def test_python_backend():
+    """测试纯 Python 后端与 NumPy 后端结果相同"""
+    print("测试纯 Python 后端:")
+    print("-" * 40)
+
+    start, end = 10**12 - 1000, 10**12 + 1000
+    expected = [factorize(n) for n in range(start, end + 1)]
+    counts = [len(get_all_factors(n)) for n in range(start, end + 1)]
+    saved = prime_factor_sieve.np
+    prime_factor_sieve.np = None
+    try:
+        found = [f for _, f in iter_factorizations(start, end, 300)]
+        python_counts = divisor_counts(start, end, 300)
+    finally:
+        prime_factor_sieve.np = saved
+    ok = found == expected and python_counts == counts
+    print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]: {len(found)} 个数")
+    assert ok
+
+    segment = factor_segment(1, 2, [2])
+    ok = segment.factorizations() == [{}] and segment.divisor_counts() == [1] and segment.divisor_sums() == [1]
+    print(f"{'✓' if ok else '✗'} 1 的分解为空")
+    assert ok
+
+    print()
+
+
+def test_divisor_reducers():
+    """测试向量化的因数个数和因数和"""
+    print("测试因数个数与因数和:")
+    print("-" * 40)
+
+    for start, end in [(1, 2000), (10**12 - 300, 10**12 + 300), (10**14 - 200, 10**14)]:
+        divisors = [get_all_factors(n) for n in range(start, end + 1)]
+        counts = divisor_counts(start, end, 128)
+        sums = divisor_sums(start, end, 128)
+        ok = (counts.tolist() == [len(d) for d in divisors] and sums.tolist() == [sum(d) for d in divisors])
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]: 最多 {max(counts)} 个因数")
+        assert ok
+
+    ok = len(divisor_counts(10, 9)) == 0
+    print(f"{'✓' if ok else '✗'} 空区间")
+    assert ok
+
+    print()
+
+
+def test_top_of_range():
+    """测试区间上限附近（基础质数现场筛到 10^8，余因子和 σ(n) 接近 int64 上限）"""
+    print("测试区间上限附近:")
+    print("-" * 40)
+
+    start, end = prime_factor_sieve.MAX_FACTOR_END - 1000, prime_factor_sieve.MAX_FACTOR_END
+    segments = list(iter_factor_segments(start, end, 256))
+    factorizations = [f for segment in segments for f in segment.factorizations()]
+    counts = [c for segment in segments for c in segment.divisor_counts().tolist()]
+    sums = [s for segment in segments for s in segment.divisor_sums().tolist()]
+    expected = [factorize(n) for n in range(start, end + 1)]
+    divisors = [get_all_factors(n) for n in range(start, end + 1)]
+    ok = (factorizations == expected and counts == [len(d) for d in divisors]
+          and sums == [sum(d) for d in divisors])
+    print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]: 最大余因子 {max(max(f) for f in expected):,}，"
+          f"最大因数和 {max(sums):,}")
+    assert ok
+
+    print()
+
+
+def test_parallel():
+    """测试多进程结果与单进程相同"""
+    print("测试多进程分解:")
+    print("-" * 40)
+
+    start, end = 10**11, 10**11 + 20000
+    serial = divisor_sums(start, end, 1000)
+    parallel = divisor_sums(start, end, 1000, workers=2)
+    factors = [f for _, f in iter_factorizations(start, start + 3000, 1000, workers=2)]
+    ok = (serial.tolist() == parallel.tolist()
+          and factors == [f for _, f in iter_factorizations(start, start + 3000, 1000)])
+    print(f"{'✓' if ok else '✗'} 2 个进程: {len(parallel)} 个数")
+    assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_factorizations()
+    test_python_backend()
+    test_divisor_reducers()
+    test_top_of_range()
+    test_parallel()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试质因数分解引擎
+"""
+
+from prime_factorizer import divisors_from_factorization, factorize, pollard_brent
+
+
+def test_factorize():
+    """测试质因数分解"""
+    print("测试质因数分解:")
+    print("-" * 40)
+
+    test_cases = [
+        (1, {}),
+        (2, {2: 1}),
+        (360, {2: 3, 3: 2, 5: 1}),
+        (1000003 ** 2, {1000003: 2}),
+        (999999000001 * 1000000000039, {999999000001: 1, 1000000000039: 1}),
+        (2 ** 64 + 1, {274177: 1, 67280421310721: 1}),
+        ((2 ** 61 - 1) * 3 ** 5 * 1009, {3: 5, 1009: 1, 2 ** 61 - 1: 1}),
+    ]
+
+    for num, expected in test_cases:
+        result = factorize(num)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} {num} = {result}")
+        assert result == expected
+        assert list(result) == sorted(result)
+
+    print()
+
+
+def test_pollard_brent():
+    """测试 Pollard-rho 能找到非平凡因子"""
+    print("测试 Pollard-rho:")
+    print("-" * 40)
+
+    for n in (8051, 10403, 1000003 * 1000033, 600851475143):
+        d = pollard_brent(n, seed=1)
+        status = "✓" if 1 < d < n and n % d == 0 else "✗"
+        print(f"{status} {n} 的一个因子: {d}")
+        assert 1 < d < n and n % d == 0
+
+    print()
+
+
+def test_divisors():
+    """测试由质因数分解生成全部因数"""
+    print("测试生成全部因数:")
+    print("-" * 40)
+
+    for n in (1, 12, 36, 360, 9973, 2 ** 10 * 3 ** 3):
+        result = divisors_from_factorization(factorize(n))
+        expected = [d for d in range(1, n + 1) if n % d == 0]
+        status = "✓" if result == expected else "✗"
+        print(f"{status} {n}: {len(result)} 个因数")
+        assert result == expected
+
+    print()
+
+
+if __name__ == "__main__":
+    test_factorize()
+    test_pollard_brent()
+    test_divisors()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -5,7 +5,9 @@
 用小范围测试程序的正确性
 """
 
-from prime_range_finder import find_primes_in_range
+from prime_counting import count_primes_in_range
+from prime_range_finder import estimate_output_bytes, estimate_time_and_space, find_primes_in_range
+from prime_store import convert_to_csv, index_path
 import os
 
 
@@ -48,6 +50,8 @@ def test_small_range():
         os.remove(test_file)
         print(f"\n已清理测试文件: {test_file}")
 
+    assert found_primes == known_primes
+
 
 def test_trillion_range_sample():
     """
@@ -77,10 +81,166 @@ def test_trillion_range_sample():
         os.remove(test_file)
         print(f"\n已清理测试文件: {test_file}")
 
+    # 1×10^12 之后的前几个质数（见 PRIME_FINDER_README.md 中的示例输出）
+    assert [line.strip() for line in lines] == [
+        '序号,质数', '1,1000000000039', '2,1000000000061', '3,1000000000063', '4,1000000000091',
+    ]
+
+
+def test_parallel_workers():
+    """
+    测试多进程模式：输出（含序号）必须与单进程完全一致
+    """
+    print("\n\n" + "=" * 70)
+    print("测试3: 多进程并行查找")
+    print("=" * 70)
+
+    serial_file = "test_serial.csv"
+    parallel_file = "test_parallel.csv"
+
+    # 段很小，保证范围被切成许多段分给不同进程
+    find_primes_in_range(1, 20000, serial_file, batch_size=10, progress_interval=5000, segment_bytes=256)
+    # 范围很小，规划器会选择单进程；指定后端以确保走多进程分段筛法
+    find_primes_in_range(1, 20000, parallel_file, batch_size=10, progress_interval=5000, segment_bytes=256,
+                         workers=3, backend='python')
+
+    with open(serial_file, 'r', encoding='utf-8') as f:
+        serial_rows = f.readlines()
+    with open(parallel_file, 'r', encoding='utf-8') as f:
+        parallel_rows = f.readlines()
+
+    if serial_rows == parallel_rows:
+        print("\n[OK] 测试通过！多进程结果与单进程一致")
+    else:
+        print("\n[FAIL] 测试失败！多进程结果与单进程不一致")
+
+    for test_file in (serial_file, parallel_file):
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert serial_rows == parallel_rows
+    assert len(serial_rows) == 2262 + 1  # π(20000) = 2262，外加标题行
+
+
+def test_checkpoint_resume():
+    """
+    测试断点续传：中断后残缺的尾部会被截掉，续写结果与一次跑完完全一致
+    """
+    print("\n\n" + "=" * 70)
+    print("测试4: 检查点与断点续传")
+    print("=" * 70)
+
+    full_file = "test_full.csv"
+    resumed_file = "test_resumed.csv"
+    checkpoint_file = resumed_file + ".ckpt"
+
+    find_primes_in_range(1, 20000, full_file, batch_size=10, progress_interval=5000, segment_bytes=256)
+
+    # 先只跑前500个质数（模拟中断），再在文件末尾留下半行残缺内容
+    find_primes_in_range(1, 20000, resumed_file, max_primes=500, batch_size=10, progress_interval=5000,
+                         segment_bytes=256, checkpoint_file=checkpoint_file, checkpoint_interval=0)
+    with open(resumed_file, 'a', encoding='utf-8') as f:
+        f.write("501,36")
+
+    find_primes_in_range(1, 20000, resumed_file, batch_size=10, progress_interval=5000, segment_bytes=256,
+                         checkpoint_file=checkpoint_file, resume=True, checkpoint_interval=0)
+
+    with open(full_file, 'r', encoding='utf-8') as f:
+        full_rows = f.readlines()
+    with open(resumed_file, 'r', encoding='utf-8') as f:
+        resumed_rows = f.readlines()
+
+    if full_rows == resumed_rows:
+        print("\n[OK] 测试通过！续传结果与一次跑完一致")
+    else:
+        print("\n[FAIL] 测试失败！续传结果不一致")
+
+    for test_file in (full_file, resumed_file, checkpoint_file):
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert full_rows == resumed_rows
+
+
+def test_binary_format_resume():
+    """
+    测试二进制输出格式：中断续传后转换回CSV，与直接输出CSV完全一致
+    """
+    print("\n\n" + "=" * 70)
+    print("测试5: 二进制输出格式与断点续传")
+    print("=" * 70)
+
+    csv_file = "test_direct.csv"
+    store_file = "test_store.bin"
+    converted_file = "test_converted.csv"
+    checkpoint_file = store_file + ".ckpt"
+
+    find_primes_in_range(1, 20000, csv_file, progress_interval=5000, segment_bytes=256)
+
+    find_primes_in_range(1, 20000, store_file, max_primes=500, progress_interval=5000, segment_bytes=256,
+                         checkpoint_file=checkpoint_file, checkpoint_interval=0, output_format='bin')
+    find_primes_in_range(1, 20000, store_file, progress_interval=5000, segment_bytes=256,
+                         checkpoint_file=checkpoint_file, resume=True, checkpoint_interval=0, output_format='bin')
+    convert_to_csv(store_file, converted_file)
+
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        direct_rows = f.readlines()
+    with open(converted_file, 'r', encoding='utf-8') as f:
+        converted_rows = f.readlines()
+
+    if direct_rows == converted_rows:
+        print("\n[OK] 测试通过！二进制格式转换结果与CSV一致")
+    else:
+        print("\n[FAIL] 测试失败！二进制格式转换结果不一致")
+
+    for test_file in (csv_file, store_file, index_path(store_file), converted_file, checkpoint_file):
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert direct_rows == converted_rows
+
+
+def test_estimate():
+    """
+    测试估算：质数个数的置信区间包含真实值，文件大小与实际输出一致
+    """
+    print("\n\n" + "=" * 70)
+    print("测试6: 时间与空间估算")
+    print("=" * 70)
+
+    start, end = 10**6, 2 * 10**6 - 1
+    calibration = {'setup': 1.0, 'rate': 1e6, 'rate_low': 5e5, 'rate_high': 2e6}
+    estimate = estimate_time_and_space('full', start, end, 'csv', calibration=calibration)
+    actual = count_primes_in_range(start, end)
+    print(f"质数个数: 估算 {estimate['primes']:,}（{estimate['primes_low']:,} ~ {estimate['primes_high']:,}），"
+          f"实际 {actual:,}")
+    assert estimate['primes_low'] <= actual <= estimate['primes_high']
+    assert estimate['time_low'] <= estimate['time'] <= estimate['time_high']
+    assert abs(estimate['time'] - (1.0 + (end - start + 1) / 1e6)) < 1e-6
+
+    for output_format in ('csv', 'bin'):
+        test_file = f"test_estimate.{output_format}"
+        find_primes_in_range(start, end, test_file, progress_interval=10**7, output_format=output_format)
+        size = os.path.getsize(test_file)
+        if output_format == 'bin':
+            size += os.path.getsize(index_path(test_file))
+        expected = estimate_output_bytes(actual, start, end, output_format)
+        print(f"{output_format} 文件大小: 估算 {expected:,.0f} 字节，实际 {size:,} 字节")
+
+        for path in (test_file, index_path(test_file)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        assert size == expected
+
 
 if __name__ == "__main__":
     test_small_range()
     test_trillion_range_sample()
+    test_parallel_workers()
+    test_checkpoint_resume()
+    test_binary_format_resume()
+    test_estimate()
 
     print("\n" + "=" * 70)
     print("所有测试完成！")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分段运行指标与性能剖析
+"""
+
+import json
+import os
+import pstats
+
+from prime_metrics import RunMetrics, rss_bytes
+from prime_range_finder import find_primes_in_range
+from prime_sieve import simple_sieve
+
+
+def test_segment_metrics():
+    """测试逐段指标的合计与实际筛选结果一致，快照和剖析文件可读"""
+    print("测试分段指标:")
+    print("-" * 40)
+
+    output_file = "test_metrics.csv"
+    jsonl_file = "test_metrics.jsonl"
+    prom_file = "test_metrics.prom"
+    profile_file = "test_metrics.prof"
+    with RunMetrics(jsonl_file, prom_file, profile_file, profile_every=2) as metrics:
+        find_primes_in_range(1, 200000, output_file, progress_interval=10**9, segment_bytes=4096,
+                             batch_size=500, metrics=metrics)
+
+    with open(jsonl_file, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    with open(prom_file, encoding='utf-8') as f:
+        prom = dict(line.rsplit(' ', 1) for line in f.read().splitlines() if not line.startswith('#'))
+    stats = pstats.Stats(profile_file)
+    for path in (output_file, jsonl_file, prom_file, profile_file):
+        os.remove(path)
+
+    expected = len(simple_sieve(200000))
+    ok = (sum(r['primes'] for r in records) == expected
+          and sum(r['candidates'] for r in records) == 100000
+          and [r['segment'] for r in records] == list(range(len(records)))
+          and all(r['lo'] < r['hi'] and r['seconds'] >= r['sieve_seconds'] >= 0 for r in records))
+    print(f"{'✓' if ok else '✗'} JSON Lines: {len(records)} 段，质数合计 {expected}")
+    assert ok
+
+    ok = (prom['prime_finder_primes_total'] == str(expected)
+          and prom['prime_finder_segments_total'] == str(len(records))
+          and float(prom['prime_finder_progress_ratio']) == 1.0
+          and float(prom['prime_finder_phase_seconds_total{phase="format"}']) > 0)
+    print(f"{'✓' if ok else '✗'} Prometheus 快照: {len(prom)} 个样本")
+    assert ok
+
+    ok = metrics.totals['profiled_segments'] == (len(records) + 1) // 2 and stats.total_calls > 0
+    print(f"{'✓' if ok else '✗'} cProfile 采样: {metrics.totals['profiled_segments']} 段")
+    assert ok
+
+    print()
+
+
+def test_rss():
+    """测试能读到当前进程的常驻内存"""
+    rss = rss_bytes()
+    ok = rss is None or rss > 1024 * 1024
+    print(f"{'✓' if ok else '✗'} RSS: {rss}")
+    assert ok
+
+
+if __name__ == "__main__":
+    test_segment_metrics()
+    test_rss()
+    print("=" * 50)
+    print("所有测试完成！")
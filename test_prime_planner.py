@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试查询规划器
+"""
+
+import csv
+import os
+
+from prime_bitmap import PrimeBitmap, build_bitmap
+from prime_checker import is_prime as checker_is_prime
+from prime_planner import check_prime, iter_planned_chunks, parse_costs, plan_point, plan_range
+from prime_primality import is_prime
+from prime_range_finder import find_primes_in_range
+from prime_search import iter_presieved_segments
+from prime_sieve import BACKENDS
+from prime_table import prime_table
+
+
+def test_range_choices():
+    """测试按请求的形状选择执行方式"""
+    print("测试范围查询的规划:")
+    print("-" * 40)
+
+    test_cases = [
+        (10**12, 10**12 + 10, 'direct'),                  # 很窄的范围：逐个测试
+        (10**12, 10**12 + 10**8, 'sieve'),                # 稠密的宽范围：分段筛法
+        (10**18, 10**18 + 10**5, 'presieve'),             # 高处的窄窗口：预筛 + 素性测试
+        (10**30, 10**30 + 10**5, 'presieve'),             # 超过 2^64，只能预筛
+    ]
+
+    for start, end, expected in test_cases:
+        plan = plan_range(start, end)
+        ok = plan.engine == expected and plan.seconds == min(c[1] for c in plan.candidates)
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}] → {plan.label}")
+        assert ok
+
+    # 超过 2^64 时没有分段筛法可选
+    plan = plan_range(2**64 - 100, 2**64 + 100)
+    ok = all(engine != 'sieve' for _, _, engine, _, _ in plan.candidates)
+    print(f"{'✓' if ok else '✗'} 2^64 以上不考虑分段筛法")
+    assert ok
+
+    # 指定后端时不按代价选择
+    plan = plan_range(10**12, 10**12 + 10, backend='python')
+    ok = plan.engine == 'sieve' and plan.backend == 'python' and plan.forced
+    print(f"{'✓' if ok else '✗'} 指定后端: {plan.label}")
+    assert ok
+
+    print()
+
+
+def test_cost_overrides():
+    """测试覆盖代价系数会改变选择，说明文字列出全部候选"""
+    print("测试代价系数覆盖:")
+    print("-" * 40)
+
+    # 素性测试变得极便宜时，宽范围也改为逐个测试
+    plan = plan_range(10**12, 10**12 + 10**8, costs={'mr_round': 1, 'trial': 1, 'call': 1})
+    ok = plan.engine in ('direct', 'presieve')
+    print(f"{'✓' if ok else '✗'} 素性测试极便宜时: {plan.label}")
+    assert ok
+
+    if 'bucket' in BACKENDS:
+        plan = plan_range(10**12, 10**12 + 10**8, costs={'bucket': 1})
+        ok = plan.backend == 'bucket'
+        print(f"{'✓' if ok else '✗'} 桶筛法极便宜时: {plan.label}")
+        assert ok
+
+    text = plan.explain()
+    ok = '选择: ' + plan.label in text and all(c[0] in text for c in plan.candidates)
+    print(f"{'✓' if ok else '✗'} explain() 列出 {len(plan.candidates)} 种候选方式")
+    assert ok
+
+    ok = parse_costs(['bucket=20', ' mr_round = 5000']) == {'bucket': 20.0, 'mr_round': 5000.0}
+    print(f"{'✓' if ok else '✗'} 解析 名称=值")
+    assert ok
+
+    for items in (['foo=1'], ['bucket'], ['bucket=x']):
+        try:
+            parse_costs(items)
+            ok = False
+        except ValueError:
+            ok = True
+        print(f"{'✓' if ok else '✗'} 拒绝 {items}")
+        assert ok
+
+    print()
+
+
+def test_engines_identical():
+    """测试各执行方式生成的质数和段边界完全相同"""
+    print("测试各执行方式的结果一致:")
+    print("-" * 40)
+
+    test_cases = [
+        (0, 3000),
+        (2, 2),
+        (10**12 - 2000, 10**12 + 2000),
+        (2**64 - 3000, 2**64 + 3000),
+    ]
+
+    for start, end in test_cases:
+        expected = [n for n in range(start, end + 1) if is_prime(n)]
+        plan = plan_range(start, end, segment_bytes=512)
+        for label, _, engine, backend, presieve in plan.candidates:
+            plan.label, plan.engine, plan.backend, plan.presieve = label, engine, backend, presieve
+            chunks = list(iter_planned_chunks(plan, start, end))
+            found = [p for chunk in chunks for p in chunk]
+            contiguous = all(a.hi == b.lo for a, b in zip(chunks, chunks[1:]))
+            ok = found == expected and contiguous
+            if not ok:
+                print(f"✗ [{start:,}, {end:,}] {label}")
+            assert ok
+        print(f"✓ [{start:,}, {end:,}]: {len(plan.candidates)} 种方式都得到 {len(expected)} 个质数")
+
+    segments = list(iter_presieved_segments(10**15, 10**15 + 10000, presieve=2, segment_bytes=1000))
+    ok = [p for _, _, primes in segments for p in primes] == [n for n in range(10**15, 10**15 + 10001)
+                                                              if is_prime(n)]
+    print(f"{'✓' if ok else '✗'} 不预筛的逐个测试: {len(segments)} 段")
+    assert ok
+
+    print()
+
+
+def test_find_primes_planned():
+    """测试 find_primes_in_range 按计划执行时输出与分段筛法相同"""
+    print("测试按计划遍历范围:")
+    print("-" * 40)
+
+    start, end = 10**12, 10**12 + 5000
+    rows = {}
+    # 筛法极贵时改为预筛 + 素性测试
+    expensive = {name: 1e9 for name in ('sieve_python', 'sieve_numpy', 'bucket')}
+    for name, kwargs in [('sieve', {'backend': 'python'}), ('auto', {}), ('tested', {'costs': expensive})]:
+        output_file = f"test_planned_{name}.csv"
+        find_primes_in_range(start, end, output_file, progress_interval=10**9, segment_bytes=256, **kwargs)
+        with open(output_file, encoding='utf-8') as f:
+            rows[name] = list(csv.reader(f))
+        os.remove(output_file)
+
+    ok = rows['sieve'] == rows['auto'] == rows['tested'] and len(rows['sieve']) > 100
+    print(f"{'✓' if ok else '✗'} 三种方式输出相同: {len(rows['sieve']) - 1} 个质数")
+    assert ok
+
+    print()
+
+
+def test_point_queries():
+    """测试单个数的规划和判断"""
+    print("测试单点查询:")
+    print("-" * 40)
+
+    prime_table()  # 质数表已载入时才考虑查表
+    test_cases = [
+        (97, 'table'),
+        (10**12 + 39, 'test'),
+        (2**89 - 1, 'test'),
+    ]
+    for n, expected in test_cases:
+        plan = plan_point(n)
+        ok = plan.engine == expected and check_prime(n) == is_prime(n) == checker_is_prime(n)
+        print(f"{'✓' if ok else '✗'} {n:,} → {plan.label}")
+        assert ok
+
+    # 查表很贵时改做素性测试
+    ok = plan_point(97, costs={'table_lookup': 1e9}).engine == 'test'
+    print(f"{'✓' if ok else '✗'} 覆盖查表开销后改做素性测试")
+    assert ok
+
+    numbers = list(range(-5, 3000)) + [9999991, 9999973, 10**7 + 19]
+    ok = all(check_prime(n) == is_prime(n) for n in numbers)
+    print(f"{'✓' if ok else '✗'} 查表与素性测试结果一致（{len(numbers)} 个数）")
+    assert ok
+
+    # 位图覆盖的数查位图，范围外做素性测试
+    bitmap_file = "test_planner.bitmap"
+    build_bitmap(bitmap_file, 10**12, 10**12 + 30000, segment_bytes=4096)
+    with PrimeBitmap(bitmap_file) as bitmap:
+        numbers = range(10**12 - 100, 10**12 + 30100)
+        ok = (plan_point(10**12 + 39, bitmap).engine == 'bitmap'
+              and plan_point(10**12 - 11, bitmap).engine == 'test'
+              and all(check_prime(n, bitmap) == is_prime(n) for n in numbers))
+    os.remove(bitmap_file)
+    print(f"{'✓' if ok else '✗'} 位图覆盖时查位图（{len(numbers)} 个数）")
+    assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_range_choices()
+    test_cost_overrides()
+    test_engines_identical()
+    test_find_primes_planned()
+    test_point_queries()
+    print("=" * 50)
+    print("所有测试完成！")
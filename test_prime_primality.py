@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试素性测试公共模块（Miller-Rabin / BPSW）
+"""
+
+from prime_primality import is_prime, strong_lucas
+from prime_sieve import simple_sieve
+
+
+def test_matches_sieve():
+    """测试小范围内与筛法结果完全一致"""
+    print("测试与筛法结果一致:")
+    print("-" * 40)
+
+    limit = 100000
+    primes = set(simple_sieve(limit))
+    mismatches = [n for n in range(limit + 1) if is_prime(n) != (n in primes)]
+
+    status = "✓" if not mismatches else "✗"
+    print(f"{status} 0 到 {limit:,}: 不一致 {len(mismatches)} 个")
+    assert not mismatches
+
+    print()
+
+
+def test_pseudoprimes():
+    """测试各类伪素数（单一底数测试会误判的合数）"""
+    print("测试伪素数:")
+    print("-" * 40)
+
+    test_cases = [
+        (561, False, "最小的卡迈克尔数"),
+        (2047, False, "底数2的最小强伪素数"),
+        (3215031751, False, "底数2,3,5,7的强伪素数"),
+        (3825123056546413051, False, "底数2到23的强伪素数"),
+        (318665857834031151167461, False, "底数2到37的强伪素数"),
+        (5459, False, "最小的强Lucas伪素数"),
+        ((2 ** 89 - 1) * (2 ** 107 - 1), False, "两个梅森质数之积（BPSW路径）"),
+    ]
+
+    for num, expected, description in test_cases:
+        result = is_prime(num)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} {num}: {result} - {description}")
+        assert result == expected
+
+    # 强 Lucas 测试单独使用时会把 5459 误判为质数，与 Miller-Rabin 组合后才可靠
+    assert strong_lucas(5459)
+
+    print()
+
+
+def test_large_primes():
+    """测试大质数（包括超过 3.3×10^24 的 BPSW 路径）"""
+    print("测试大质数:")
+    print("-" * 40)
+
+    test_cases = [
+        (1000000007, True, "常用的大质数"),
+        (1000000000039, True, "万亿级别第一个质数"),
+        (2 ** 61 - 1, True, "梅森质数 M61"),
+        (2 ** 127 - 1, True, "梅森质数 M127"),
+        (2 ** 521 - 1, True, "梅森质数 M521"),
+        (2 ** 128 + 1, False, "费马数 F7（合数）"),
+    ]
+
+    for num, expected, description in test_cases:
+        result = is_prime(num)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} {description}: {result}")
+        assert result == expected
+
+    print()
+
+
+if __name__ == "__main__":
+    test_matches_sieve()
+    test_pseudoprimes()
+    test_large_primes()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试质数定位（next_prime / prev_prime / primes_after / nth_prime）
+"""
+
+from bisect import bisect_left, bisect_right
+
+from prime_primality import is_prime
+from prime_search import next_prime, nth_prime, prev_prime, primes_after
+from prime_sieve import iter_primes, simple_sieve
+
+
+def test_next_prev_small():
+    """测试小范围内与筛法结果逐个一致（包括 2、3 等边界）"""
+    print("测试小范围的 next_prime / prev_prime:")
+    print("-" * 40)
+
+    primes = simple_sieve(20000)
+    ok_next = all(next_prime(x) == primes[bisect_right(primes, x)] for x in range(-3, 19990))
+    ok_prev = all(prev_prime(x) == (primes[bisect_left(primes, x) - 1] if x > 2 else None)
+                  for x in range(-3, 20000))
+    print(f"{'✓' if ok_next else '✗'} next_prime 与筛法一致")
+    print(f"{'✓' if ok_prev else '✗'} prev_prime 与筛法一致")
+    assert ok_next and ok_prev
+
+    print()
+
+
+def test_large_values():
+    """测试大数附近的结果（含超过 2^64 的数，以及大间隔）"""
+    print("测试大数附近:")
+    print("-" * 40)
+
+    test_cases = [
+        (next_prime(10**12), 1000000000039),
+        (prev_prime(10**12), 999999999989),
+        (next_prime(10**18), 1000000000000000003),
+        (next_prime(10**30), 10**30 + 57),
+        (prev_prime(2**64), 2**64 - 59),
+        (next_prime(2**64), 2**64 + 13),
+        # 1693182318746371 之后是 1132 的间隔（10^16 以内的最大间隔）
+        (next_prime(1693182318746371), 1693182318747503),
+        (prev_prime(1693182318747503), 1693182318746371),
+    ]
+    for result, expected in test_cases:
+        status = "✓" if result == expected else "✗"
+        print(f"{status} {result}")
+        assert result == expected
+
+    print()
+
+
+def test_primes_after():
+    """测试 primes_after 与顺序筛选结果一致（小批量和大批量两种路径）"""
+    print("测试 primes_after:")
+    print("-" * 40)
+
+    for x, k in ((10**12 - 1, 10), (10**12, 5000), (0, 100), (10**18, 50)):
+        result = primes_after(x, k)
+        if x < 10**15:
+            expected = []
+            for p in iter_primes(x + 1, x + 40 * k + 1000):
+                expected.append(p)
+                if len(expected) == k:
+                    break
+        else:
+            expected = [next_prime(x)]
+            while len(expected) < k:
+                expected.append(next_prime(expected[-1]))
+        ok = result == expected
+        print(f"{'✓' if ok else '✗'} {x} 之后的 {k} 个质数: {result[:3]}...")
+        assert ok
+
+    print()
+
+
+def test_nth_prime():
+    """测试第 n 个质数（查表与 π(x) 估计两条路径）"""
+    print("测试 nth_prime:")
+    print("-" * 40)
+
+    primes = simple_sieve(100000)
+    ok = all(nth_prime(i + 1) == p for i, p in enumerate(primes))
+    print(f"{'✓' if ok else '✗'} 前 {len(primes)} 个质数")
+    assert ok
+
+    test_cases = [
+        (10**6, 15485863),
+        (10**7, 179424673),
+        (664580, 10000019),            # 刚好超出 10^7 质数表
+        (50000000, 982451653),
+    ]
+    for n, expected in test_cases:
+        result = nth_prime(n)
+        ok = result == expected and is_prime(result)
+        print(f"{'✓' if ok else '✗'} 第 {n:,} 个质数: {result:,}")
+        assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_next_prev_small()
+    test_large_values()
+    test_primes_after()
+    test_nth_prime()
+    print("=" * 50)
+    print("所有测试完成！")
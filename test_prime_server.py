@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试本地质数查询服务
+"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from prime_bitmap import build_bitmap
+from prime_factorizer import factorize
+from prime_sieve import simple_sieve
+from prime_search import next_prime
+from prime_server import INLINE_LIMIT, PrimeQueryClient, PrimeQueryServer
+
+
+def test_server_queries():
+    """测试通过 TCP 连接批量查询、缓存命中和错误响应"""
+    print("测试查询服务:")
+    print("-" * 40)
+
+    bitmap_file = "test_server.bitmap"
+    build_bitmap(bitmap_file, 0, 100000)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = PrimeQueryServer(workers=2, cache_size=5000, bitmap_path=bitmap_file)
+    try:
+        listener = asyncio.run_coroutine_threadsafe(server.start(port=0), loop).result()
+        port = listener.sockets[0].getsockname()[1]
+
+        with PrimeQueryClient(port=port, timeout=60) as client:
+            numbers = list(range(1, 2000))
+            expected = [n in set(simple_sieve(2000)) for n in numbers]
+            cases = [
+                ('is_prime', numbers, expected),
+                ('is_prime', 1000000000039, True),
+                ('next_prime', [99991, 10**12, 1], [100003, 1000000000039, 2]),
+                ('prev_prime', [100003, 3, 2], [99991, 2, None]),
+                ('factor', [360, 1, 10403], [[[2, 3], [3, 2], [5, 1]], [], [[101, 1], [103, 1]]]),
+                ('nth_prime', [1, 1000], [2, 7919]),
+                ('pi', [10**6, 1], [78498, 0]),
+            ]
+            for op, n, want in cases:
+                result = client.query(op, n)
+                ok = result == want
+                print(f"{'✓' if ok else '✗'} {op}: {str(result)[:60]}")
+                assert ok
+
+            client.query('is_prime', numbers)
+            stats = client.query('stats', [])
+            ok = stats['cache_hits'] >= len(numbers)
+            print(f"{'✓' if ok else '✗'} 重复查询命中缓存: {stats}")
+            assert ok
+
+            errors = []
+            for op, n in (('unknown', 1), ('factor', 0), ('is_prime', 'abc')):
+                try:
+                    client.query(op, n)
+                except RuntimeError as e:
+                    errors.append(str(e))
+            ok = len(errors) == 3 and client.query('is_prime', 2) is True
+            print(f"{'✓' if ok else '✗'} 错误请求返回错误信息，连接仍可继续使用: {errors}")
+            assert ok
+
+        asyncio.run_coroutine_threadsafe(server.stop(listener), loop).result()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        os.remove(bitmap_file)
+
+    print()
+
+
+@contextmanager
+def running_server(**kwargs):
+    """在后台线程的事件循环中启动服务，生成 (服务, 端口)"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = PrimeQueryServer(**kwargs)
+    try:
+        listener = asyncio.run_coroutine_threadsafe(server.start(port=0), loop).result()
+        yield server, listener.sockets[0].getsockname()[1]
+        asyncio.run_coroutine_threadsafe(server.stop(listener), loop).result()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+
+
+def test_pool_routing():
+    """测试很大的数字和大批量的快速操作交给进程池，小查询直接在事件循环中计算"""
+    print("测试进程池分派:")
+    print("-" * 40)
+
+    with running_server(workers=2) as (server, port), PrimeQueryClient(port=port, timeout=60) as client:
+        ok = client.query('is_prime', [97, 10**12 + 39]) == [True, True] and server.stats['pool_tasks'] == 0
+        print(f"{'✓' if ok else '✗'} 小数字直接计算")
+        assert ok
+
+        big = 10**60
+        ok = client.query('next_prime', big) == next_prime(big) and server.stats['pool_tasks'] == 1
+        print(f"{'✓' if ok else '✗'} {big.bit_length()} 位的 next_prime 交给进程池")
+        assert ok
+
+        numbers = list(range(10**9, 10**9 + INLINE_LIMIT + 1))
+        before = server.stats['pool_tasks']
+        results = client.query('is_prime', numbers)
+        ok = sum(results) > 0 and server.stats['pool_tasks'] > before
+        print(f"{'✓' if ok else '✗'} {len(numbers)} 个数字的批量查询分块交给进程池")
+        assert ok
+
+    print()
+
+
+def test_concurrent_clients():
+    """测试一个连接上的大数计算不会阻塞其他连接，多个连接并发查询结果正确"""
+    print("测试并发连接:")
+    print("-" * 40)
+
+    with running_server(workers=2) as (server, port):
+        big = 10**600
+        slow = {}
+
+        def slow_query():
+            with PrimeQueryClient(port=port, timeout=120) as client:
+                slow['result'] = client.query('next_prime', big)
+                slow['done'] = time.perf_counter()
+
+        slow_thread = threading.Thread(target=slow_query)
+        slow_thread.start()
+        time.sleep(0.3)  # 等大数请求发出并交给进程池
+
+        with PrimeQueryClient(port=port, timeout=60) as client:
+            fast_results = [client.query('is_prime', n) for n in (2, 4, 97, 10**12 + 39)]
+            fast_done = time.perf_counter()
+        slow_thread.join()
+        ok = fast_results == [True, False, True, True] and fast_done < slow['done'] and slow['result'] > big
+        print(f"{'✓' if ok else '✗'} 大数 next_prime 计算期间其他连接仍立即得到回答"
+              f"（早 {slow['done'] - fast_done:.2f} 秒）")
+        assert ok
+
+        results = {}
+
+        def worker(k):
+            with PrimeQueryClient(port=port, timeout=60) as client:
+                numbers = [1000 * k + i for i in range(1, 50)]
+                results[k] = client.query('factor', numbers) == [
+                    [[p, e] for p, e in factorize(n).items()] for n in numbers]
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ok = len(results) == 6 and all(results.values())
+        print(f"{'✓' if ok else '✗'} {len(threads)} 个连接并发分解，结果正确")
+        assert ok
+
+    print()
+
+
+def test_malformed_requests():
+    """测试格式错误的请求逐条返回错误，连接保持可用"""
+    print("测试格式错误的请求:")
+    print("-" * 40)
+
+    with running_server(workers=1) as (server, port):
+        with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+            stream = sock.makefile('rwb')
+            lines = [
+                b'not json',
+                b'[1, 2]',
+                b'{"id": 3, "op": "is_prime", "n": [1, "x"]}',
+                b'{"id": 4, "op": "is_prime", "n": true}',
+                b'{"id": 5, "op": "is_prime"}',
+                b'{"id": 6, "op": "is_prime", "n": 97}',
+            ]
+            stream.write(b'\n'.join(lines) + b'\n\n')
+            stream.flush()
+            responses = [json.loads(stream.readline()) for _ in lines]
+
+        ok = (all('error' in r for r in responses[:5]) and [r['id'] for r in responses] == [None, None, 3, 4, 5, 6]
+              and responses[5] == {'id': 6, 'result': True})
+        print(f"{'✓' if ok else '✗'} 5 个错误请求各得到错误响应，之后的请求正常回答")
+        assert ok
+
+        ok = server.stats['errors'] == 4  # 无效的 JSON 在解析阶段就被拒绝，不计入请求
+        print(f"{'✓' if ok else '✗'} 错误计数: {server.stats['errors']}")
+        assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_server_queries()
+    test_pool_routing()
+    test_concurrent_clients()
+    test_malformed_requests()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分段筛法引擎
+"""
+
+from prime_checker import is_prime
+from itertools import islice
+
+from prime_sieve import (BACKENDS, iter_bucket_segments, iter_prime_chunks, iter_prime_segments, iter_primes,
+                         segment_span, simple_sieve)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+
+def test_simple_sieve():
+    """测试普通筛法"""
+    print("测试普通筛法:")
+    print("-" * 40)
+
+    test_cases = [
+        (1, []),
+        (2, [2]),
+        (10, [2, 3, 5, 7]),
+        (30, [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]),
+    ]
+
+    for limit, expected in test_cases:
+        result = simple_sieve(limit)
+        status = "✓" if result == expected else "✗"
+        print(f"{status} 不超过{limit}的质数: {result}")
+        assert result == expected
+
+    print()
+
+
+def test_segments_match_trial_division():
+    """测试分段结果与逐个判断一致（包括段边界和小范围）"""
+    print("测试分段筛法与逐个判断一致:")
+    print("-" * 40)
+
+    test_cases = [
+        (0, 100, 3),
+        (2, 2, 4),
+        (1000, 1100, 5),
+        (10**12, 10**12 + 1000, 64),
+    ]
+
+    for start, end, segment_bytes in test_cases:
+        found = [p for _, _, primes in iter_prime_segments(start, end, segment_bytes) for p in primes]
+        expected = [n for n in range(start, end + 1) if is_prime(n)]
+        status = "✓" if found == expected else "✗"
+        print(f"{status} [{start:,}, {end:,}] 段大小{segment_bytes}: {len(found)} 个质数")
+        assert found == expected
+
+    print()
+
+
+def test_backends_identical():
+    """测试各后端输出完全相同"""
+    print("测试各后端输出一致:")
+    print("-" * 40)
+
+    if len(BACKENDS) == 1:
+        print("未安装 NumPy，只有 python 后端，跳过")
+        print()
+        return
+
+    test_cases = [
+        (0, 3000, 16),
+        (10**12, 10**12 + 200000, 4096),
+        (10**15, 10**15 + 20000, 10000),
+    ]
+
+    for start, end, segment_bytes in test_cases:
+        results = {
+            backend: [p for _, _, primes in iter_prime_segments(start, end, segment_bytes, backend=backend)
+                      for p in primes]
+            for backend in BACKENDS
+        }
+        ok = all(primes == results['python'] for primes in results.values())
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}]: {len(results['python'])} 个质数")
+        assert ok
+
+    print()
+
+
+def test_iter_primes():
+    """测试惰性生成接口：提前停止、分块首尾相接"""
+    print("测试惰性生成接口:")
+    print("-" * 40)
+
+    # 在巨大的范围上只取前几个，立即返回
+    first = list(islice(iter_primes(10**12, 2 * 10**12 - 1), 4))
+    expected = [1000000000039, 1000000000061, 1000000000063, 1000000000091]
+    print(f"{'✓' if first == expected else '✗'} 1×10^12 之后的前4个质数: {first}")
+    assert first == expected
+
+    for workers in (1, 2):
+        chunks = list(iter_prime_chunks(1, 10000, workers=workers, segment_bytes=500))
+        contiguous = all(a.hi == b.lo for a, b in zip(chunks, chunks[1:]))
+        primes = [p for chunk in chunks for p in chunk]
+        ok = contiguous and chunks[0].lo == 1 and chunks[-1].hi == 10001 and primes == simple_sieve(10000)
+        print(f"{'✓' if ok else '✗'} {workers} 个进程: {len(chunks)} 块，{len(primes)} 个质数")
+        assert ok
+
+    print()
+
+
+def test_bucket_sieve():
+    """测试桶筛法：窗口很小（大部分基础质数进桶）时与逐个判断一致，以及高位窗口"""
+    print("测试桶筛法:")
+    print("-" * 40)
+
+    if 'bucket' not in BACKENDS:
+        print("未安装 NumPy，跳过")
+        print()
+        return
+
+    test_cases = [
+        (0, 5000, 8),
+        (10**9, 10**9 + 30000, 64),
+        (10**16, 10**16 + 3000, 100),
+        (10**16 - 1000, 10**16 + 1000, 2**22),
+    ]
+
+    for start, end, window_bytes in test_cases:
+        segments = list(iter_bucket_segments(start, end, window_bytes))
+        found = [p for _, _, primes in segments for p in primes]
+        expected = [n for n in range(start, end + 1) if is_prime(n)]
+        contiguous = all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+        ok = found == expected and contiguous
+        print(f"{'✓' if ok else '✗'} [{start:,}, {end:,}] 窗口{window_bytes}: {len(found)} 个质数")
+        assert ok
+
+    # 预先算好的基础质数（可以超过 sqrt(end)）
+    base_primes = np.asarray(simple_sieve(10**6)[1:], dtype=np.uint32)
+    for start, end in [(0, 5000), (10**12 - 3000, 10**12 + 3000)]:
+        found = [p for _, _, primes in iter_bucket_segments(start, end, 256, base_primes) for p in primes]
+        expected = [n for n in range(start, end + 1) if is_prime(n)]
+        print(f"{'✓' if found == expected else '✗'} [{start:,}, {end:,}] 预先给出基础质数: {len(found)} 个质数")
+        assert found == expected
+
+    for start, end in [(0, 8), (0, 5000), (10**16, 10**16 + 100000)]:
+        found = list(iter_primes(start, end, workers=2, backend='bucket'))
+        expected = list(iter_primes(start, end, backend='numpy'))
+        print(f"{'✓' if found == expected else '✗'} 2 个进程 [{start:,}, {end:,}]: {len(found)} 个质数")
+        assert found == expected
+
+    # 多进程的任务宽度随 sqrt(end) 增长
+    ok = segment_span(10**16, 2) == 2 * 2**23 * 8 < segment_span(10**18, 2) < segment_span(10**19, 2)
+    print(f"{'✓' if ok else '✗'} 多进程任务宽度: 10^18 为 {segment_span(10**18, 2) // 2**24} 个窗口")
+    assert ok
+
+    try:
+        list(iter_bucket_segments(2**64 - 10, 2**64 + 10))
+        ok = False
+    except ValueError:
+        ok = True
+    print(f"{'✓' if ok else '✗'} 超过 2^64 的范围被拒绝")
+    assert ok
+
+    print()
+
+
+if __name__ == "__main__":
+    test_simple_sieve()
+    test_segments_match_trial_division()
+    test_backends_identical()
+    test_iter_primes()
+    test_bucket_sieve()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试二进制质数存储
+"""
+
+import os
+
+from prime_sieve import simple_sieve
+from prime_store import PrimeStoreReader, PrimeStoreWriter, convert_to_csv, decode_gaps, encode_gaps, index_path
+
+
+def test_gap_encoding():
+    """测试间隔编码与解码互逆（包括奇数间隔 2→3 和需要多字节的大间隔）"""
+    print("测试间隔编码:")
+    print("-" * 40)
+
+    test_cases = [
+        [2],
+        [2, 3, 5, 7, 11],
+        [1000000000039, 1000000000061, 1000000000063],
+        [1693182318746371, 1693182318747503],  # 间隔1132，需要2个字节
+    ]
+
+    for primes in test_cases:
+        result = decode_gaps(primes[0], encode_gaps(primes))
+        status = "✓" if result == primes else "✗"
+        print(f"{status} {primes}")
+        assert result == primes
+
+    print()
+
+
+def test_writer_reader():
+    """测试分块写入后按序号、按数值定位以及流式读取"""
+    print("测试读写与定位:")
+    print("-" * 40)
+
+    test_file = "test_store.bin"
+    primes = simple_sieve(100000)
+
+    with PrimeStoreWriter(test_file, block_size=100) as writer:
+        # 分多批写入，批次大小与块大小不对齐
+        for i in range(0, len(primes), 37):
+            writer.write(primes[i:i + 37])
+
+    with PrimeStoreReader(test_file) as reader:
+        checks = [
+            (len(reader) == len(primes), f"质数总数 {len(reader)}"),
+            (list(reader) == primes, "流式读取结果一致"),
+            (reader.nth_prime(1) == 2, "第1个质数是2"),
+            (reader.nth_prime(1000) == 7919, "第1000个质数是7919"),
+            (reader.nth_prime(len(primes)) == primes[-1], "最后一个质数"),
+            (reader.first_at_least(7919) == (1000, 7919), "不小于7919的第一个质数"),
+            (reader.first_at_least(7920) == (1001, 7927), "不小于7920的第一个质数"),
+            (reader.first_at_least(0) == (1, 2), "不小于0的第一个质数"),
+            (reader.first_at_least(100000) is None, "超出范围返回None"),
+        ]
+
+    for ok, description in checks:
+        print(f"{'✓' if ok else '✗'} {description}")
+
+    for path in (test_file, index_path(test_file)):
+        if os.path.exists(path):
+            os.remove(path)
+
+    assert all(ok for ok, _ in checks)
+
+    print()
+
+
+def test_convert_to_csv():
+    """测试转换回CSV"""
+    print("测试转换为CSV:")
+    print("-" * 40)
+
+    test_file = "test_convert.bin"
+    csv_file = "test_convert.csv"
+
+    with PrimeStoreWriter(test_file, block_size=4) as writer:
+        writer.write([1009, 1013, 1019, 1021, 1031, 1033])
+
+    count = convert_to_csv(test_file, csv_file)
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    expected = ['序号,质数', '1,1009', '2,1013', '3,1019', '4,1021', '5,1031', '6,1033']
+    status = "✓" if lines == expected and count == 6 else "✗"
+    print(f"{status} 转换 {count} 个质数")
+
+    for path in (test_file, index_path(test_file), csv_file):
+        if os.path.exists(path):
+            os.remove(path)
+
+    assert lines == expected and count == 6
+
+    print()
+
+
+if __name__ == "__main__":
+    test_gap_encoding()
+    test_writer_reader()
+    test_convert_to_csv()
+    print("=" * 50)
+    print("所有测试完成！")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共享的小质数表
+"""
+
+import os
+import shutil
+import tempfile
+
+import prime_table
+from prime_table import DEFAULT_TABLE_LIMIT, TABLE_DIR_ENV, primes_up_to, set_table_limit, simple_sieve, table_path
+
+
+def test_lazy_table_and_disk_cache():
+    """测试质数表按需生成、写入磁盘缓存、之后直接读入，以及损坏的缓存会被重新生成"""
+    print("测试质数表与磁盘缓存:")
+    print("-" * 40)
+
+    directory = tempfile.mkdtemp()
+    saved_env = os.environ.get(TABLE_DIR_ENV)
+    os.environ[TABLE_DIR_ENV] = directory
+    try:
+        set_table_limit(100000)
+        ok = prime_table._table is None and not os.path.exists(table_path(100000))
+        print(f"{'✓' if ok else '✗'} 设置上界后尚未生成")
+        assert ok
+
+        expected = simple_sieve(100000)
+        ok = list(primes_up_to(1000)) == simple_sieve(1000) and list(primes_up_to(100000)) == expected
+        ok = ok and os.path.getsize(table_path(100000)) == 4 * len(expected)
+        print(f"{'✓' if ok else '✗'} 第一次使用时生成 {len(expected)} 个质数并写入 {table_path(100000)}")
+        assert ok
+
+        # 清空内存中的表，下次从磁盘读入
+        prime_table._table = None
+        ok = list(primes_up_to(100000)) == expected
+        print(f"{'✓' if ok else '✗'} 从磁盘缓存读入")
+        assert ok
+
+        with open(table_path(100000), 'wb') as f:
+            f.write(b'\x01\x00\x00\x00')
+        prime_table._table = None
+        ok = list(primes_up_to(100000)) == expected
+        print(f"{'✓' if ok else '✗'} 缓存损坏时重新生成")
+        assert ok
+
+        # 截断到一半：剩下的质数都正确但不完整，必须重新生成
+        with open(table_path(100000), 'rb') as f:
+            data = f.read()
+        for label, damaged in [('截断到一半', data[:len(data) // 2 // 4 * 4]),
+                               ('长度不是4的倍数', data[:-3]),
+                               ('只缺最后一个质数', data[:-4])]:
+            with open(table_path(100000), 'wb') as f:
+                f.write(damaged)
+            prime_table._table = None
+            ok = list(primes_up_to(100000)) == expected and os.path.getsize(table_path(100000)) == len(data)
+            print(f"{'✓' if ok else '✗'} 缓存{label}时重新生成并重写缓存")
+            assert ok
+
+        beyond = primes_up_to(200000)
+        ok = list(beyond) == simple_sieve(200000) and primes_up_to(1) == primes_up_to(0) and not primes_up_to(1)
+        print(f"{'✓' if ok else '✗'} 超过上界时现场筛选，边界值正确")
+        assert ok
+    finally:
+        set_table_limit(DEFAULT_TABLE_LIMIT)
+        if saved_env is None:
+            del os.environ[TABLE_DIR_ENV]
+        else:
+            os.environ[TABLE_DIR_ENV] = saved_env
+        shutil.rmtree(directory)
+
+    print()
+
+
+if __name__ == "__main__":
+    test_lazy_table_and_disk_cache()
+    print("=" * 50)
+    print("所有测试完成！")
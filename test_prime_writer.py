@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后台写入器与压缩输出
+"""
+
+import gzip
+import lzma
+import os
+
+from prime_range_finder import find_primes_in_range
+from prime_sieve import simple_sieve
+from prime_writer import BackgroundWriter, CsvPrimeWriter, open_prime_writer
+
+
+PRIMES = simple_sieve(50000)
+EXPECTED_ROWS = ['序号,质数'] + [f"{i},{p}" for i, p in enumerate(PRIMES, 1)]
+
+OPENERS = {None: open, 'gzip': gzip.open, 'lzma': lzma.open}
+
+
+def read_rows(path, compression):
+    with OPENERS[compression](path, 'rt', encoding='utf-8', newline='') as f:
+        return f.read().splitlines()
+
+
+def test_compressed_round_trip():
+    """测试各压缩方式写出的CSV与原始质数一致，并且分多次 sync 后截断续写仍然可读"""
+    print("测试压缩输出与截断续写:")
+    print("-" * 40)
+
+    for compression in (None, 'gzip', 'lzma'):
+        path = f"test_writer_{compression}.csv"
+        half = len(PRIMES) // 2
+
+        with open_prime_writer(path, compression=compression, max_queue=4) as writer:
+            for i in range(0, half, 1000):
+                writer.write(PRIMES[i:min(i + 1000, half)])
+            offset, _ = writer.sync()
+            # 模拟中断：检查点之后写出的残缺内容
+            writer.write(PRIMES[half:half + 777])
+
+        with open_prime_writer(path, compression=compression, first_ordinal=half + 1,
+                               resume_offsets=(offset, None), max_queue=0) as writer:
+            writer.write(PRIMES[half:])
+
+        rows = read_rows(path, compression)
+        size = os.path.getsize(path)
+        os.remove(path)
+        ok = rows == EXPECTED_ROWS
+        print(f"{'✓' if ok else '✗'} 压缩方式 {compression}: {len(rows) - 1} 行，{size:,} 字节")
+        assert ok
+
+    print()
+
+
+def test_background_errors():
+    """测试写入线程中的异常会在调用方重新抛出，且不会卡住计算线程"""
+    print("测试后台写入异常:")
+    print("-" * 40)
+
+    class FailingWriter:
+        def __init__(self):
+            self.closed = False
+
+        def write(self, primes):
+            raise OSError("磁盘已满")
+
+        def sync(self):
+            return 0, None
+
+        def close(self):
+            self.closed = True
+
+    inner = FailingWriter()
+    writer = BackgroundWriter(inner, max_queue=1)
+    raised = False
+    try:
+        for _ in range(10):
+            writer.write([2, 3, 5])
+        writer.sync()
+    except OSError:
+        raised = True
+    try:
+        writer.close()
+    except OSError:
+        pass
+
+    ok = raised and inner.closed
+    print(f"{'✓' if ok else '✗'} 异常已传回调用方，文件已关闭")
+    assert ok
+
+    print()
+
+
+def test_find_primes_compressed_resume():
+    """测试 find_primes_in_range 的压缩输出在断点续传后与未压缩输出一致"""
+    print("测试压缩输出的断点续传:")
+    print("-" * 40)
+
+    plain_file = "test_plain.csv"
+    find_primes_in_range(1, 50000, plain_file, progress_interval=10**9, segment_bytes=512)
+    expected = read_rows(plain_file, None)
+    os.remove(plain_file)
+
+    for compression in ('gzip', 'lzma'):
+        path = f"test_find.csv{'.gz' if compression == 'gzip' else '.xz'}"
+        checkpoint_file = path + ".ckpt"
+        find_primes_in_range(1, 50000, path, max_primes=2000, batch_size=300, progress_interval=10**9,
+                             segment_bytes=512, checkpoint_file=checkpoint_file, checkpoint_interval=0,
+                             compression=compression)
+        find_primes_in_range(1, 50000, path, batch_size=300, progress_interval=10**9, segment_bytes=512,
+                             checkpoint_file=checkpoint_file, resume=True, checkpoint_interval=0,
+                             compression=compression)
+        rows = read_rows(path, compression)
+        os.remove(path)
+        os.remove(checkpoint_file)
+        ok = rows == expected
+        print(f"{'✓' if ok else '✗'} {compression}: {len(rows) - 1} 个质数")
+        assert ok
+
+    print()
+
+
+def test_csv_writer_header():
+    """测试新文件写标题行，续写时不重复写标题行"""
+    path = "test_header.csv"
+    with CsvPrimeWriter(path) as writer:
+        writer.write([2, 3])
+    with CsvPrimeWriter(path, first_ordinal=3, resume_offset=os.path.getsize(path)) as writer:
+        writer.write([5])
+    rows = read_rows(path, None)
+    os.remove(path)
+    ok = rows == ['序号,质数', '1,2', '2,3', '3,5']
+    print(f"{'✓' if ok else '✗'} 标题行只写一次: {rows}")
+    assert ok
+
+
+if __name__ == "__main__":
+    test_compressed_round_trip()
+    test_background_errors()
+    test_find_primes_compressed_resume()
+    test_csv_writer_header()
+    print("=" * 50)
+    print("所有测试完成！")